@@ -23,6 +23,7 @@ import PromptInput from "./PromptInput";
 import SlideEditor from "./SlideEditor";
 import ToolPanel from "@/components/ToolPanel";
 import { Slide, SlideElement } from "@/types/slide";
+import { streamEvents } from "@/lib/slideStream";
 
 const tools = [
   { id: "select", icon: MousePointer, label: "Select" },
@@ -175,20 +176,48 @@ export default function App() {
   const handleGenerateSlides = async (prompt: string) => {
     setIsGenerating(true);
     try {
-      const response = await fetch("http://localhost:5000/api/generate-slide", {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ prompt }),
-      });
-      const data = await response.json();
-      if (data.slide) {
-        setSlides([data.slide]);
+      // Show the title and bullets as they stream in, then swap in the laid-out slide
+      let title = "";
+      const bullets: string[] = [];
+      const showPreview = () => {
+        const previewElements: SlideElement[] = [
+          { id: "stream_title", type: "text", content: title, x: 50, y: 80, width: 700, height: 60,
+            style: { fontSize: "24px", fontWeight: "bold" } },
+        ];
+        if (bullets.length > 0) {
+          previewElements.push({
+            id: "stream_bullets", type: "text", content: bullets.map((b) => `• ${b}`).join("\n"),
+            x: 50, y: 180, width: 700, height: bullets.length * 30 + 20, style: { fontSize: "14px" },
+          });
+        }
+        setSlides([{ id: 1, title, content: "", notes: "", elements: previewElements }]);
         setCurrentSlide(0);
+      };
+
+      let finalSlide: Slide | null = null;
+      let streamError: string | null = null;
+      await streamEvents("http://localhost:5000/api/generate-slide/stream", { prompt }, ({ event, data }) => {
+        if (event === "title") {
+          title = data.title;
+          showPreview();
+        } else if (event === "bullet") {
+          bullets[data.index] = data.text;
+          showPreview();
+        } else if (event === "slide") {
+          finalSlide = data.slide;
+          setSlides([data.slide]);
+          setCurrentSlide(0);
+        } else if (event === "error") {
+          streamError = data.error;
+        }
+      });
+
+      if (finalSlide) {
         setPresentationId(`ai_pres_${Date.now()}`);
         setHasImage(true);
         alert("Presentation generated successfully!");
       } else {
-        alert("Failed to generate slide: " + (data.error || "Unknown error"));
+        alert("Failed to generate slide: " + (streamError || "Unknown error"));
       }
     } catch (err) {
       console.error("Generation error:", err);
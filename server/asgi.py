@@ -0,0 +1,221 @@
+"""
+ASGI entry point for production serving.
+
+Run with:  uvicorn asgi:application --host 0.0.0.0 --port 5000
+       or: SERVER_MODE=asgi python server.py
+
+The AI generation routes are handled natively on the event loop and await
+the model through server.generate_with_gemini_async, so one worker can hold
+hundreds of pending generations. They get the same Server-Timing header,
+request histogram and response compression as Flask routes. Every other
+route is delegated to the Flask app through asgiref's WSGI adapter, so
+behaviour stays identical.
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+
+from asgiref.wsgi import WsgiToAsgi
+
+import server
+from instrumentation import instrumentation, stage
+from json_provider import compress_body
+
+logger = logging.getLogger(__name__)
+
+wsgi_application = WsgiToAsgi(server.app)
+
+
+async def run_blocking(func, *args):
+    """Run blocking I/O such as a storage write in the default thread pool, off the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, contextvars.copy_context().run, func, *args)
+
+
+async def read_json(receive):
+    """Read and decode the full JSON request body"""
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get("body", b"")
+        more_body = message.get("more_body", False)
+    return json.loads(body) if body else {}
+
+
+def request_header(scope, name):
+    """First value of a request header, decoded, or None"""
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+async def send_json(send, payload, status=200, scope=None):
+    """Send a JSON response with the same encoder, compression, CORS policy and
+    instrumentation as the Flask app"""
+    with stage("json_encode"):
+        body = server.app.json.dumps(payload).encode("utf-8")
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"access-control-allow-origin", b"*"),
+    ]
+    if scope is not None:
+        if status == 200:
+            body, encoding = compress_body(body, request_header(scope, b"accept-encoding"))
+            if encoding is not None:
+                headers += [(b"content-encoding", encoding.encode("ascii")), (b"vary", b"Accept-Encoding")]
+        server_timing = instrumentation.finish_request(scope["path"], scope["method"], status)
+        if server_timing is not None:
+            headers.append((b"server-timing", server_timing.encode("ascii")))
+    headers.append((b"content-length", str(len(body)).encode("ascii")))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def generate_slide(data):
+    """Async twin of server.generate_slide"""
+    prompt = data.get('prompt', '')
+    color_theme = data.get('color_theme', 'blue')
+    conversation_id, error = server.parse_conversation_id(data)
+
+    if not prompt:
+        return {"error": "Prompt is required"}, 400
+    if error:
+        return {"error": error}, 400
+
+    logger.info(f"Generating slide for: {prompt} with color theme: {color_theme}")
+    context = server.conversation_context(conversation_id)
+    ai_response = await server.generate_with_gemini_async(prompt, context)
+    server.record_generated_slide(conversation_id, prompt, ai_response)
+
+    slide = server.build_generated_slide(ai_response, prompt, color_theme)
+    return {
+        "slide": slide,
+        "ai_response": ai_response,
+        "conversation_id": conversation_id,
+        "message": "Slide generated successfully"
+    }, 200
+
+
+async def create_presentation(data):
+    """Async twin of server.create_presentation"""
+    prompt = data.get('prompt', '')
+    slides = data.get('slides', [])
+    color_theme = data.get('color_theme', 'blue')
+
+    presentation_id = str(server.uuid.uuid4())
+
+    if prompt and prompt != "Manual save":
+        logger.info(f"Creating presentation with prompt: {prompt}")
+        ai_response = await server.generate_with_gemini_async(prompt)
+        slides.append(server.build_slide(ai_response, color_theme))
+
+    await run_blocking(server.store_new_presentation, presentation_id, prompt, slides, color_theme)
+
+    logger.info(f"Created presentation {presentation_id} with {len(slides)} slides")
+    return {
+        "presentation_id": presentation_id,
+        "slides": slides,
+        "message": "Presentation created successfully"
+    }, 200
+
+
+async def create_deck(data):
+    """Async twin of server.create_deck"""
+    spec, error = server.parse_deck_request(data)
+    if error:
+        return {"error": error}, 400
+
+    topic = spec["topic"]
+    logger.info(f"Generating {spec['slide_count']}-slide deck for: {topic}")
+
+    loop = asyncio.get_running_loop()
+    outline = spec["outline"] or await loop.run_in_executor(
+        server.llm_executor, contextvars.copy_context().run, server.plan_deck_outline, topic, spec["slide_count"]
+    )
+
+    semaphore = asyncio.Semaphore(spec["parallelism"])
+
+    async def generate(position, title):
+        async with semaphore:
+            prompt = server.deck_slide_prompt(topic, title, position, len(outline))
+            return await server.generate_with_gemini_async(prompt)
+
+    ai_responses = await asyncio.gather(
+        *(generate(i + 1, title) for i, title in enumerate(outline))
+    )
+    slides = [
+        server.build_slide(ai_response, spec["color_theme"])
+        for ai_response in ai_responses
+    ]
+
+    presentation_id = str(server.uuid.uuid4())
+    await run_blocking(server.store_new_presentation, presentation_id, topic, slides, spec["color_theme"])
+
+    logger.info(f"Created deck {presentation_id} with {len(slides)} slides")
+    return {
+        "presentation_id": presentation_id,
+        "outline": outline,
+        "slides": slides,
+        "message": "Deck generated successfully"
+    }, 200
+
+
+async def quick_inspiration(data):
+    """Async twin of server.quick_inspiration"""
+    inspiration = data.get('inspiration', '')
+
+    if not inspiration:
+        return {"error": "Inspiration text required"}, 400
+
+    ai_response = await server.generate_with_gemini_async(inspiration)
+    return {
+        "slide_content": ai_response,
+        "message": "Inspiration processed successfully"
+    }, 200
+
+
+ASYNC_ROUTES = {
+    ("POST", "/api/generate-slide"): generate_slide,
+    ("POST", "/api/presentai"): create_presentation,
+    ("POST", "/api/presentai/deck"): create_deck,
+    ("POST", "/api/quick-inspiration"): quick_inspiration,
+}
+
+
+async def lifespan(receive, send):
+    """Handle ASGI startup/shutdown events"""
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            server.llm_executor.shutdown(wait=False)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    """ASGI application serving every SlideFlow route"""
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+
+    handler = None
+    if scope["type"] == "http":
+        handler = ASYNC_ROUTES.get((scope["method"], scope["path"]))
+    if handler is None:
+        await wsgi_application(scope, receive, send)
+        return
+
+    instrumentation.start_request()
+    try:
+        data = await read_json(receive)
+        payload, status = await handler(data)
+    except Exception as e:
+        logger.error(f"Error handling {scope['path']}: {str(e)}")
+        payload, status = {"error": str(e)}, 500
+    await send_json(send, payload, status, scope)
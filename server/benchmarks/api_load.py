@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+End-to-end API load test
+========================
+
+Starts the backend in a subprocess with the stub model provider
+(MODEL_PROVIDER=stub), seeds the presentation store, and drives a weighted
+mix of requests against the HTTP API:
+
+    generate  POST /api/generate-slide
+    presentai POST /api/presentai
+    get       GET  /api/presentations/<id>
+    list      GET  /api/presentations
+    put       PUT  /api/presentations/<id>
+    color     PUT  /api/slides/<id>/color
+    export    POST /api/export-pptx
+
+Reports throughput, p50/p95/p99 latency per operation and overall, and the
+server's resident memory. Results are written as JSON so runs can be
+compared across commits with --compare.
+
+Usage:
+    python benchmarks/api_load.py --concurrency 50 --requests 5000 --store-size 1000 --deck-size 10 \\
+        --output results/api_load.json
+    python benchmarks/api_load.py --compare results/api_load.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from asgi_vs_flask import SERVER_DIR, free_port, percentile, wait_for_port
+
+DEFAULT_MIX = "generate=20,presentai=5,get=25,list=15,put=10,color=15,export=10"
+SAMPLE_SIZE = 200  # presentations the client keeps locally for get/put/color/export
+
+
+def serve(args):
+    """Run the backend in this process with a seeded store and the stub model"""
+    os.environ.update({
+        "MODEL_PROVIDER": "stub",
+        "MODEL_STUB_LATENCY_MS": str(args.latency * 1000),
+        "MODEL_STUB_JITTER_MS": str(args.jitter * 1000),
+        "MODEL_STUB_ERROR_RATE": str(args.error_rate),
+        "RESPONSE_CACHE_BACKEND": args.response_cache,
+        "STORAGE_BACKEND": args.storage,
+        "LLM_RATE_PER_SEC": "0",
+        "LLM_MAX_IN_FLIGHT": str(args.threads),
+        "LLM_EXECUTOR_WORKERS": str(args.threads),
+    })
+    sys.path.insert(0, SERVER_DIR)
+    import logging
+    logging.disable(logging.WARNING)
+    import server
+
+    themes = list(server.COLOR_THEMES)
+    for i in range(args.store_size):
+        theme = themes[i % len(themes)]
+        slides = []
+        for j in range(args.deck_size):
+            ai_response = server.model.respond(f"Seed deck {i} slide {j}")
+            slides.append(server.build_slide(json.loads(ai_response), theme))
+        server.store_new_presentation(f"bench-{i}", f"Seed deck {i}", slides, theme)
+
+    if args.mode == "flask":
+        server.app.run(host="127.0.0.1", port=args.port, threaded=True)
+    else:
+        import uvicorn
+        import asgi
+        uvicorn.run(asgi.application, host="127.0.0.1", port=args.port,
+                    log_level="warning", backlog=4096)
+
+
+async def http(port, method, path, payload=None):
+    """Minimal HTTP/1.1 request returning (status, body)"""
+    body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+        f"Connection: close\r\n\r\n".encode("ascii") + body
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, content = response.partition(b"\r\n\r\n")
+    return int(head.split(b" ", 2)[1]), content
+
+
+class Workload:
+    """Builds the requests of the mix from a local sample of the store"""
+
+    def __init__(self, args, rng):
+        self.args = args
+        self.rng = rng
+        self.decks = {}
+        self.counter = 0
+        weights = dict(part.split("=") for part in args.mix.split(","))
+        self.operations = [name for name in weights if float(weights[name]) > 0]
+        self.weights = [float(weights[name]) for name in self.operations]
+        self.themes = []
+
+    async def load_sample(self, port):
+        _, body = await http(port, "GET", "/api/color-themes")
+        self.themes = json.loads(body)["available_colors"]
+        for i in range(min(SAMPLE_SIZE, self.args.store_size)):
+            status, body = await http(port, "GET", f"/api/presentations/bench-{i}")
+            if status == 200:
+                self.decks[f"bench-{i}"] = json.loads(body)["slides"]
+
+    def pick(self):
+        return self.rng.choices(self.operations, self.weights)[0]
+
+    def request(self, operation):
+        """(method, path, payload) for one request of the given operation"""
+        self.counter += 1
+        if operation == "generate":
+            return "POST", "/api/generate-slide", {"prompt": f"Load test topic {self.counter}"}
+        if operation == "presentai":
+            return "POST", "/api/presentai", {"prompt": f"Load test deck {self.counter}"}
+        if operation == "list":
+            return "GET", "/api/presentations?limit=20&fields=summary", None
+
+        presentation_id = self.rng.choice(list(self.decks))
+        slides = self.decks[presentation_id]
+        if operation == "get":
+            return "GET", f"/api/presentations/{presentation_id}", None
+        if operation == "color":
+            slide = self.rng.choice(slides)
+            return "PUT", f"/api/slides/{slide['id']}/color", {
+                "presentation_id": presentation_id, "color_theme": self.rng.choice(self.themes),
+            }
+        if operation == "put":
+            edited = [dict(slide) for slide in slides]
+            edited[0]["title"] = f"Edited {self.counter}"
+            return "PUT", f"/api/presentations/{presentation_id}", {"slides": edited}
+        if operation == "export":
+            # Half the exports repeat a deck as-is, half change one slide
+            if self.rng.random() < 0.5:
+                slides = [dict(slide) for slide in slides]
+                slides[-1]["title"] = f"Export {self.counter}"
+                slides[-1]["elements"] = []
+            return "POST", "/api/export-pptx", {"slides": slides}
+        raise ValueError(f"Unknown operation: {operation}")
+
+
+def server_memory(pid):
+    """Current and peak RSS of the server in MB, read from /proc (Linux only)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+        return {
+            "rss_mb": round(int(fields["VmRSS"].split()[0]) / 1024, 1),
+            "peak_rss_mb": round(int(fields["VmHWM"].split()[0]) / 1024, 1),
+        }
+    except (OSError, KeyError, ValueError):
+        return {"rss_mb": None, "peak_rss_mb": None}
+
+
+async def drive(port, workload, total, concurrency):
+    """Send total requests from the mix with at most concurrency in flight"""
+    samples = {name: [] for name in workload.operations}
+    errors = {name: 0 for name in workload.operations}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        operation = workload.pick()
+        method, path, payload = workload.request(operation)
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                status, _ = await http(port, method, path, payload)
+            except OSError:
+                status = 0
+            samples[operation].append(time.perf_counter() - start)
+            if status >= 400 or status == 0:
+                errors[operation] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return samples, errors, time.perf_counter() - start
+
+
+def summarize(latencies, errors, elapsed):
+    if not latencies:
+        return {"requests": 0, "errors": errors}
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+    }
+
+
+def run(args):
+    port = free_port()
+    export_dir = tempfile.mkdtemp(prefix="api_load_exports_")
+    env = dict(os.environ, EXPORT_DIR=export_dir,
+               STORAGE_PATH=os.path.join(export_dir, "bench.sqlite3"))
+    command = [sys.executable, os.path.abspath(__file__), "--serve", "--port", str(port)]
+    for name in ("mode", "latency", "jitter", "error_rate", "store_size", "deck_size",
+                 "threads", "storage", "response_cache"):
+        command += [f"--{name.replace('_', '-')}", str(getattr(args, name))]
+    proc = subprocess.Popen(command, cwd=SERVER_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(port, timeout=300)
+        memory_start = server_memory(proc.pid)
+        workload = Workload(args, random.Random(args.seed))
+
+        async def main():
+            await workload.load_sample(port)
+            if args.warmup:
+                await drive(port, workload, args.warmup, args.concurrency)
+            return await drive(port, workload, args.requests, args.concurrency)
+
+        samples, errors, elapsed = asyncio.run(main())
+        memory_end = server_memory(proc.pid)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    every = [latency for latencies in samples.values() for latency in latencies]
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "commit": git_commit(),
+        "config": {name: getattr(args, name) for name in (
+            "mode", "concurrency", "requests", "warmup", "store_size", "deck_size", "latency",
+            "jitter", "error_rate", "mix", "storage", "response_cache", "seed")},
+        "overall": summarize(every, sum(errors.values()), elapsed),
+        "operations": {name: summarize(samples[name], errors[name], elapsed) for name in samples},
+        "memory": {
+            "start_rss_mb": memory_start["rss_mb"],
+            "end_rss_mb": memory_end["rss_mb"],
+            "peak_rss_mb": memory_end["peak_rss_mb"],
+        },
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SERVER_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(result, baseline=None):
+    print(f"{'operation':<11}{'requests':>9}{'errors':>8}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    rows = list(result["operations"].items()) + [("overall", result["overall"])]
+    for name, stats in rows:
+        if not stats.get("requests"):
+            continue
+        line = (f"{name:<11}{stats['requests']:>9}{stats['errors']:>8}{stats['rps']:>9}"
+                f"{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}")
+        before = (baseline or {}).get("operations", {}).get(name) if name != "overall" else \
+            (baseline or {}).get("overall")
+        if before and before.get("p95_ms"):
+            change = (stats["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100
+            line += f"   p95 {change:+.1f}% vs {baseline.get('commit') or 'baseline'}"
+        print(line)
+    memory = result["memory"]
+    print(f"server RSS: {memory['start_rss_mb']} MB at start, {memory['end_rss_mb']} MB at end, "
+          f"{memory['peak_rss_mb']} MB peak")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["flask", "asgi"], default="asgi")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--store-size", type=int, default=500, help="presentations seeded before the run")
+    parser.add_argument("--deck-size", type=int, default=10, help="slides per seeded presentation")
+    parser.add_argument("--latency", type=float, default=0.3, help="stub model latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.1, help="stub model latency jitter in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="stub model error rate")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="operation weights")
+    parser.add_argument("--storage", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--response-cache", choices=["none", "memory", "sqlite"], default="none")
+    parser.add_argument("--threads", type=int, default=256, help="LLM executor size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON result here")
+    parser.add_argument("--compare", help="JSON result of an earlier run to compare against")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    result = run(args)
+    print_report(result, baseline)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Load benchmark: Flask dev server vs. ASGI serving mode
+======================================================
+
+Starts the backend twice, once through ``app.run`` (Flask dev server) and
+once through uvicorn + ``asgi:application``, with the stub model provider
+(MODEL_PROVIDER=stub) of configurable latency in place of Gemini. Each server is driven with the
+same burst of unique /api/generate-slide prompts and the script reports
+requests per second and p50/p99 latency.
+
+Usage:
+    python benchmarks/asgi_vs_flask.py --latency 0.5 --concurrency 200 --requests 2000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def serve(mode, port, latency, threads):
+    """Run the backend in this process with the stub model provider"""
+    os.environ["MODEL_PROVIDER"] = "stub"
+    os.environ["MODEL_STUB_LATENCY_MS"] = str(latency * 1000)
+    os.environ["MODEL_STUB_JITTER_MS"] = "0"
+    os.environ["RESPONSE_CACHE_BACKEND"] = "none"
+    os.environ["LLM_EXECUTOR_WORKERS"] = str(threads)
+    os.environ["LLM_MAX_IN_FLIGHT"] = str(threads)
+    os.environ["LLM_RATE_PER_SEC"] = "0"
+    sys.path.insert(0, SERVER_DIR)
+    import logging
+    logging.disable(logging.INFO)
+    import server
+
+    if mode == "flask":
+        server.app.run(host="127.0.0.1", port=port, threaded=True)
+    else:
+        import uvicorn
+        import asgi
+        uvicorn.run(asgi.application, host="127.0.0.1", port=port,
+                    log_level="warning", backlog=4096)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+async def post_json(port, path, payload):
+    """Minimal HTTP/1.1 POST returning the response status"""
+    body = json.dumps(payload).encode("utf-8")
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+        f"Connection: close\r\n\r\n".encode("ascii") + body
+    )
+    await writer.drain()
+    status_line = await reader.readline()
+    await reader.read()
+    writer.close()
+    return int(status_line.split()[1])
+
+
+async def drive(port, total, concurrency):
+    """Send total requests with at most concurrency in flight"""
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                status = await post_json(port, "/api/generate-slide", {"prompt": f"Benchmark topic {i}"})
+            except OSError:
+                status = 0
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+    return latencies, errors, elapsed
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run(mode, args):
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--serve", mode, "--port", str(port),
+         "--latency", str(args.latency), "--threads", str(args.threads)],
+        cwd=SERVER_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_port(port)
+        latencies, errors, elapsed = asyncio.run(drive(port, args.requests, args.concurrency))
+    finally:
+        proc.terminate()
+        proc.wait()
+    return {
+        "mode": mode,
+        "requests": args.requests,
+        "errors": errors,
+        "rps": round(args.requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.5, help="stub model latency in seconds")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=256, help="LLM executor size for ASGI mode")
+    parser.add_argument("--modes", default="flask,asgi")
+    parser.add_argument("--serve", choices=["flask", "asgi"], help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port, args.latency, args.threads)
+        return
+
+    results = [run(mode, args) for mode in args.modes.split(",")]
+    print(f"{'mode':<8}{'rps':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for r in results:
+        print(f"{r['mode']:<8}{r['rps']:>10}{r['p50_ms']:>10}{r['p99_ms']:>10}{r['errors']:>8}")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
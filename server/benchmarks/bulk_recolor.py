@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Bulk recolor benchmark
+======================
+
+Stores a --slides slide deck and switches it to another theme two ways,
+through the Flask test client (no network, so the numbers are the server's
+own cost per request):
+
+- per-slide: one PUT /api/slides/<id>/color per slide, the only option
+  before the bulk endpoint
+- bulk: a single PUT /api/presentations/<id>/theme
+
+Each run alternates between two themes so every run does real work.
+
+Usage:
+    python benchmarks/bulk_recolor.py --slides 100 --runs 5
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+
+def make_deck(server, slide_count):
+    slides = []
+    for index in range(slide_count):
+        ai_response = {
+            "title": f"Slide {index}",
+            "content": f"Summary of part {index} of the plan.",
+            "bullet_points": ["First point", "Second point", "Third point"],
+        }
+        slides.append(server.build_slide(ai_response, "blue"))
+    presentation_id = f"bench-{time.time_ns()}"
+    server.store_new_presentation(presentation_id, "Bulk recolor benchmark", slides, "blue")
+    return presentation_id, [slide["id"] for slide in slides]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--slides", type=int, default=100)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    import server
+
+    client = server.app.test_client()
+    presentation_id, slide_ids = make_deck(server, args.slides)
+    themes = ["green", "purple"]
+
+    results = {"per-slide": [], "bulk": []}
+    for run in range(args.runs):
+        theme = themes[run % 2]
+        start = time.perf_counter()
+        for slide_id in slide_ids:
+            response = client.put(f"/api/slides/{slide_id}/color",
+                                  json={"color_theme": theme, "presentation_id": presentation_id})
+            assert response.status_code == 200, response.get_json()
+        results["per-slide"].append((time.perf_counter() - start, len(slide_ids)))
+
+        theme = themes[(run + 1) % 2]
+        start = time.perf_counter()
+        response = client.put(f"/api/presentations/{presentation_id}/theme", json={"color_theme": theme})
+        assert response.status_code == 200, response.get_json()
+        results["bulk"].append((time.perf_counter() - start, 1))
+
+    print(f"{args.slides} slides, storage={server.presentation_store.name}")
+    print(f"{'mode':<11}{'requests':>10}{'median ms':>11}{'ms/slide':>10}")
+    for mode, runs in results.items():
+        median = statistics.median(seconds for seconds, _ in runs) * 1000
+        print(f"{mode:<11}{runs[0][1]:>10}{median:>11.1f}{median / args.slides:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
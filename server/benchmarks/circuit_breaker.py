@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Upstream outage recovery benchmark
+==================================
+
+Drives an LLMClient over the stub model through a simulated outage: every
+call fails until the circuit opens, then the upstream recovers and callers
+keep retrying every --interval ms until one gets through. The half-open
+probe after --reset seconds is sent three ways:
+
+- call: a blocking generate_content
+- stream: a stream_content read to the end
+- abandoned: a stream_content closed by the consumer after the first chunk,
+  as when a browser goes away mid-generation
+
+For each, it reports the calls rejected while the circuit was open and
+how long after the recovery the first caller got through. A run fails if
+the circuit has not closed within ten reset timeouts.
+
+Usage:
+    python benchmarks/circuit_breaker.py --reset 0.2 --interval 10
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from llm_client import CircuitBreaker, LLMClient, UpstreamUnavailable  # noqa: E402
+from model_providers import StubProvider  # noqa: E402
+
+
+def probe(client, mode):
+    if mode == "call":
+        client.generate_content("probe")
+    elif mode == "stream":
+        list(client.stream_content("probe"))
+    else:
+        stream = client.stream_content("probe")
+        next(stream)
+        stream.close()
+
+
+def run_outage(mode, reset, interval):
+    provider = StubProvider(latency=0, jitter=0, error_rate=1.0)
+    client = LLMClient(provider, breaker=CircuitBreaker(failure_threshold=3, reset_timeout=reset), max_retries=0)
+    while client.breaker.stats()["state"] != CircuitBreaker.OPEN:
+        try:
+            client.generate_content("outage")
+        except Exception:
+            pass
+
+    provider.error_rate = 0.0
+    recovered = time.perf_counter()
+    # Stop one interval early so no caller but the probe gets the half-open slot
+    half_open_at = client.breaker.opened_at + reset
+    while time.monotonic() + interval < half_open_at:
+        try:
+            client.generate_content("open")
+        except UpstreamUnavailable:
+            time.sleep(interval)
+    time.sleep(max(0.0, half_open_at - time.monotonic()))
+    probe(client, mode)
+    deadline = recovered + reset * 10
+    while time.perf_counter() < deadline:
+        try:
+            client.generate_content("after")
+            return client, time.perf_counter() - recovered
+        except UpstreamUnavailable:
+            time.sleep(interval)
+    raise AssertionError(f"{mode}: circuit still {client.breaker.stats()['state']} "
+                         f"{reset * 10:.1f}s after the upstream recovered")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reset", type=float, default=0.2, help="breaker reset timeout in seconds")
+    parser.add_argument("--interval", type=float, default=10, help="ms between caller retries")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    print(f"{'probe':<11}{'rejected':>10}{'recovered ms':>14}{'state':>8}")
+    for mode in ("call", "stream", "abandoned"):
+        client, elapsed = run_outage(mode, args.reset, args.interval / 1000)
+        stats = client.stats()
+        print(f"{mode:<11}{stats['rejected_circuit_open']:>10}{elapsed * 1000:>14.0f}"
+              f"{stats['circuit_breaker']['state']:>8}")
+
+
+if __name__ == "__main__":
+    main()
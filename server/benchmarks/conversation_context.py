@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Conversation context benchmark
+==============================
+
+Replays a multi-turn session (a topic, then "add a slide about ..." follow-ups)
+and reports the size of the generation prompt at each turn for:
+
+- stateless: the client resends the whole conversation so far with every
+  request, the only way to keep context without a server-side session
+- session: the request carries only the new subject, plus the compact
+  context the conversation store keeps (topic, slide titles, recent turns)
+
+Token counts use the store's estimate (about four characters per token).
+The store's own overhead (recording a turn and rendering the context) is
+reported per turn, and a load phase fills the store past its session and
+byte caps to show eviction keeping memory bounded.
+
+Usage:
+    python benchmarks/conversation_context.py --turns 30 --sessions 50000
+"""
+
+import argparse
+import logging
+import os
+import sys
+import timeit
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+SUBJECTS = [
+    "pricing", "the team", "go to market channels", "risks and mitigations", "the product roadmap",
+    "customer testimonials", "competitive landscape", "hiring plan", "quarterly targets", "budget",
+    "marketing campaigns", "partnerships", "key metrics", "open questions", "next steps",
+]
+
+
+def replay(server, conversation_id, topic, turns):
+    """Prompt token counts per turn for the stateless and session approaches"""
+    from conversation_store import estimate_tokens
+
+    history = [f"user: {topic}"]
+    server.conversation_store.set_topic(conversation_id, topic)
+    server.conversation_store.add_turn(conversation_id, "user", topic)
+    rows = []
+    for turn in range(turns):
+        subject = SUBJECTS[turn % len(SUBJECTS)]
+        utterance = f"add a slide about {subject}"
+        history.append(f"user: {utterance}")
+        stateless = server.build_slide_prompt("\n".join(history))
+
+        server.conversation_store.add_turn(conversation_id, "user", utterance)
+        session = server.build_slide_prompt(subject, server.conversation_context(conversation_id))
+        server.conversation_store.add_slide(conversation_id, subject.capitalize())
+        history.append(f"assistant: created slide \"{subject.capitalize()}\"")
+        rows.append((turn + 1, estimate_tokens(stateless), estimate_tokens(session)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--sessions", type=int, default=50000, help="sessions created in the load phase")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    import server
+    from conversation_store import ConversationStore
+
+    conversation_id = server.conversation_store.start()
+    rows = replay(server, conversation_id, "Our Q3 product launch plan for the European market", args.turns)
+    print(f"{'turn':>5}{'stateless tokens':>18}{'session tokens':>16}")
+    for turn, stateless, session in rows:
+        if turn in (1, 2, 5) or turn % 10 == 0 or turn == len(rows):
+            print(f"{turn:>5}{stateless:>18}{session:>16}")
+    total_stateless = sum(row[1] for row in rows)
+    total_session = sum(row[2] for row in rows)
+    print(f"total prompt tokens over {len(rows)} turns: stateless {total_stateless}, session {total_session} "
+          f"({100 * (1 - total_session / total_stateless):.0f}% fewer)")
+
+    store = server.conversation_store
+    number = 20000
+    add_us = timeit.timeit(lambda: store.add_turn(conversation_id, "user", "add a slide about pricing"),
+                           number=number) / number * 1e6
+    context_us = timeit.timeit(lambda: store.prompt_context(conversation_id), number=number) / number * 1e6
+    print(f"store overhead: add_turn {add_us:.1f} us, prompt_context {context_us:.1f} us")
+
+    bounded = ConversationStore(max_sessions=args.sessions // 2, max_bytes=8 * 1024 * 1024)
+    for index in range(args.sessions):
+        session_id = bounded.start()
+        bounded.set_topic(session_id, f"Topic number {index}")
+        bounded.add_turn(session_id, "user", f"Create a presentation about topic number {index}")
+    stats = bounded.stats()
+    print(f"load: {args.sessions} sessions created, {stats['sessions']} kept, "
+          f"{stats['bytes'] / 1e6:.1f} MB accounted (cap {stats['max_bytes'] / 1e6:.1f} MB), "
+          f"{stats['evictions']} evicted")
+
+
+if __name__ == "__main__":
+    main()
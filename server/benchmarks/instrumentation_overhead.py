@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Instrumentation overhead benchmark
+==================================
+
+Measures the per-request cost of stage timing, request histograms and the
+Server-Timing header. The same in-process requests (Flask test client, stub
+model with zero latency, no response cache) are sent in alternating blocks
+with instrumentation switched on and off, and the median block time of each
+setting is compared. With zero model latency this is the worst case; real
+generation requests spend seconds waiting on the model.
+
+Usage:
+    python benchmarks/instrumentation_overhead.py --block 200 --rounds 30
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+os.environ.update({
+    "MODEL_PROVIDER": "stub",
+    "MODEL_STUB_LATENCY_MS": "0",
+    "MODEL_STUB_JITTER_MS": "0",
+    "RESPONSE_CACHE_BACKEND": "none",
+    "LLM_RATE_PER_SEC": "0",
+})
+logging.disable(logging.WARNING)
+
+import server  # noqa: E402
+from instrumentation import instrumentation  # noqa: E402
+
+
+def workloads(client):
+    for i in range(100):
+        slides = [server.build_slide(json.loads(server.model.respond(f"deck {i} slide {j}")), "blue")
+                  for j in range(10)]
+        server.store_new_presentation(f"bench-{i}", f"deck {i}", slides, "blue")
+    return {
+        "generate": lambda i: client.post("/api/generate-slide", json={"prompt": f"topic {i}"}),
+        "get": lambda i: client.get(f"/api/presentations/bench-{i % 100}"),
+        "list": lambda i: client.get("/api/presentations?limit=20&fields=summary"),
+    }
+
+
+def time_block(call, block, offset):
+    start = time.perf_counter()
+    for i in range(block):
+        call(offset + i)
+    return (time.perf_counter() - start) / block * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--block", type=int, default=200, help="requests per timed block")
+    parser.add_argument("--rounds", type=int, default=30, help="on/off block pairs per workload")
+    args = parser.parse_args()
+
+    client = server.app.test_client()
+    print(f"{'workload':<10}{'off us/req':>12}{'on us/req':>12}{'delta us':>10}{'overhead':>10}")
+    for name, call in workloads(client).items():
+        time_block(call, args.block, 0)  # warm up
+        times = {True: [], False: []}
+        for round_index in range(args.rounds):
+            for enabled in (False, True):
+                instrumentation.enabled = enabled
+                times[enabled].append(time_block(call, args.block, round_index * args.block))
+        off, on = statistics.median(times[False]), statistics.median(times[True])
+        print(f"{name:<10}{off:>12.1f}{on:>12.1f}{on - off:>10.1f}{(on - off) / off * 100:>9.2f}%")
+    instrumentation.enabled = True
+
+
+if __name__ == "__main__":
+    main()
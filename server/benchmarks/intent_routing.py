@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Intent routing benchmark
+========================
+
+Compares the old /api/voice/process keyword check (substring search for
+casual words, three loops per request) with the compiled IntentRouter on a
+labelled corpus of voice utterances:
+
+- accuracy: whether each router makes the right generate / don't-generate
+  call, and for IntentRouter whether it picks the labelled intent
+- throughput: utterances routed per second, single-threaded
+
+Utterances a router got wrong are listed with --show-errors. For the old
+check these are topics containing a casual word ("Goods and services tax",
+"Wellness programs", "Fine dining trends") that stopped generation, and
+greetings, thanks or requests for help that were sent to the model.
+
+Usage:
+    python benchmarks/intent_routing.py --repeat 200 --show-errors
+"""
+
+import argparse
+import os
+import sys
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from intent_router import PRESENTATION, create_intent_router_from_env  # noqa: E402
+
+# (utterance, intent)
+CORPUS = [
+    # Topics, including ones that contain small-talk words
+    ("Goods and services tax", PRESENTATION),
+    ("Create a presentation about climate change", PRESENTATION),
+    ("Marketing strategy for Q3", PRESENTATION),
+    ("Wellness programs for remote employees", PRESENTATION),
+    ("Fine dining trends in 2025", PRESENTATION),
+    ("Great Barrier Reef conservation", PRESENTATION),
+    ("The good, the bad and the ugly of microservices", PRESENTATION),
+    ("Nice, France as a tourist destination", PRESENTATION),
+    ("Make a deck on our okay-to-great customer journey", PRESENTATION),
+    ("Machine learning basics", PRESENTATION),
+    ("Quarterly business review", PRESENTATION),
+    ("Project proposal for the new office", PRESENTATION),
+    ("Onboarding for new team members", PRESENTATION),
+    ("I need slides about cybersecurity awareness", PRESENTATION),
+    ("Can you build a pitch for our seed round", PRESENTATION),
+    ("Introduction to Kubernetes", PRESENTATION),
+    ("Sales performance review", PRESENTATION),
+    ("Employee burnout and how to prevent tiredness at work", PRESENTATION),
+    ("Bad debt management in small businesses", PRESENTATION),
+    ("Well-being in the workplace", PRESENTATION),
+    ("Good morning! Can you make a slide deck about renewable energy?", PRESENTATION),
+    ("I'm good, let's do a presentation on supply chain risks", PRESENTATION),
+    ("Thanks! Now make slides on the product roadmap", PRESENTATION),
+    ("Generate a talk about the history of jazz", PRESENTATION),
+    ("Team meeting agenda", PRESENTATION),
+    ("Business presentation", PRESENTATION),
+    ("A keynote on the future of electric vehicles", PRESENTATION),
+    ("Overview of our hiring process", PRESENTATION),
+    ("Tired of meetings: async communication for teams", PRESENTATION),
+    ("Okta single sign-on rollout", PRESENTATION),
+    ("Photosynthesis for eighth graders", PRESENTATION),
+    ("Budget planning 2026", PRESENTATION),
+    ("Customer churn analysis", PRESENTATION),
+    ("Prepare a lecture covering the French revolution", PRESENTATION),
+    ("Our company's sustainability goals", PRESENTATION),
+    ("Greatest hits of 80s pop music", PRESENTATION),
+    ("Nicely designed dashboards with Grafana", PRESENTATION),
+    ("Finest practices for code review", PRESENTATION),
+    ("Data privacy and GDPR compliance", PRESENTATION),
+    ("Webinar about personal finance for students", PRESENTATION),
+    ("Great Depression", PRESENTATION),
+    ("Good governance", PRESENTATION),
+    ("Fine arts", PRESENTATION),
+    ("Bad debt", PRESENTATION),
+    ("Sad songs", PRESENTATION),
+    ("Happy hour ideas", PRESENTATION),
+    ("Busy season planning", PRESENTATION),
+    # Small talk
+    ("hello", "greeting"),
+    ("hi there", "greeting"),
+    ("Hey!", "greeting"),
+    ("Good morning", "greeting"),
+    ("good evening", "greeting"),
+    ("howdy", "greeting"),
+    ("I'm good", "mood_positive"),
+    ("good", "mood_positive"),
+    ("Fine, thanks for asking", "mood_positive"),
+    ("I'm doing great", "mood_positive"),
+    ("pretty good", "mood_positive"),
+    ("not bad", "mood_positive"),
+    ("okay", "mood_positive"),
+    ("doing well", "mood_positive"),
+    ("All good here", "mood_positive"),
+    ("awesome", "mood_positive"),
+    ("I'm feeling fantastic today", "mood_positive"),
+    ("very well", "mood_positive"),
+    ("I'm tired", "mood_negative"),
+    ("bad", "mood_negative"),
+    ("not great", "mood_negative"),
+    ("pretty stressed today", "mood_negative"),
+    ("I'm exhausted", "mood_negative"),
+    ("rough day", "mood_negative"),
+    ("meh", "mood_negative"),
+    ("not so good", "mood_negative"),
+    ("thanks", "thanks"),
+    ("thank you so much", "thanks"),
+    ("thanks a lot", "thanks"),
+    ("much appreciated", "thanks"),
+    ("cheers", "thanks"),
+    ("bye", "goodbye"),
+    ("goodbye", "goodbye"),
+    ("that's all, thanks", "goodbye"),
+    ("see you later", "goodbye"),
+    ("good night", "goodbye"),
+    ("I'm done", "goodbye"),
+    ("help", "help"),
+    ("any ideas?", "help"),
+    ("I'm not sure", "help"),
+    ("what can you do", "help"),
+    ("I don't know what to present", "help"),
+    ("can you suggest something", "help"),
+    ("no idea", "help"),
+    ("how does this work?", "help"),
+    ("hmm", "small_talk"),
+    ("um", "small_talk"),
+    ("yes", "small_talk"),
+]
+
+
+class KeywordRouter:
+    """The keyword check /api/voice/process used before IntentRouter"""
+
+    casual_keywords = ['good', 'fine', 'great', 'okay', 'well', 'nice', 'bad', 'tired']
+
+    def route(self, user_input):
+        casual_keywords = self.casual_keywords
+        if any(keyword in user_input.lower() for keyword in casual_keywords):
+            response = "That's great to hear!"
+        else:
+            response = f"Perfect! I'll help you create a presentation about '{user_input}'."
+        return {
+            "response": response,
+            "should_generate": not any(keyword in user_input.lower() for keyword in casual_keywords),
+            "topic": user_input if not any(keyword in user_input.lower() for keyword in casual_keywords) else None,
+        }
+
+
+def evaluate(router, show_errors):
+    generate_correct = intent_correct = 0
+    errors = []
+    for text, label in CORPUS:
+        result = router.route(text)
+        if result["should_generate"] == (label == PRESENTATION):
+            generate_correct += 1
+        else:
+            errors.append((text, label, result.get("intent") or ("generate" if result["should_generate"] else "casual")))
+        if result.get("intent") == label:
+            intent_correct += 1
+    if show_errors:
+        for text, label, intent in errors:
+            print(f"    {type(router).__name__}: {text!r} labelled {label}, routed {intent}")
+    return generate_correct / len(CORPUS), intent_correct / len(CORPUS)
+
+
+def throughput(router, repeat):
+    texts = [text for text, _ in CORPUS] * repeat
+    start = time.perf_counter()
+    for text in texts:
+        router.route(text)
+    return len(texts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200, help="passes over the corpus for throughput")
+    parser.add_argument("--show-errors", action="store_true")
+    args = parser.parse_args()
+
+    routers = [KeywordRouter(), create_intent_router_from_env()]
+    topics = sum(1 for _, label in CORPUS if label == PRESENTATION)
+    print(f"corpus: {len(CORPUS)} utterances, {topics} presentation requests")
+    print(f"{'router':<15}{'generate acc':>14}{'intent acc':>12}{'utterances/s':>14}")
+    for router in routers:
+        generate_accuracy, intent_accuracy = evaluate(router, args.show_errors)
+        intent_column = f"{'-':>12}" if isinstance(router, KeywordRouter) else f"{intent_accuracy:>12.1%}"
+        print(f"{type(router).__name__:<15}{generate_accuracy:>14.1%}{intent_column}"
+              f"{throughput(router, args.repeat):>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+JSON encoding microbenchmark
+============================
+
+Encodes presentations of 10, 100 and 1,000 slides the way the API does and
+compares the stdlib encoder (Flask's default settings) with orjson, each in
+the default sorted form and the opt-in compact form. The last columns show
+the cost and ratio of gzip/brotli compression of the compact body.
+
+Usage:
+    python benchmarks/json_encoding.py --sizes 10,100,1000
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import os
+import sys
+import timeit
+from datetime import datetime
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+logging.disable(logging.INFO)
+
+import server  # noqa: E402
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def make_presentation(slide_count):
+    ai_response = {
+        "title": "Quarterly business review",
+        "content": "Revenue, pipeline and hiring against plan for the quarter.",
+        "bullet_points": ["Revenue up 12%", "Pipeline coverage 3.1x", "Two senior hires", "Churn flat"],
+    }
+    now = datetime.now().isoformat()
+    return {
+        "id": "bench",
+        "prompt": "benchmark",
+        "slides": [server.build_slide(ai_response, "blue") for _ in range(slide_count)],
+        "default_color_theme": "blue",
+        "created_at": now,
+        "updated_at": now,
+        "version": 1,
+    }
+
+
+def encoders():
+    """(name, function) pairs producing bytes"""
+    candidates = [
+        ("json sorted", lambda obj: json.dumps(obj, separators=(",", ":"), sort_keys=True).encode("utf-8")),
+        ("json indent", lambda obj: json.dumps(obj, indent=2, sort_keys=True).encode("utf-8")),
+        ("json compact", lambda obj: json.dumps(obj, separators=(",", ":")).encode("utf-8")),
+    ]
+    if orjson is not None:
+        candidates += [
+            ("orjson sorted", lambda obj: orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)),
+            ("orjson indent", lambda obj: orjson.dumps(obj, option=orjson.OPT_SORT_KEYS | orjson.OPT_INDENT_2)),
+            ("orjson compact", lambda obj: orjson.dumps(obj)),
+        ]
+    return candidates
+
+
+def time_call(fn, repeat):
+    number = max(1, repeat)
+    return min(timeit.repeat(fn, number=number, repeat=3)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10,100,1000")
+    args = parser.parse_args()
+
+    if orjson is None:
+        print("orjson is not installed; only the stdlib encoder is measured")
+
+    for size in (int(s) for s in args.sizes.split(",")):
+        presentation = make_presentation(size)
+        repeat = max(1, 2000 // size)
+        print(f"\n{size} slides")
+        print(f"  {'encoder':<16}{'ms/op':>10}{'bytes':>12}")
+        compact_body = None
+        for name, encode in encoders():
+            body = encode(presentation)
+            elapsed = time_call(lambda: encode(presentation), repeat)
+            print(f"  {name:<16}{elapsed * 1000:>10.3f}{len(body):>12}")
+            compact_body = body if name.endswith("compact") else compact_body
+
+        gzip_time = time_call(lambda: gzip.compress(compact_body, compresslevel=5), repeat)
+        gzip_size = len(gzip.compress(compact_body, compresslevel=5))
+        print(f"  {'gzip -5':<16}{gzip_time * 1000:>10.3f}{gzip_size:>12}")
+        if brotli is not None:
+            br_time = time_call(lambda: brotli.compress(compact_body, quality=4), repeat)
+            br_size = len(brotli.compress(compact_body, quality=4))
+            print(f"  {'brotli q4':<16}{br_time * 1000:>10.3f}{br_size:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+PPTX export benchmark
+=====================
+
+Exports decks of 50 and 500 generated slides through the export engine and
+reports wall time and peak RSS. Each run happens in a fresh subprocess so
+peak RSS is not polluted by earlier runs. Two output modes are compared:
+
+- buffered: the whole zip is written to a BytesIO first (the old behaviour)
+- streamed: the zip is consumed chunk by chunk from stream_presentation()
+
+Before timing anything, a fresh process exports a slide with a circle,
+a triangle and centered text and checks that the shape types and the
+paragraph alignment survive the lazy python-pptx import.
+
+Usage:
+    python benchmarks/pptx_export.py --sizes 50,500
+"""
+
+import argparse
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import time
+from io import BytesIO
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_slides(count):
+    sys.path.insert(0, SERVER_DIR)
+    logging.disable(logging.INFO)
+    import server
+
+    ai_response = {
+        "title": "Quarterly business review",
+        "content": "Revenue, pipeline and hiring against plan for the quarter.",
+        "bullet_points": ["Revenue up 12%", "Pipeline coverage 3.1x", "Two senior hires", "Churn flat"],
+    }
+    themes = list(server.COLOR_THEMES)
+    return [server.build_slide(ai_response, themes[i % len(themes)]) for i in range(count)], server
+
+
+def run_once(size, mode):
+    """Export one deck in this process and return timings"""
+    slides, server = make_slides(size)
+    from pptx_export import stream_presentation
+
+    exporter = server.pptx_exporter
+    start = time.perf_counter()
+    exporter.template_bytes("blue")
+    template_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    prs = exporter.build(slides, "blue")
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if mode == "buffered":
+        buffer = BytesIO()
+        prs.save(buffer)
+        size_bytes = len(buffer.getvalue())
+    else:
+        size_bytes = sum(len(chunk) for chunk in stream_presentation(prs))
+    write_time = time.perf_counter() - start
+
+    return {
+        "slides": size,
+        "mode": mode,
+        "template_ms": round(template_time * 1000, 1),
+        "build_ms": round(build_time * 1000, 1),
+        "write_ms": round(write_time * 1000, 1),
+        "total_ms": round((build_time + write_time) * 1000, 1),
+        "bytes": size_bytes,
+        # ru_maxrss is KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def check_styles():
+    """Export styled elements in this process and check shape types and alignment"""
+    sys.path.insert(0, SERVER_DIR)
+    logging.disable(logging.INFO)
+    import server
+    from pptx_export import PptxExporter
+    from pptx import Presentation
+    from pptx.enum.shapes import MSO_SHAPE
+    from pptx.enum.text import PP_ALIGN
+
+    slide = server.build_slide({"title": "Shapes", "content": "", "bullet_points": []}, "blue")
+    slide["elements"] = [
+        {"type": "shape", "x": 50, "y": 50, "width": 100, "height": 100, "style": {"shapeType": "circle"}},
+        {"type": "shape", "x": 200, "y": 50, "width": 100, "height": 100, "style": {"shapeType": "triangle"}},
+        {"type": "text", "content": "Centered", "x": 50, "y": 200, "width": 700, "height": 60,
+         "style": {"textAlign": "center"}},
+    ]
+    buffer = BytesIO()
+    # No fragment cache, so every element is rendered in this process
+    PptxExporter(server.COLOR_THEMES).build([slide], "blue").save(buffer)
+    shapes = list(Presentation(buffer).slides[0].shapes)
+    autoshapes = [shape.auto_shape_type for shape in shapes if shape.shape_type == 1]
+    assert autoshapes[-2:] == [MSO_SHAPE.OVAL, MSO_SHAPE.ISOSCELES_TRIANGLE], autoshapes
+    text = next(shape for shape in shapes if shape.has_text_frame and shape.text_frame.text == "Centered")
+    assert text.text_frame.paragraphs[0].alignment == PP_ALIGN.CENTER
+    return {"checked": len(shapes)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="50,500")
+    parser.add_argument("--modes", default="buffered,streamed")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    parser.add_argument("--check", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.check:
+        print(json.dumps(check_styles()))
+        return
+    if args.child:
+        print(json.dumps(run_once(int(args.child[0]), args.child[1])))
+        return
+
+    subprocess.run([sys.executable, os.path.abspath(__file__), "--check"], cwd=SERVER_DIR, check=True,
+                   stdout=subprocess.DEVNULL)
+
+    results = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        for mode in args.modes.split(","):
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", str(size), mode],
+                cwd=SERVER_DIR, capture_output=True, text=True, check=True,
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"{'slides':>7} {'mode':<9}{'template ms':>12}{'build ms':>10}{'write ms':>10}"
+          f"{'total ms':>10}{'MB out':>8}{'peak RSS MB':>13}")
+    for r in results:
+        print(f"{r['slides']:>7} {r['mode']:<9}{r['template_ms']:>12}{r['build_ms']:>10}{r['write_ms']:>10}"
+              f"{r['total_ms']:>10}{r['bytes'] / 1e6:>8.2f}{r['peak_rss_mb']:>13}")
+
+
+if __name__ == "__main__":
+    main()
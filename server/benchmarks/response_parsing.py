@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Model response parsing benchmark
+================================
+
+Runs the slide response parser over a corpus of response shapes seen from
+real models (bare JSON, code fences, prose around the object, single quotes,
+trailing commas, Python literals, unquoted keys, non-ASCII bare words, smart
+quotes, truncation, wrapper objects, plain markdown) plus randomly fuzzed
+variants of valid responses. For each shape it reports how often the parser recovers the
+model's real title and bullet points, for the previous json.loads-or-text
+approach and for response_parser, and the parse time in microseconds.
+
+Usage:
+    python benchmarks/response_parsing.py --fuzz 2000 --seed 1
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+logging.disable(logging.WARNING)
+
+from response_parser import parse_slide_response  # noqa: E402
+
+SLIDE = {
+    "title": "Renewable Energy Adoption",
+    "content": "How solar and wind moved from niche to mainstream over the last decade.",
+    "bullet_points": ["Solar costs fell by 89% since 2010", "Wind is the cheapest new power in most markets",
+                      "Storage is the remaining bottleneck"],
+    "design_theme": "modern",
+    "layout_type": "bullet-list",
+}
+SLIDE_JSON = json.dumps(SLIDE, indent=2)
+
+CORPUS = {
+    "bare": SLIDE_JSON,
+    "compact": json.dumps(SLIDE),
+    "fenced": f"```json\n{SLIDE_JSON}\n```",
+    "fenced_no_lang": f"```\n{SLIDE_JSON}\n```",
+    "prose_around": f"Sure! Here is the slide you asked for:\n\n{SLIDE_JSON}\n\nLet me know if you want changes.",
+    "prose_and_fence": f"Here's your slide:\n```json\n{SLIDE_JSON}\n```\nHope this helps!",
+    "trailing_commas": SLIDE_JSON.replace('"\n  ]', '",\n  ]').replace('"bullet-list"\n}', '"bullet-list",\n}'),
+    "single_quotes": SLIDE_JSON.replace('"', "'"),
+    "python_literals": json.dumps({**SLIDE, "speaker_notes": None, "draft": False}).replace("null", "None")
+                                                                                   .replace("false", "False"),
+    "unquoted_keys": "{" + ", ".join(f"{key}: {json.dumps(value)}" for key, value in SLIDE.items()) + "}",
+    "unquoted_non_ascii": "{" + ", ".join(f"{key}: {json.dumps(value, ensure_ascii=False)}"
+                                          for key, value in SLIDE.items()) + ", région: Économie, 名前: 資料}",
+    "smart_quotes": SLIDE_JSON.replace('"', "“", 1).replace('":', "”:", 1),
+    "comments": SLIDE_JSON.replace('"title"', '// generated slide\n  "title"'),
+    "truncated_bullets": SLIDE_JSON[:SLIDE_JSON.index("Storage") + 7],
+    "truncated_after_key": SLIDE_JSON[:SLIDE_JSON.index('"design_theme"') + 8],
+    "wrapped": json.dumps({"slide": SLIDE}),
+    "array": json.dumps([SLIDE]),
+    "aliased_keys": json.dumps({"heading": SLIDE["title"], "body": SLIDE["content"],
+                                "bullets": "\n".join(f"- {point}" for point in SLIDE["bullet_points"]),
+                                "theme": "Modern", "layout": "Bullet List"}),
+    "markdown": "# " + SLIDE["title"] + "\n\n" + "\n".join(f"* {point}" for point in SLIDE["bullet_points"]),
+    "numbered": SLIDE["title"] + "\n" + "\n".join(f"{i}. {point}" for i, point in
+                                                  enumerate(SLIDE["bullet_points"], 1)),
+}
+
+PROSE = ["Here is the JSON:", "Certainly.", "Output:", "", "Note: values are illustrative.", "```"]
+
+
+def fuzz(rng):
+    """One randomly damaged variant of a valid response"""
+    text = SLIDE_JSON if rng.random() < 0.5 else json.dumps(SLIDE)
+    for mutation in rng.sample(range(8), rng.randint(1, 3)):
+        if mutation == 0:
+            text = f"```json\n{text}\n```"
+        elif mutation == 1:
+            text = f"{rng.choice(PROSE)}\n{text}\n{rng.choice(PROSE)}"
+        elif mutation == 2:
+            text = text.replace('"', "'")
+        elif mutation == 3:
+            text = text.replace("]", ",]").replace("\n}", ",\n}")
+        elif mutation == 4:
+            cut = text.find("Solar")
+            text = text[:rng.randint(cut, len(text))] if cut >= 0 else text
+        elif mutation == 5:
+            text = text.replace('"', "“", 1).replace('"', "”", 1)
+        elif mutation == 6:
+            text = text.replace("{", "{ // slide\n", 1)
+        elif mutation == 7:
+            text = text.replace("{", "{" + rng.choice(["thème: Économie, ", "ñame: Ärger, ", "标题: 能源, "]), 1)
+    return text
+
+
+def legacy_parse(text, prompt):
+    """The parser this module replaced: json.loads, else scan lines for a title and '-'/'•' bullets"""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        lines = text.strip().split("\n")
+        title = f"Presentation: {prompt}"
+        for line in lines[:3]:
+            if line.strip() and not line.startswith("-") and not line.startswith("•"):
+                title = line.strip()
+                break
+        bullet_points = [line.strip().lstrip("-•").strip() for line in lines
+                         if line.strip().startswith("-") or line.strip().startswith("•")]
+        return {"title": title, "bullet_points": bullet_points[:5]}
+
+
+def recovered(result):
+    """True when the model's own title and first bullet came through"""
+    if not isinstance(result, dict):
+        return False
+    points = result.get("bullet_points") or []
+    return result.get("title") == SLIDE["title"] and bool(points) and points[0] == SLIDE["bullet_points"][0]
+
+
+def measure(parse, texts, repeat):
+    ok = sum(recovered(parse(text, "renewable energy")) for text in texts)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            parse(text, "renewable energy")
+    elapsed = (time.perf_counter() - start) / (repeat * len(texts)) * 1e6
+    return ok / len(texts) * 100, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fuzz", type=int, default=2000, help="number of fuzzed responses")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=200, help="timing repetitions per corpus entry")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cases = [(name, [text]) for name, text in CORPUS.items()]
+    cases.append((f"fuzz x{args.fuzz}", [fuzz(rng) for _ in range(args.fuzz)]))
+
+    print(f"{'shape':<22}{'legacy ok':>10}{'legacy us':>11}{'parser ok':>11}{'parser us':>11}")
+    totals = {"legacy": 0.0, "parser": 0.0}
+    for name, texts in cases:
+        repeat = max(1, args.repeat // len(texts))
+        old_ok, old_us = measure(legacy_parse, texts, repeat)
+        new_ok, new_us = measure(parse_slide_response, texts, repeat)
+        totals["legacy"] += old_ok
+        totals["parser"] += new_ok
+        print(f"{name:<22}{old_ok:>9.0f}%{old_us:>11.1f}{new_ok:>10.0f}%{new_us:>11.1f}")
+    print(f"{'mean recovery':<22}{totals['legacy'] / len(cases):>9.1f}%{'':>11}"
+          f"{totals['parser'] / len(cases):>10.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Semantic cache evaluation
+=========================
+
+Offline evaluation of the prompt-similarity cache. A labelled corpus of
+prompt pairs is used: paraphrases that should share a cached slide, and
+related but different requests that must not. For each candidate threshold
+the first prompt of every pair is indexed and the second one is looked up,
+which gives the hit rate on paraphrases and the false-hit rate on distinct
+pairs. Lookup latency is then measured against an index filled with
+--entries synthetic prompts.
+
+Usage:
+    python benchmarks/semantic_cache_eval.py --thresholds 0.7,0.8,0.85,0.9,0.95 --entries 4096
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from semantic_cache import SemanticCache  # noqa: E402
+
+PARAPHRASES = [
+    ("ML basics", "machine learning basics"),
+    ("Create a slide about AI in healthcare", "artificial intelligence in healthcare"),
+    ("Marketing strategy", "marketing strategies"),
+    ("Team meeting agenda", "agenda for the team meeting"),
+    ("Introduction to Python", "intro to python"),
+    ("Q3 sales results", "Sales results Q3"),
+    ("Benefits of remote work", "remote work benefits"),
+    ("Climate change impacts", "Make a presentation about climate change impacts"),
+    ("UX design principles", "user experience design principles"),
+    ("Quarterly KPI review", "quarterly KPIs review"),
+    ("Cloud computing for beginners", "cloud computing for a beginner"),
+    ("How to improve customer retention", "improving customer retention"),
+    ("Project kickoff", "project kick off"),
+    ("Company values", "our company values"),
+    ("Cybersecurity best practices", "best practices for cybersecurity"),
+    ("Budget planning 2025", "2025 budget planning"),
+    ("Onboarding new employees", "new employee onboarding"),
+    ("Data privacy regulations", "data privacy regulation"),
+    ("Product roadmap", "Generate a slide on the product roadmap"),
+    ("Renewable energy trends", "trends in renewable energy"),
+    ("Agile methodology", "the agile methodology"),
+    ("NLP applications", "natural language processing applications"),
+    ("Social media marketing tips", "tips for social media marketing"),
+    ("Startup fundraising", "fundraising for startups"),
+    ("Healthy eating habits", "healthy eating habit"),
+    ("ROI of training programs", "return on investment of training programs"),
+    ("Time management for students", "time management for a student"),
+    ("Supply chain risks", "risks in the supply chain"),
+    ("IoT in manufacturing", "internet of things in manufacturing"),
+    ("HR policies overview", "human resources policies"),
+]
+
+DISTINCT = [
+    ("Python basics", "Java basics"),
+    ("Q3 sales results", "Q4 sales results"),
+    ("Benefits of remote work", "Drawbacks of remote work"),
+    ("Budget planning 2024", "Budget planning 2025"),
+    ("5 tips for public speaking", "10 tips for public speaking"),
+    ("Machine learning basics", "Deep learning basics"),
+    ("Marketing strategy", "Sales strategy"),
+    ("Team meeting agenda", "Board meeting agenda"),
+    ("Climate change impacts", "Climate change solutions"),
+    ("Introduction to React", "Introduction to Angular"),
+    ("Cloud computing for beginners", "Cloud computing for experts"),
+    ("Data privacy regulations", "Data security regulations"),
+    ("Product roadmap", "Product launch"),
+    ("Renewable energy trends", "Nuclear energy trends"),
+    ("Startup fundraising", "Startup hiring"),
+    ("Healthy eating habits", "Healthy sleeping habits"),
+    ("Customer retention", "Customer acquisition"),
+    ("History of Rome", "History of Greece"),
+    ("Solar power", "Wind power"),
+    ("iOS app development", "Android app development"),
+    ("Cybersecurity for banks", "Cybersecurity for hospitals"),
+    ("Onboarding new employees", "Offboarding employees"),
+    ("Supply chain risks", "Supply chain opportunities"),
+    ("AI ethics", "AI regulation"),
+    ("Time management for students", "Time management for managers"),
+    ("Revenue growth", "Revenue decline"),
+    ("Photosynthesis", "Cellular respiration"),
+    ("Agile methodology", "Waterfall methodology"),
+    ("Intro to statistics", "Intro to calculus"),
+    ("Mobile marketing", "Email marketing"),
+]
+
+WORDS = ("market growth team product strategy customer data cloud security energy health finance "
+         "design sales training risk planning research policy education travel food sport music "
+         "science history network software hardware mobile retail logistics legal quality").split()
+
+
+def evaluate(threshold):
+    hits = false_hits = 0
+    for pairs, is_paraphrase in ((PARAPHRASES, True), (DISTINCT, False)):
+        for index, (first, second) in enumerate(pairs):
+            cache = SemanticCache(threshold=threshold)
+            cache.add(first, f"key-{index}")
+            matched = cache.lookup(second) is not None
+            if is_paraphrase:
+                hits += matched
+            else:
+                false_hits += matched
+    return hits / len(PARAPHRASES) * 100, false_hits / len(DISTINCT) * 100
+
+
+def similarity_table():
+    rows = []
+    for label, pairs in (("paraphrase", PARAPHRASES), ("distinct", DISTINCT)):
+        for first, second in pairs:
+            cache = SemanticCache(threshold=0.0)
+            cache.add(first, "key")
+            _, score = cache.nearest(second)
+            rows.append((score, label, first, second))
+    return sorted(rows, reverse=True)
+
+
+def lookup_latency(entries, queries=2000, seed=0):
+    rng = random.Random(seed)
+    cache = SemanticCache(max_entries=entries)
+    for index in range(entries):
+        cache.add(" ".join(rng.sample(WORDS, rng.randint(2, 5))), f"key-{index}")
+    prompts = [" ".join(rng.sample(WORDS, rng.randint(2, 5))) for _ in range(queries)]
+    start = time.perf_counter()
+    for prompt in prompts:
+        cache.lookup(prompt)
+    return (time.perf_counter() - start) / queries * 1e6, cache.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--thresholds", default="0.7,0.75,0.8,0.85,0.9,0.95")
+    parser.add_argument("--entries", type=int, default=4096, help="index size for the latency test")
+    parser.add_argument("--verbose", action="store_true", help="print the similarity of every pair")
+    args = parser.parse_args()
+
+    print(f"{len(PARAPHRASES)} paraphrase pairs, {len(DISTINCT)} distinct pairs")
+    print(f"{'threshold':>10}{'hit rate':>10}{'false hits':>12}")
+    for threshold in (float(value) for value in args.thresholds.split(",")):
+        hit_rate, false_rate = evaluate(threshold)
+        print(f"{threshold:>10.2f}{hit_rate:>9.1f}%{false_rate:>11.1f}%")
+
+    if args.verbose:
+        print()
+        for score, label, first, second in similarity_table():
+            print(f"{score:6.3f}  {label:<11}{first!r} / {second!r}")
+
+    latency, stats = lookup_latency(args.entries)
+    print(f"\nlookup with {stats['entries']} entries ({stats['words']} words): {latency:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
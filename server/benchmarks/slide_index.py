@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Slide recolor benchmark
+=======================
+
+Fills the presentation store with N slides and times
+PUT /api/slides/<id>/color without a presentation_id, which has to locate
+the slide through the global slide index. With the index the per-request
+time should stay flat as the store grows from 1k to 100k slides.
+
+Usage:
+    python benchmarks/slide_index.py --sizes 1000,10000,100000 --backend memory
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+logging.disable(logging.INFO)
+
+import server  # noqa: E402
+from storage import (  # noqa: E402
+    InMemoryPresentationRepository,
+    SQLitePresentationRepository,
+    new_slide_id,
+)
+
+SLIDES_PER_DECK = 10
+AI_RESPONSE = {
+    "title": "Benchmark slide",
+    "content": "Filler content for the slide index benchmark.",
+    "bullet_points": ["One", "Two", "Three"],
+}
+
+
+def fill_store(repository, total_slides):
+    """Create decks of SLIDES_PER_DECK slides until total_slides exist"""
+    slide_ids = []
+    now = datetime.now().isoformat()
+    for deck in range(total_slides // SLIDES_PER_DECK):
+        slides = []
+        for _ in range(SLIDES_PER_DECK):
+            slide = server.build_slide(AI_RESPONSE, "blue")
+            slides.append(slide)
+            slide_ids.append(slide["id"])
+        repository.create({
+            "id": f"bench-{deck}",
+            "prompt": "benchmark",
+            "slides": slides,
+            "default_color_theme": "blue",
+            "created_at": now,
+            "updated_at": now,
+        })
+    return slide_ids
+
+
+def make_repository(backend, workdir, size):
+    if backend == "sqlite":
+        return SQLitePresentationRepository(os.path.join(workdir, f"bench-{size}.sqlite3"))
+    return InMemoryPresentationRepository()
+
+
+def run(size, backend, requests, workdir):
+    repository = make_repository(backend, workdir, size)
+    server.presentation_store = repository
+    slide_ids = fill_store(repository, size)
+    client = server.app.test_client()
+    themes = list(server.COLOR_THEMES)
+    targets = random.sample(slide_ids, min(requests, len(slide_ids)))
+
+    start = time.perf_counter()
+    for i, slide_id in enumerate(targets):
+        response = client.put(f"/api/slides/{slide_id}/color", json={"color_theme": themes[i % len(themes)]})
+        assert response.status_code == 200, response.get_json()
+    elapsed = time.perf_counter() - start
+
+    lookup_start = time.perf_counter()
+    for slide_id in targets:
+        repository.find_slide(slide_id)
+    lookup_elapsed = time.perf_counter() - lookup_start
+
+    return {
+        "slides": size,
+        "recolor_us": elapsed / len(targets) * 1e6,
+        "lookup_us": lookup_elapsed / len(targets) * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    # Sanity check: ids minted back to back never collide
+    ids = [new_slide_id() for _ in range(100000)]
+    assert len(set(ids)) == len(ids)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f"{'slides':>10}{'recolor us/req':>18}{'index lookup us':>18}")
+        for size in (int(s) for s in args.sizes.split(",")):
+            result = run(size, args.backend, args.requests, workdir)
+            print(f"{result['slides']:>10}{result['recolor_us']:>18.1f}{result['lookup_us']:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Slide memory benchmark
+======================
+
+Stores slides made by build_slide until --elements elements are held, and
+reports the resident memory they take:
+
+- dict: slides kept as the nested dicts the API returns (the old in-memory
+  store)
+- compact: slides packed into the slotted Slide/Element/Style classes the
+  in-memory store now uses
+
+Each mode runs in a fresh subprocess and RSS is read from /proc before and
+after the slides are created. The conversion cost a store read or write pays
+is reported per 10-slide deck.
+
+Usage:
+    python benchmarks/slide_memory.py --elements 1000000
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import subprocess
+import sys
+import timeit
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def rss_bytes():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def make_slide(server, themes, index):
+    ai_response = {
+        "title": f"Quarterly review {index}",
+        "content": f"Revenue, pipeline and hiring against plan for region {index % 50}.",
+        "bullet_points": [f"Revenue up {index % 17}%", "Pipeline coverage 3.1x", "Churn flat"],
+        "design_theme": "professional",
+        "layout_type": "bullet-list",
+    }
+    return server.build_slide(ai_response, themes[index % len(themes)])
+
+
+def run_once(element_count, mode):
+    sys.path.insert(0, SERVER_DIR)
+    logging.disable(logging.WARNING)
+    import server
+    from models import Slide
+
+    themes = list(server.COLOR_THEMES)
+    make_slide(server, themes, 0)
+    gc.collect()
+    before = rss_bytes()
+
+    slides = []
+    elements = 0
+    index = 0
+    while elements < element_count:
+        slide = make_slide(server, themes, index)
+        elements += len(slide["elements"])
+        slides.append(slide if mode == "dict" else Slide.from_dict(slide))
+        index += 1
+    gc.collect()
+    used = rss_bytes() - before
+
+    deck = [make_slide(server, themes, i) for i in range(10)]
+    packed = [Slide.from_dict(slide) for slide in deck]
+    number = 2000
+    pack_us = timeit.timeit(lambda: [Slide.from_dict(slide) for slide in deck], number=number) / number * 1e6
+    unpack_us = timeit.timeit(lambda: [slide.to_dict() for slide in packed], number=number) / number * 1e6
+    return {
+        "mode": mode,
+        "slides": len(slides),
+        "elements": elements,
+        "rss_mb": round(used / 1e6, 1),
+        "bytes_per_element": round(used / elements, 1),
+        "pack_deck_us": round(pack_us, 1),
+        "unpack_deck_us": round(unpack_us, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--elements", type=int, default=1_000_000)
+    parser.add_argument("--modes", default="dict,compact")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_once(int(args.child[0]), args.child[1])))
+        return
+
+    results = []
+    for mode in args.modes.split(","):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", str(args.elements), mode],
+            cwd=SERVER_DIR, capture_output=True, text=True, check=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"{'mode':<9}{'slides':>9}{'elements':>10}{'RSS MB':>9}{'B/element':>11}"
+          f"{'pack deck us':>14}{'unpack deck us':>16}")
+    for r in results:
+        print(f"{r['mode']:<9}{r['slides']:>9}{r['elements']:>10}{r['rss_mb']:>9}{r['bytes_per_element']:>11}"
+              f"{r['pack_deck_us']:>14}{r['unpack_deck_us']:>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark
+=================
+
+Measures how fast a fresh backend becomes healthy and how much memory each
+worker holds, for the different startup layouts:
+
+- lazy: Flask server, SDK and python-pptx imported on first use (default)
+- warm: Flask server with STARTUP_WARMUP=sync, everything loaded at import
+- gunicorn: gunicorn.conf.py, app preloaded with python-pptx warmed in the
+  master, then forked into --workers workers that each import the model SDK
+  (skipped when gunicorn is not installed)
+
+For each layout the script reports the time from process start to the first
+200 from /api/health, the latency of the first PPTX export (where lazy
+loading pays its deferred cost), and per-process RSS, PSS and private
+memory from /proc/<pid>/smaps_rollup. PSS splits shared pages between the
+processes sharing them, so copy-on-write sharing in the gunicorn workers
+shows up as PSS well below RSS.
+
+GEMINI_API_KEY is set to a dummy value so the Gemini SDK is part of the
+startup work; no model calls are made.
+
+Usage:
+    python benchmarks/startup.py --runs 3 --workers 4
+"""
+
+import argparse
+import http.client
+import importlib.util
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from asgi_vs_flask import SERVER_DIR, free_port  # noqa: E402
+
+EXPORT_BODY = json.dumps({"slides": [{
+    "id": 1, "title": "Startup", "background_color": "#dbeafe",
+    "elements": [{"id": "title_1", "type": "text", "content": "Startup benchmark",
+                  "x": 50, "y": 80, "width": 700, "height": 60, "style": {"fontSize": "24px"}}],
+}], "color_theme": "blue"})
+
+
+def request(port, method, path, body=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    try:
+        headers = {"Content-Type": "application/json"} if body else {}
+        conn.request(method, path, body=body, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    finally:
+        conn.close()
+
+
+def wait_healthy(port, process, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with code {process.returncode}")
+        try:
+            if request(port, "GET", "/api/health") == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.005)
+    raise RuntimeError("server did not become healthy")
+
+
+def memory(pid):
+    """RSS, PSS and private memory of a process in MB"""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    private = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    return {"rss": fields.get("Rss", 0), "pss": fields.get("Pss", 0), "private": private}
+
+
+def children(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+
+def command(layout, port, workers):
+    if layout == "gunicorn":
+        return [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--workers", str(workers),
+                "--bind", f"127.0.0.1:{port}", "--log-level", "warning", "server:app"]
+    code = ("import logging; logging.disable(logging.WARNING); import server; "
+            f"server.app.run(host='127.0.0.1', port={port}, threaded=True)")
+    return [sys.executable, "-c", code]
+
+
+def run_once(layout, workers):
+    port = free_port()
+    env = dict(os.environ, MODEL_PROVIDER="gemini", GEMINI_API_KEY=os.getenv("GEMINI_API_KEY", "benchmark"),
+               RESPONSE_CACHE_BACKEND="none", EXPORT_CACHE_MAX_BYTES="0", PYTHONWARNINGS="ignore",
+               STARTUP_WARMUP="none" if layout == "lazy" else "sync")
+    start = time.perf_counter()
+    process = subprocess.Popen(command(layout, port, workers), cwd=SERVER_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_healthy(port, process)
+        healthy = time.perf_counter() - start
+        time.sleep(0.5)  # let gunicorn finish spawning the remaining workers
+        pids = children(process.pid) if layout == "gunicorn" else [process.pid]
+        before = [memory(pid) for pid in pids]
+
+        export_start = time.perf_counter()
+        status = request(port, "POST", "/api/export-pptx", EXPORT_BODY)
+        first_export = time.perf_counter() - export_start
+        if status != 200:
+            raise RuntimeError(f"export returned {status}")
+        return {
+            "healthy_ms": healthy * 1000,
+            "first_export_ms": first_export * 1000,
+            "processes": len(pids),
+            "rss": statistics.mean(m["rss"] for m in before),
+            "pss": statistics.mean(m["pss"] for m in before),
+            "private": statistics.mean(m["private"] for m in before),
+        }
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--layouts", default="lazy,warm,gunicorn")
+    parser.add_argument("--runs", type=int, default=3, help="runs per layout; medians are reported")
+    parser.add_argument("--workers", type=int, default=4, help="gunicorn workers")
+    args = parser.parse_args()
+
+    layouts = args.layouts.split(",")
+    if "gunicorn" in layouts:
+        if importlib.util.find_spec("gunicorn") is None:
+            print("gunicorn is not installed; skipping the gunicorn layout")
+            layouts.remove("gunicorn")
+
+    print(f"{'layout':<10}{'procs':>6}{'healthy ms':>12}{'1st export ms':>15}"
+          f"{'RSS MB':>9}{'PSS MB':>9}{'private MB':>12}")
+    for layout in layouts:
+        runs = [run_once(layout, args.workers) for _ in range(args.runs)]
+        row = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+        print(f"{layout:<10}{row['processes']:>6.0f}{row['healthy_ms']:>12.0f}{row['first_export_ms']:>15.0f}"
+              f"{row['rss']:>9.1f}{row['pss']:>9.1f}{row['private']:>12.1f}")
+    print("Memory columns are per process; for gunicorn they average the workers, not the master.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Thumbnail rendering benchmark
+=============================
+
+Renders the thumbnails of --slides generated slides into an empty cache
+directory and reports:
+
+- serial: every slide rendered one after another in this process (what
+  on-demand requests for an uncached deck cost)
+- pool: the same slides through ThumbnailService.prerender with --workers
+  processes (what POST /api/presentations/<id>/thumbnails and listings do)
+- cached: fetching every thumbnail again once it is in the disk cache
+- one edit: re-rendering after a single slide changed, where only that
+  slide misses the cache
+
+Usage:
+    python benchmarks/thumbnails.py --slides 200 --workers 4 --width 320 --format png
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+
+def make_slides(server, count):
+    themes = list(server.COLOR_THEMES)
+    slides = []
+    for index in range(count):
+        ai_response = {
+            "title": f"Quarterly review {index}",
+            "content": f"Revenue, pipeline and hiring against plan for region {index % 50}.",
+            "bullet_points": [f"Revenue up {index % 17}%", "Pipeline coverage 3.1x", "Churn flat"],
+        }
+        slides.append(server.build_slide(ai_response, themes[index % len(themes)]))
+    return slides
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--slides", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--width", type=int, default=320)
+    parser.add_argument("--format", default="png")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    import server
+    from export_cache import DiskLRUCache
+    from thumbnails import ThumbnailService, render_thumbnail
+
+    slides = make_slides(server, args.slides)
+    directory = tempfile.mkdtemp(prefix="thumbnails-")
+    try:
+        render_thumbnail(slides[0], args.width, args.format)  # load Pillow and fonts
+        start = time.perf_counter()
+        sizes = [len(render_thumbnail(slide, args.width, args.format)) for slide in slides]
+        serial = time.perf_counter() - start
+
+        service = ThumbnailService(DiskLRUCache(directory, 1 << 30, suffix=".img"), width=args.width,
+                                   fmt=args.format, workers=args.workers, start_method="spawn")
+        service.prerender(slides[:1], wait=True)  # start the workers outside the timing
+        start = time.perf_counter()
+        service.prerender(slides[1:], wait=True)
+        pool = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for slide in slides:
+            service.get(slide)
+        cached = time.perf_counter() - start
+
+        edited = dict(slides[len(slides) // 2], background_color="#ffffff")
+        start = time.perf_counter()
+        service.prerender(slides[:len(slides) // 2] + [edited] + slides[len(slides) // 2 + 1:], wait=True)
+        one_edit = time.perf_counter() - start
+        service.shutdown()
+
+        print(f"{args.slides} slides at {args.width}px {args.format}, "
+              f"average {sum(sizes) / len(sizes) / 1024:.1f} KB per thumbnail")
+        print(f"{'mode':<10}{'total ms':>10}{'ms/slide':>10}")
+        print(f"{'serial':<10}{serial * 1000:>10.0f}{serial * 1000 / args.slides:>10.2f}")
+        print(f"{'pool':<10}{pool * 1000:>10.0f}{pool * 1000 / (args.slides - 1):>10.2f}   ({args.workers} workers)")
+        print(f"{'cached':<10}{cached * 1000:>10.0f}{cached * 1000 / args.slides:>10.2f}")
+        print(f"{'one edit':<10}{one_edit * 1000:>10.0f}{one_edit * 1000 / args.slides:>10.2f}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
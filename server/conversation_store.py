@@ -0,0 +1,267 @@
+"""
+Conversation sessions for multi-turn voice and chat flows.
+
+Each session keeps a compact rolling context: the current presentation
+topic, the titles of the slides generated so far, the most recent turns and
+a short summary of older ones. prompt_context() renders that into a few
+lines that are added to the generation prompt, so a follow-up such as "add a
+slide about pricing" is sent to the model with its topic and the existing
+slides instead of the client resending the whole conversation.
+
+Bounds:
+- token_budget: the rendered context stays under this many (estimated)
+  tokens; only the last recent_turns turns are kept verbatim, older ones are
+  folded into the summary, which is truncated from the front when it grows
+  past its share of the budget
+- ttl: sessions idle longer than this are dropped
+- max_sessions / max_bytes: the least recently active sessions are evicted
+  when either limit is exceeded
+"""
+
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+SESSION_OVERHEAD_BYTES = 512
+SUMMARY_WORDS_PER_TURN = 12
+
+_FOLLOW_UP_RE = re.compile(
+    r"^(?:(?:please|can you|could you|now|and|also|then)\s+)*"
+    r"(?:add|insert|include|create|make|generate|write|give me)\s+"
+    r"(?:(?:a|an|another|one more|one|the next)\s+)?(?:new\s+)?(?:slide|page)\s+"
+    r"(?:about|on|for|covering|with|explaining|that covers)\s+(?P<subject>.+?)[.!?]*$",
+    re.I,
+)
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token)"""
+    return max(1, (len(text) + 3) // 4)
+
+
+def follow_up_subject(text):
+    """The subject of an 'add a slide about X' request, or None"""
+    match = _FOLLOW_UP_RE.match(text.strip())
+    return match.group("subject").strip() if match else None
+
+
+class ConversationSession:
+    """Rolling context of one conversation"""
+
+    __slots__ = ("id", "topic", "turns", "turn_tokens", "summary", "slide_titles",
+                 "created_at", "last_active", "size")
+
+    def __init__(self, session_id, now):
+        self.id = session_id
+        self.topic = None
+        self.turns = deque()  # (role, text, tokens)
+        self.turn_tokens = 0
+        self.summary = ""
+        self.slide_titles = deque()
+        self.created_at = now
+        self.last_active = now
+        self.size = SESSION_OVERHEAD_BYTES
+
+    def compute_size(self):
+        self.size = (SESSION_OVERHEAD_BYTES + len(self.topic or "") + len(self.summary)
+                     + sum(len(text) for _, text, _ in self.turns)
+                     + sum(len(title) for title in self.slide_titles))
+        return self.size
+
+
+class ConversationStore:
+    """Sessions keyed by conversation id with a token budget, TTL and memory cap"""
+
+    def __init__(self, ttl=1800, max_sessions=10000, max_bytes=32 * 1024 * 1024,
+                 token_budget=256, recent_turns=4, max_slide_titles=30):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.token_budget = token_budget
+        self.recent_turns = recent_turns
+        self.max_slide_titles = max_slide_titles
+        self._sessions = OrderedDict()  # least recently active first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.expirations = 0
+        self.evictions = 0
+        self.folded_turns = 0
+
+    # Session lifecycle
+
+    def _expire(self, now):
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.last_active < self.ttl:
+                break
+            self._drop(session.id)
+            self.expirations += 1
+
+    def _drop(self, session_id):
+        session = self._sessions.pop(session_id)
+        self._bytes -= session.size
+
+    def _touch(self, session_id, create):
+        """Session for session_id (refreshed), creating it if asked; caller holds the lock"""
+        now = time.monotonic()
+        self._expire(now)
+        session = self._sessions.get(session_id) if session_id else None
+        if session is None:
+            if not create:
+                return None
+            session = ConversationSession(session_id or uuid.uuid4().hex, now)
+            self._sessions[session.id] = session
+            self._bytes += session.size
+        else:
+            session.last_active = now
+            self._sessions.move_to_end(session.id)
+        return session
+
+    def _resized(self, session):
+        old = session.size
+        self._bytes += session.compute_size() - old
+        while self._sessions and (len(self._sessions) > self.max_sessions or self._bytes > self.max_bytes):
+            oldest = next(iter(self._sessions))
+            if oldest == session.id and len(self._sessions) == 1:
+                break
+            self._drop(oldest)
+            self.evictions += 1
+
+    def start(self, session_id=None):
+        """Id of an active session, creating one (with a new id if none is given)"""
+        with self._lock:
+            session = self._touch(session_id, create=True)
+            self._resized(session)
+            return session.id
+
+    def exists(self, session_id):
+        with self._lock:
+            return self._touch(session_id, create=False) is not None
+
+    def end(self, session_id):
+        with self._lock:
+            if session_id in self._sessions:
+                self._drop(session_id)
+                return True
+            return False
+
+    # Recording
+
+    def add_turn(self, session_id, role, text):
+        """Append a turn, folding the oldest turns into the summary past the token budget"""
+        text = " ".join(text.split())
+        if not text:
+            return
+        with self._lock:
+            session = self._touch(session_id, create=True)
+            tokens = estimate_tokens(text)
+            session.turns.append((role, text, tokens))
+            session.turn_tokens += tokens
+            summary_budget = self.token_budget // 4
+            while session.turns and (len(session.turns) > self.recent_turns
+                                     or session.turn_tokens > self.token_budget - 2 * summary_budget):
+                old_role, old_text, old_tokens = session.turns.popleft()
+                session.turn_tokens -= old_tokens
+                self._fold(session, old_role, old_text, summary_budget)
+            self._resized(session)
+
+    def _fold(self, session, role, text, summary_budget):
+        words = text.split()
+        gist = " ".join(words[:SUMMARY_WORDS_PER_TURN]) + ("..." if len(words) > SUMMARY_WORDS_PER_TURN else "")
+        summary = f"{session.summary}; {role}: {gist}" if session.summary else f"{role}: {gist}"
+        max_chars = summary_budget * 4
+        if len(summary) > max_chars:
+            # Keep the most recent part, starting at a word boundary
+            cut = summary.find(" ", len(summary) - max_chars)
+            summary = "..." + summary[cut if cut >= 0 else len(summary) - max_chars:]
+        session.summary = summary
+        self.folded_turns += 1
+
+    def set_topic(self, session_id, topic):
+        with self._lock:
+            session = self._touch(session_id, create=True)
+            session.topic = " ".join(topic.split())[:200]
+            self._resized(session)
+
+    def get_topic(self, session_id):
+        with self._lock:
+            session = self._touch(session_id, create=False)
+            return session.topic if session else None
+
+    def add_slide(self, session_id, title):
+        with self._lock:
+            session = self._touch(session_id, create=True)
+            session.slide_titles.append(" ".join(str(title).split())[:120])
+            while len(session.slide_titles) > self.max_slide_titles:
+                session.slide_titles.popleft()
+            self._resized(session)
+
+    # Prompt context
+
+    def prompt_context(self, session_id, include_turns=True):
+        """A few lines of context for the generation prompt, within the token budget, or None"""
+        with self._lock:
+            session = self._touch(session_id, create=False)
+            if session is None:
+                return None
+            topic = session.topic
+            titles = list(session.slide_titles)
+            summary = session.summary
+            turns = list(session.turns) if include_turns else []
+
+        lines = []
+        budget = self.token_budget
+        if topic:
+            lines.append(f"Presentation topic: \"{topic}\"")
+            budget -= estimate_tokens(lines[-1])
+        if titles:
+            # Most recent titles first until a quarter of the budget is used
+            kept, used = [], 0
+            for title in reversed(titles):
+                used += estimate_tokens(title) + 1
+                if used > self.token_budget // 4:
+                    break
+                kept.append(title)
+            lines.append(f"Slides so far ({len(titles)}): " + "; ".join(reversed(kept)))
+            budget -= used
+        if summary:
+            lines.append(f"Earlier in the conversation: {summary}")
+            budget -= estimate_tokens(summary)
+        recent = []
+        for role, text, tokens in reversed(turns):
+            if tokens > budget:
+                break
+            recent.append(f"{role}: {text}")
+            budget -= tokens
+        if recent:
+            lines.append("Recent turns:")
+            lines.extend(reversed(recent))
+        return "\n".join(lines) if lines else None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "token_budget": self.token_budget,
+                "ttl": self.ttl,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+                "folded_turns": self.folded_turns,
+            }
+
+
+def create_conversation_store_from_env():
+    """Build the session store configured by CONVERSATION_* environment variables"""
+    return ConversationStore(
+        ttl=int(os.getenv('CONVERSATION_TTL', '1800')),
+        max_sessions=int(os.getenv('CONVERSATION_MAX_SESSIONS', '10000')),
+        max_bytes=int(os.getenv('CONVERSATION_MAX_BYTES', str(32 * 1024 * 1024))),
+        token_budget=int(os.getenv('CONVERSATION_TOKEN_BUDGET', '256')),
+        recent_turns=int(os.getenv('CONVERSATION_RECENT_TURNS', '4')),
+        max_slide_titles=int(os.getenv('CONVERSATION_MAX_SLIDE_TITLES', '30')),
+    )
@@ -0,0 +1,226 @@
+"""
+Size-bounded disk caches for PPTX export.
+
+- Artifact cache: finished .pptx files keyed by a hash of the whole export
+  payload (slides, color theme and its colors, template file). Re-exporting
+  an unchanged deck serves the stored file instead of rebuilding it.
+- Fragment cache: the rendered XML of individual slides keyed by a hash of
+  that slide's content, so a deck where one slide changed only re-renders
+  that slide (see PptxExporter.add_slide).
+
+Both are plain directories with LRU eviction based on file mtimes, which
+keeps them usable from the export worker processes and across restarts.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import uuid
+
+
+def template_stamp(template_path):
+    """(path, mtime_ns, size) of a PPTX template, or None without one"""
+    if not template_path:
+        return None
+    try:
+        stat = os.stat(template_path)
+    except OSError:
+        return (template_path, None, None)
+    return (template_path, stat.st_mtime_ns, stat.st_size)
+
+
+def deck_hash(slides, color_theme, theme_colors=None, template=None):
+    """Stable hash of an export payload and of what else the file depends on:
+    the theme's resolved colors (custom themes can be replaced) and the
+    template's template_stamp()"""
+    payload = json.dumps({"slides": slides, "color_theme": color_theme, "theme_colors": theme_colors,
+                          "template": template}, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DiskLRUCache:
+    """Directory of files keyed by hash, evicting least recently used entries above max_bytes"""
+
+    def __init__(self, directory, max_bytes, suffix=""):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        self._size = None  # scanned lazily, then tracked approximately
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def __reduce__(self):
+        # Worker processes get a fresh instance over the same directory
+        return (DiskLRUCache, (self.directory, self.max_bytes, self.suffix))
+
+    def detached(self):
+        """Fresh instance over the same directory, safe to use after a fork"""
+        return DiskLRUCache(self.directory, self.max_bytes, self.suffix)
+
+    def path_for(self, key):
+        return os.path.join(self.directory, f"{key}{self.suffix}")
+
+    def temp_path(self, key):
+        return f"{self.path_for(key)}.{uuid.uuid4().hex}.tmp"
+
+    def _hit(self, path, size):
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+            self.bytes_saved += size
+
+    def _miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def get_bytes(self, key):
+        path = self.path_for(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            self._miss()
+            return None
+        self._hit(path, len(data))
+        return data
+
+    def open(self, key, count=True):
+        """Open a cached file for reading, or return None"""
+        path = self.path_for(key)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            if count:
+                self._miss()
+            return None
+        if count:
+            self._hit(path, os.fstat(f.fileno()).st_size)
+        return f
+
+    def contains(self, key):
+        return os.path.exists(self.path_for(key))
+
+    def size_of(self, key):
+        try:
+            return os.path.getsize(self.path_for(key))
+        except FileNotFoundError:
+            return None
+
+    def put_bytes(self, key, data):
+        tmp_path = self.temp_path(key)
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        self.put_file(key, tmp_path)
+
+    def put_file(self, key, src_path):
+        """Move a finished file into the cache"""
+        path = self.path_for(key)
+        os.replace(src_path, path)
+        self._added(os.path.getsize(path))
+
+    def _added(self, size):
+        with self._lock:
+            if self._size is None:
+                self._size = sum(entry[1] for entry in self._entries())
+            else:
+                self._size += size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        """(mtime, size, path) of every committed entry"""
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(self.suffix) or entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+                except FileNotFoundError:
+                    pass
+        return entries
+
+    def _evict(self):
+        # Rescan so writes from other processes are accounted for
+        entries = sorted(self._entries())
+        total = sum(entry[1] for entry in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.evictions += 1
+        self._size = total
+
+    def counters(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "bytes_saved": self.bytes_saved}
+
+    def merge_counters(self, counters):
+        """Add hit/miss counts reported by a worker process"""
+        with self._lock:
+            self.hits += counters.get("hits", 0)
+            self.misses += counters.get("misses", 0)
+            self.bytes_saved += counters.get("bytes_saved", 0)
+
+    def stats(self):
+        entries = self._entries()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(entries),
+                "bytes": sum(entry[1] for entry in entries),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "bytes_saved": self.bytes_saved,
+                "evictions": self.evictions,
+            }
+
+
+def cache_stream(chunks, cache, key):
+    """Pass chunks through while writing them to the cache; only a complete stream is committed"""
+    tmp_path = cache.temp_path(key)
+    completed = False
+    try:
+        with open(tmp_path, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+                yield chunk
+        completed = True
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+        if completed:
+            cache.put_file(key, tmp_path)
+        elif os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def create_export_caches_from_env():
+    """Build the (artifact, fragment) caches from EXPORT_* environment variables"""
+    export_dir = os.getenv("EXPORT_DIR", "exports")
+    artifacts = DiskLRUCache(
+        export_dir,
+        max_bytes=int(os.getenv("EXPORT_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+        suffix=".pptx",
+    )
+    fragment_max_bytes = int(os.getenv("EXPORT_FRAGMENT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    fragments = None
+    if fragment_max_bytes > 0:
+        fragments = DiskLRUCache(os.path.join(export_dir, "fragments"), fragment_max_bytes, suffix=".xml")
+    return artifacts, fragments
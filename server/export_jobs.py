@@ -0,0 +1,379 @@
+"""
+Background PPTX export jobs.
+
+POST /api/export-jobs registers a job and returns immediately; the export
+runs in a separate process so a large deck never blocks a request thread or
+holds the server's GIL. At most EXPORT_WORKERS exports run at once, each in
+its own worker process, which is what makes cancellation and the per-job
+timeout enforceable: a stuck or cancelled export is terminated rather than
+left running.
+
+Finished files go into the export artifact cache keyed by a content hash of
+the slides payload, so exporting an identical deck again is served from the
+stored file without doing any work.
+
+With a job directory, every job's state is also written there as
+<job_id>.json, so any server process sharing the directory can report on a
+job, serve its file or cancel it (by dropping a <job_id>.cancel marker that
+the process running the job polls for), not just the one that queued it.
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from export_cache import deck_hash, template_stamp
+from pptx_export import render_to_file
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+JOB_ID_RE = re.compile(r"[0-9a-f]{32}")
+# How often a running job checks for a cancel marker from another process
+CANCEL_POLL_INTERVAL = 0.5
+
+
+def _run_export(conn, slides, color_theme, color_themes, path, template_path, fragment_cache, template):
+    """Worker process entry point; reports ("ok", size, fragment counters) or ("error", message)"""
+    try:
+        if fragment_cache is not None:
+            fragment_cache = fragment_cache.detached()
+        size = render_to_file(slides, color_theme, color_themes, path, template_path, fragment_cache, template)
+        conn.send(("ok", size, fragment_cache.counters() if fragment_cache is not None else {}))
+    except Exception as e:
+        conn.send(("error", str(e)))
+    finally:
+        conn.close()
+
+
+class ExportJob:
+    """State of one export job"""
+
+    def __init__(self, slides, color_theme, digest):
+        self.id = uuid.uuid4().hex
+        self.slides = slides
+        self.color_theme = color_theme
+        self.content_hash = digest
+        self.status = QUEUED
+        self.error = None
+        self.size = None
+        self.created_at = datetime.now().isoformat()
+        self.started_at = None
+        self.finished_at = None
+        self.finished_monotonic = None
+        self.cancel_requested = False
+        self.process = None
+
+    @classmethod
+    def from_record(cls, record):
+        """Snapshot of a job saved by another server process"""
+        job = cls(None, None, record["content_hash"])
+        job.id = record["job_id"]
+        for field in ("status", "error", "size", "created_at", "started_at", "finished_at"):
+            setattr(job, field, record.get(field))
+        return job
+
+    def finish(self, status, error=None):
+        self.status = status
+        self.error = error
+        self.finished_at = datetime.now().isoformat()
+        self.finished_monotonic = time.monotonic()
+        self.slides = None
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "content_hash": self.content_hash,
+            "error": self.error,
+            "size": self.size,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class ExportJobManager:
+    """Job registry plus a bounded set of export worker processes"""
+
+    def __init__(self, color_themes, artifact_cache, fragment_cache=None, workers=2, timeout=120,
+                 job_ttl=3600, template_path=None, start_method="spawn", job_dir=None, exporter=None):
+        self.color_themes = color_themes
+        self.artifact_cache = artifact_cache
+        self.fragment_cache = fragment_cache
+        self.workers = workers
+        self.timeout = timeout
+        self.job_ttl = job_ttl
+        self.template_path = template_path
+        self.job_dir = job_dir
+        # Supplies cached base templates so worker processes skip building them
+        self.exporter = exporter
+        # Spawned workers never inherit the request threads (or their held locks)
+        self._ctx = multiprocessing.get_context(start_method)
+        if job_dir:
+            os.makedirs(job_dir, exist_ok=True)
+        self._jobs = {}
+        self._active_by_hash = {}
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._threads = []
+        self.submitted = 0
+        self.reused = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.timed_out = 0
+
+    def submit(self, slides, color_theme):
+        """Register an export and return its job"""
+        digest = deck_hash(slides, color_theme, self.color_themes.get(color_theme),
+                           template_stamp(self.template_path))
+        with self._lock:
+            self._prune()
+            self.submitted += 1
+            active = self._active_by_hash.get(digest)
+            if active is not None:
+                # An identical deck is already queued or running; share its job
+                self.reused += 1
+                return active
+
+            job = ExportJob(slides, color_theme, digest)
+            self._jobs[job.id] = job
+            cached = self.artifact_cache.open(digest)
+            if cached is not None:
+                with cached:
+                    job.size = os.fstat(cached.fileno()).st_size
+                self.reused += 1
+                job.finish(COMPLETED)
+                self._save(job)
+                return job
+
+            self._active_by_hash[digest] = job
+            self._save(job)
+            self._ensure_workers()
+        self._queue.put(job)
+        return job
+
+    def get(self, job_id):
+        """A job queued by this process, or the saved state of one queued by another"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job if job is not None else self._load(job_id)
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job; returns the job or None"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                if job.status in FINISHED_STATES:
+                    return job
+                job.cancel_requested = True
+                if job.status == QUEUED:
+                    self._finish(job, CANCELLED)
+                elif job.process is not None:
+                    job.process.terminate()
+                return job
+        job = self._load(job_id)
+        if job is not None and job.status not in FINISHED_STATES:
+            # Another process owns the job; it cancels it when it sees the marker
+            open(self._record_path(job_id, ".cancel"), "w").close()
+        return job
+
+    def open_artifact(self, job):
+        """Open a completed job's file, or return None if it has been evicted"""
+        if job.status != COMPLETED:
+            return None
+        return self.artifact_cache.open(job.content_hash, count=False)
+
+    def _record_path(self, job_id, suffix=".json"):
+        return os.path.join(self.job_dir, f"{job_id}{suffix}")
+
+    def _save(self, job):
+        """Publish the job's state to the other server processes"""
+        if not self.job_dir:
+            return
+        path = self._record_path(job.id)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(job.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    def _load(self, job_id):
+        if not self.job_dir or not JOB_ID_RE.fullmatch(job_id):
+            return None
+        try:
+            with open(self._record_path(job_id)) as f:
+                return ExportJob.from_record(json.load(f))
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+
+    def _cancel_marked(self, job):
+        return bool(self.job_dir) and os.path.exists(self._record_path(job.id, ".cancel"))
+
+    def _ensure_workers(self):
+        self._threads = [t for t in self._threads if t.is_alive()]
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f"export-{len(self._threads)}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            try:
+                self._run(job)
+            except Exception as e:
+                logger.error(f"Error running export job {job.id}: {str(e)}")
+                with self._lock:
+                    if job.status not in FINISHED_STATES:
+                        self._finish(job, FAILED, str(e))
+
+    def _run(self, job):
+        if self._cancel_marked(job):
+            with self._lock:
+                job.cancel_requested = True
+                if job.status == QUEUED:
+                    self._finish(job, CANCELLED)
+        if job.status != QUEUED:
+            return
+        template = self.exporter.template_bytes(job.color_theme) if self.exporter is not None else None
+        tmp_path = self.artifact_cache.temp_path(job.content_hash)
+        reader, writer = self._ctx.Pipe(duplex=False)
+        process = self._ctx.Process(
+            target=_run_export,
+            args=(writer, job.slides, job.color_theme, self.color_themes, tmp_path,
+                  self.template_path, self.fragment_cache, template),
+            daemon=True,
+        )
+        with self._lock:
+            if job.status != QUEUED:
+                reader.close()
+                writer.close()
+                return
+            job.status = RUNNING
+            job.started_at = datetime.now().isoformat()
+            self._save(job)
+        # Starting a process forks or spawns and pickles the deck; keep that out of the lock
+        process.start()
+        writer.close()
+        with self._lock:
+            job.process = process
+            if job.cancel_requested:
+                process.terminate()
+
+        result = None
+        timed_out = False
+        deadline = time.monotonic() + self.timeout
+        try:
+            while result is None and not timed_out:
+                if reader.poll(max(0.0, min(CANCEL_POLL_INTERVAL, deadline - time.monotonic()))):
+                    result = reader.recv()
+                elif time.monotonic() >= deadline:
+                    timed_out = True
+                elif self._cancel_marked(job):
+                    with self._lock:
+                        job.cancel_requested = True
+                    break
+        except EOFError:
+            pass  # the worker exited without reporting, e.g. it was terminated
+        finally:
+            reader.close()
+            if process.is_alive():
+                process.terminate()
+            process.join()
+
+        with self._lock:
+            job.process = None
+            if job.cancel_requested:
+                self._finish(job, CANCELLED)
+            elif timed_out:
+                self.timed_out += 1
+                self._finish(job, FAILED, f"Export did not finish within {self.timeout}s")
+            elif result is None:
+                self._finish(job, FAILED, f"Export worker exited with code {process.exitcode}")
+            elif result[0] == "error":
+                self._finish(job, FAILED, result[1])
+            else:
+                self.artifact_cache.put_file(job.content_hash, tmp_path)
+                if self.fragment_cache is not None:
+                    self.fragment_cache.merge_counters(result[2])
+                job.size = result[1]
+                self._finish(job, COMPLETED)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    def _finish(self, job, status, error=None):
+        job.finish(status, error)
+        self._save(job)
+        if self._active_by_hash.get(job.content_hash) is job:
+            del self._active_by_hash[job.content_hash]
+        if status == COMPLETED:
+            self.completed += 1
+        elif status == FAILED:
+            self.failed += 1
+        else:
+            self.cancelled += 1
+
+    def _prune(self):
+        """Forget finished jobs older than job_ttl"""
+        cutoff = time.monotonic() - self.job_ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished_monotonic is not None and job.finished_monotonic < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+        if not self.job_dir:
+            return
+        # Saved states (and cancel markers) outlive the process that wrote them; sweep by age
+        cutoff = time.time() - self.job_ttl
+        with os.scandir(self.job_dir) as it:
+            for entry in it:
+                try:
+                    if entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    def stats(self):
+        with self._lock:
+            running = sum(1 for job in self._jobs.values() if job.status == RUNNING)
+            queued = sum(1 for job in self._jobs.values() if job.status == QUEUED)
+            return {
+                "workers": self.workers,
+                "queued": queued,
+                "running": running,
+                "submitted": self.submitted,
+                "reused": self.reused,
+                "completed": self.completed,
+                "failed": self.failed,
+                "cancelled": self.cancelled,
+                "timed_out": self.timed_out,
+            }
+
+
+def create_export_jobs_from_env(color_themes, artifact_cache, fragment_cache=None, exporter=None):
+    """Build the export job manager from EXPORT_* environment variables"""
+    return ExportJobManager(
+        color_themes,
+        artifact_cache,
+        fragment_cache=fragment_cache,
+        workers=int(os.getenv("EXPORT_WORKERS", "2")),
+        timeout=int(os.getenv("EXPORT_JOB_TIMEOUT", "120")),
+        job_ttl=int(os.getenv("EXPORT_JOB_TTL", "3600")),
+        template_path=os.getenv("PPTX_TEMPLATE_PATH") or None,
+        start_method=os.getenv("EXPORT_START_METHOD", "spawn"),
+        job_dir=os.getenv("EXPORT_JOB_DIR", os.path.join(os.getenv("EXPORT_DIR", "exports"), "jobs")),
+        exporter=exporter,
+    )
@@ -0,0 +1,45 @@
+"""
+Gunicorn settings for production serving.
+
+Run with:  gunicorn -c gunicorn.conf.py server:app
+
+The app is preloaded in the master process, which then does the fork-safe
+part of the warm-up (python-pptx, export templates) once and freezes the
+garbage collector before forking. Workers start with that already in memory
+and share those pages copy-on-write instead of each importing it again.
+After the fork every worker reopens its own SQLite connections and imports
+the model SDK itself: the Gemini SDK brings in grpc, which must not be
+loaded in a process that later forks.
+
+Set STARTUP_WARMUP=none to skip the warm-up and keep everything lazy.
+"""
+
+import gc
+import os
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('GUNICORN_WORKERS', '2'))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '16'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+preload_app = True
+
+# The warm-up runs from the hooks below, never as a thread before fork
+warm_up_enabled = os.getenv('STARTUP_WARMUP', 'sync').lower() != 'none'
+os.environ['STARTUP_WARMUP'] = 'none'
+
+
+def when_ready(arbiter):
+    import server
+    if warm_up_enabled:
+        server.warm_up(include_model=False)
+    # Keep the preloaded objects out of later collections so the GC does not touch
+    # (and un-share) their pages in the workers
+    gc.freeze()
+
+
+def post_fork(arbiter, worker):
+    import server
+    server.after_fork()
+    if warm_up_enabled:
+        server.warm_up()
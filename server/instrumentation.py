@@ -0,0 +1,273 @@
+"""
+Request instrumentation.
+
+- stage(name) / @timed(name) time a named piece of work (LLM wait, parsing,
+  layout, JSON encoding, PPTX building, ...). Every timing goes into a
+  Prometheus histogram, and timings taken while serving a request are also
+  reported back in that response's Server-Timing header.
+- Request durations are recorded per route, method and status. Flask
+  requests are timed by hooks from init_app; the native ASGI routes call
+  start_request() / finish_request() themselves.
+- GET /api/metrics renders both histograms in the Prometheus text format.
+- With PROFILING_ENABLED, adding ?profile=1 to a request runs a sampling
+  profiler on the request thread (?profile=all samples every thread) and
+  returns the samples as collapsed stacks, the input format of
+  flamegraph.pl and speedscope, instead of the normal response.
+
+Everything here is a perf_counter call plus a locked counter update per
+stage, so leaving it on costs microseconds per request.
+"""
+
+import contextvars
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import Response, request
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Timings of the request being served in this context, or None
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+class _RequestTimings:
+    __slots__ = ("start", "stages", "profiler", "lock")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages = {}
+        self.profiler = None
+        # Executor threads running in a copy of the request context record here too
+        self.lock = threading.Lock()
+
+
+def _env_flag(name, default="false"):
+    return os.getenv(name, default).lower() in ("1", "true", "yes", "on")
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram with labels"""
+
+    def __init__(self, name, help_text, label_names, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        for labels, values in sorted(series.items()):
+            label_text = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, labels))
+            prefix = f"{label_text}," if label_text else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {values[-1]}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {values[-2]:.6f}")
+            lines.append(f"{self.name}_count{{{label_text}}} {values[-1]}")
+        return "\n".join(lines)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class SamplingProfiler:
+    """Samples thread stacks at a fixed interval and aggregates them as collapsed stacks"""
+
+    def __init__(self, interval=0.005, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id  # None samples every thread
+        self.samples = 0
+        self._counts = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or (self.thread_id is not None and thread_id != self.thread_id):
+                    continue
+                stack = [names.get(thread_id, str(thread_id))]
+                stack.extend(reversed(_frame_names(frame)))
+                key = ";".join(stack)
+                self._counts[key] = self._counts.get(key, 0) + 1
+            self.samples += 1
+
+    def collapsed(self):
+        """One 'frame;frame;frame count' line per distinct stack"""
+        return "\n".join(f"{stack} {count}" for stack, count in
+                         sorted(self._counts.items(), key=lambda item: -item[1])) + "\n"
+
+
+def _frame_names(frame):
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return names
+
+
+class Instrumentation:
+    """Stage and request histograms plus the Flask hooks that report them"""
+
+    def __init__(self, enabled=True, profiling_enabled=False, profiling_token=None, profile_interval=0.005):
+        self.enabled = enabled
+        self.profiling_enabled = profiling_enabled
+        self.profiling_token = profiling_token
+        self.profile_interval = profile_interval
+        self.stage_seconds = Histogram(
+            "slideflow_stage_duration_seconds", "Time spent in a named stage of request handling", ("stage",))
+        self.request_seconds = Histogram(
+            "slideflow_request_duration_seconds", "HTTP request duration", ("route", "method", "status"))
+
+    def record(self, name, elapsed):
+        self.stage_seconds.observe((name,), elapsed)
+        timings = _request_timings.get()
+        if timings is not None:
+            with timings.lock:
+                timings.stages[name] = timings.stages.get(name, 0.0) + elapsed
+
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def timed(self, name):
+        """Decorator that records every call of the function as a stage"""
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.record(name, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def render_metrics(self):
+        return self.stage_seconds.render() + "\n" + self.request_seconds.render() + "\n"
+
+    def _profile_requested(self):
+        mode = request.args.get("profile")
+        if not mode or not self.profiling_enabled:
+            return None
+        if self.profiling_token and request.headers.get("X-Profile-Token") != self.profiling_token:
+            return None
+        return mode
+
+    def start_request(self):
+        """Start timing the request served in the current context; returns its timings or None"""
+        if not self.enabled:
+            return None
+        timings = _RequestTimings()
+        _request_timings.set(timings)
+        return timings
+
+    def finish_request(self, route, method, status):
+        """Record the current request's duration and return its Server-Timing header, or None"""
+        timings = _request_timings.get()
+        if timings is None:
+            return None
+        _request_timings.set(None)
+        total = time.perf_counter() - timings.start
+        self.request_seconds.observe((route, method, str(status)), total)
+        with timings.lock:
+            parts = [f"{name};dur={elapsed * 1000:.2f}" for name, elapsed in timings.stages.items()]
+        parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts)
+
+    def init_app(self, app):
+        """Register the per-request hooks on a Flask app"""
+
+        @app.before_request
+        def start_request_timing():
+            timings = self.start_request()
+            if timings is not None and self.profiling_enabled:
+                mode = self._profile_requested()
+                if mode:
+                    thread_id = None if mode == "all" else threading.get_ident()
+                    timings.profiler = SamplingProfiler(self.profile_interval, thread_id).start()
+
+        @app.after_request
+        def finish_request_timing(response):
+            timings = _request_timings.get()
+            if timings is None:
+                return response
+            req = request._get_current_object()
+            rule = req.url_rule.rule if req.url_rule is not None else "unmatched"
+            server_timing = self.finish_request(rule, req.method, response.status_code)
+
+            if timings.profiler is not None:
+                timings.profiler.stop()
+                response = Response(timings.profiler.collapsed(), mimetype="text/plain")
+                response.headers["X-Profile-Samples"] = str(timings.profiler.samples)
+            response.headers["Server-Timing"] = server_timing
+            return response
+
+        @app.teardown_request
+        def stop_request_profiler(exc):
+            # after_request hooks are skipped when a request fails past them; never leave
+            # the sampler thread running
+            timings = _request_timings.get()
+            if timings is not None:
+                if timings.profiler is not None:
+                    timings.profiler.stop()
+                _request_timings.set(None)
+
+
+def create_instrumentation_from_env():
+    """Build instrumentation configured by INSTRUMENTATION_ENABLED and PROFILING_* variables"""
+    return Instrumentation(
+        enabled=_env_flag("INSTRUMENTATION_ENABLED", "true"),
+        profiling_enabled=_env_flag("PROFILING_ENABLED"),
+        profiling_token=os.getenv("PROFILING_TOKEN") or None,
+        profile_interval=float(os.getenv("PROFILING_INTERVAL_MS", "5")) / 1000,
+    )
+
+
+instrumentation = create_instrumentation_from_env()
+stage = instrumentation.stage
+timed = instrumentation.timed
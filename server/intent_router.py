@@ -0,0 +1,205 @@
+"""
+Intent routing for voice and chat input.
+
+The lexicon (intent -> phrases, each with a weight) is compiled into a
+single case-insensitive word-boundary regex, longest phrases first, so one
+finditer pass over an utterance finds every phrase. Whole-word matching
+keeps "good" from firing inside "Goods and services tax".
+
+Scoring: every matched phrase adds weight * words-in-phrase to its intent.
+Words no phrase covers and that are not filler ("I", "the", "so", ...)
+count towards "presentation", since they are most likely the topic.
+Confidences are the scores normalized to sum to 1; on a tie "presentation"
+wins, so a topic that opens with a mood word ("Great Depression", "Fine
+arts") still generates. An utterance with no signal at all is routed to
+"small_talk".
+
+Only "presentation" should reach the model; every other intent is answered
+from RESPONSE_TEMPLATES.
+
+The lexicon can be extended or overridden with INTENT_LEXICON_FILE, a JSON
+object of intent -> {phrase: weight}.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+PRESENTATION = "presentation"
+SMALL_TALK = "small_talk"
+
+DEFAULT_LEXICON = {
+    "greeting": {
+        "hello": 1.0, "hi": 1.0, "hey": 1.0, "hi there": 1.2, "hey there": 1.2, "good morning": 1.2,
+        "good afternoon": 1.2, "good evening": 1.2, "howdy": 1.0, "greetings": 1.0, "yo": 0.8,
+    },
+    "mood_positive": {
+        "good": 1.0, "fine": 1.0, "great": 1.0, "okay": 0.8, "ok": 0.8, "well": 0.6, "nice": 0.8,
+        "awesome": 1.0, "fantastic": 1.0, "excellent": 1.0, "not bad": 1.2, "pretty good": 1.2,
+        "all good": 1.2, "doing well": 1.2, "wonderful": 1.0, "alright": 0.8, "happy": 0.8,
+    },
+    "mood_negative": {
+        "bad": 1.0, "tired": 1.0, "exhausted": 1.0, "stressed": 1.0, "sad": 1.0, "awful": 1.0,
+        "terrible": 1.0, "not great": 1.2, "not good": 1.2, "not so good": 1.3, "rough day": 1.2,
+        "busy": 0.8, "sick": 0.8, "meh": 0.8,
+    },
+    "thanks": {
+        "thanks": 1.0, "thank you": 1.2, "thx": 1.0, "cheers": 0.8, "appreciate it": 1.2,
+        "much appreciated": 1.2,
+    },
+    "goodbye": {
+        "bye": 1.0, "goodbye": 1.0, "see you": 1.0, "see ya": 1.0, "that's all": 1.0, "that is all": 1.0,
+        "i'm done": 1.0, "im done": 1.0, "good night": 1.2, "talk later": 1.0,
+    },
+    "help": {
+        "help": 1.0, "suggestions": 1.0, "suggest": 1.0, "ideas": 0.8, "what can you do": 1.5,
+        "how does this work": 1.5, "not sure": 1.0, "no idea": 1.0, "any ideas": 1.2,
+        "what should i": 1.0, "don't know": 1.0, "dont know": 1.0,
+    },
+    PRESENTATION: {
+        "presentation": 1.0, "presentations": 1.0, "slide": 1.0, "slides": 1.0, "deck": 1.0,
+        "slide deck": 1.2, "pitch": 0.8, "talk": 0.6, "keynote": 1.0, "lecture": 0.8, "webinar": 0.8,
+        "create": 0.6, "make": 0.5, "build": 0.5, "generate": 0.6, "prepare": 0.5, "about": 0.5,
+        "on the topic of": 1.0, "covering": 0.5, "explaining": 0.5, "overview of": 0.8,
+        "introduction to": 0.8,
+    },
+}
+
+# Neutral words: neither small talk nor topic
+FILLER_WORDS = frozenset("""
+    a an the and or but so i i'm im me my we our us you your it it's its is am are was were be been
+    doing do does did feeling feel today very really pretty quite just too also now then please can could
+    would will want like to for of in with at by this that these those there here as how what yes yeah
+    yep sure um uh hmm oh let let's lets some one lot much bit little again ask asking asked something
+    anything everyone folks
+""".split())
+
+RESPONSE_TEMPLATES = {
+    "greeting": "Hello! What kind of presentation would you like to create today?",
+    "mood_positive": ("That's great to hear! Now, what type of presentation would you like to create? "
+                      "You can describe your topic or ask for suggestions."),
+    "mood_negative": ("Sorry to hear that. Let's make this part easy: tell me your presentation topic "
+                      "and I'll draft the slides for you."),
+    "thanks": "You're welcome! Anything else you'd like to add to your presentation?",
+    "goodbye": "Goodbye! Your slides will be here when you come back.",
+    "help": ("I can turn a topic into slides. Try something like 'a pitch for our new product', "
+             "'marketing strategy for Q3' or 'onboarding for new team members'."),
+    SMALL_TALK: "I'm listening! What would you like your presentation to be about?",
+    PRESENTATION: ("Perfect! I'll help you create a presentation about '{topic}'. "
+                   "Let me generate some slide content for you."),
+}
+
+_WORD_RE = re.compile(r"[\w']+")
+_TOPIC_RE = re.compile(
+    r"\b(?:presentation|presentations|slides?|slide deck|deck|pitch|talk|keynote|lecture|webinar)\s+"
+    r"(?:about|on|for|covering|explaining|regarding|to explain)\s+(?P<topic>.+)$",
+    re.I,
+)
+
+
+class IntentRouter:
+    """Single-pass compiled matcher over an intent lexicon"""
+
+    def __init__(self, lexicon=None, filler_words=FILLER_WORDS, templates=RESPONSE_TEMPLATES):
+        self.lexicon = lexicon or DEFAULT_LEXICON
+        self.filler_words = filler_words
+        self.templates = templates
+        self._phrases = {}
+        for intent, phrases in self.lexicon.items():
+            for phrase, weight in phrases.items():
+                phrase = " ".join(phrase.lower().split())
+                self._phrases[phrase] = (intent, weight * len(phrase.split()))
+        alternatives = sorted(self._phrases, key=len, reverse=True)
+        pattern = "|".join(re.escape(phrase).replace(r"\ ", r"\s+") for phrase in alternatives)
+        self._matcher = re.compile(rf"(?<![\w'])(?:{pattern})(?![\w'])", re.I)
+        self.routed = dict.fromkeys(list(self.lexicon) + [SMALL_TALK], 0)
+        self._lock = threading.Lock()
+
+    def scores(self, text):
+        """Normalized confidence per intent with any signal"""
+        totals = {}
+        spans = []
+        for match in self._matcher.finditer(text):
+            intent, score = self._phrases[" ".join(match.group().lower().split())]
+            totals[intent] = totals.get(intent, 0.0) + score
+            spans.append(match.span())
+        # Topic words: anything no phrase covered that is not filler
+        content = 0
+        index = 0
+        for word in _WORD_RE.finditer(text):
+            start = word.start()
+            while index < len(spans) and spans[index][1] <= start:
+                index += 1
+            if index < len(spans) and spans[index][0] <= start:
+                continue
+            if word.group().lower() not in self.filler_words:
+                content += 1
+        if content:
+            totals[PRESENTATION] = totals.get(PRESENTATION, 0.0) + content
+        total = sum(totals.values())
+        if not total:
+            return {SMALL_TALK: 1.0}
+        # Best first; on a tie the topic wins, so "Great Depression" or "Fine arts" (one
+        # mood word, one topic word) still generate
+        ranked = sorted(totals.items(), key=lambda item: (-item[1], item[0] != PRESENTATION))
+        return {intent: round(score / total, 3) for intent, score in ranked}
+
+    def route(self, text):
+        """Best intent, its confidence, all scores, the topic and a templated response"""
+        text = " ".join(text.replace("\u2019", "'").split())
+        scores = self.scores(text)
+        intent, confidence = next(iter(scores.items()))
+        with self._lock:
+            self.routed[intent] = self.routed.get(intent, 0) + 1
+        topic = extract_topic(text) if intent == PRESENTATION else None
+        template = self.templates.get(intent) or self.templates[SMALL_TALK]
+        return {
+            "intent": intent,
+            "confidence": confidence,
+            "scores": scores,
+            "should_generate": intent == PRESENTATION,
+            "topic": topic,
+            "response": template.format(topic=topic) if topic else template,
+        }
+
+    def route_many(self, texts):
+        return [self.route(text) for text in texts]
+
+    def _routed_snapshot(self):
+        with self._lock:
+            return dict(self.routed)
+
+    def stats(self):
+        return {
+            "intents": len(self.lexicon),
+            "phrases": len(self._phrases),
+            "routed": self._routed_snapshot(),
+        }
+
+
+def extract_topic(text):
+    """The topic of a presentation request ("a deck about X" -> "X"), or the whole text"""
+    match = _TOPIC_RE.search(text)
+    topic = match.group("topic") if match else text
+    return topic.strip(" .!?") or text
+
+
+def create_intent_router_from_env():
+    """Build the router, merging any lexicon from INTENT_LEXICON_FILE into the default one"""
+    lexicon = {intent: dict(phrases) for intent, phrases in DEFAULT_LEXICON.items()}
+    path = os.getenv('INTENT_LEXICON_FILE')
+    if path:
+        try:
+            with open(path) as f:
+                for intent, phrases in json.load(f).items():
+                    lexicon.setdefault(intent, {}).update(
+                        {phrase: float(weight) for phrase, weight in phrases.items()}
+                    )
+            logger.info(f"Loaded intent lexicon from {path}")
+        except (OSError, ValueError, AttributeError) as e:
+            logger.error(f"Could not load intent lexicon from {path}: {str(e)}")
+    return IntentRouter(lexicon)
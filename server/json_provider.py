@@ -0,0 +1,124 @@
+"""
+Fast JSON encoding and response compression.
+
+FastJSONProvider plugs into Flask's JSON provider hook, so every jsonify()
+call goes through orjson when it is installed and falls back to the stdlib
+encoder otherwise. Compact output (no indentation, no key sorting) is
+opt-in through JSON_COMPACT.
+
+compress_response() is an after_request hook that, when RESPONSE_COMPRESSION
+is enabled, gzip/brotli-encodes JSON responses above
+RESPONSE_COMPRESSION_MIN_BYTES for clients that accept it.
+"""
+
+import gzip
+import os
+
+from flask.json.provider import DefaultJSONProvider
+
+from instrumentation import stage
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _env_flag(name, default="false"):
+    return os.getenv(name, default).lower() in ("1", "true", "yes", "on")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider using orjson when available, stdlib json otherwise"""
+
+    def __init__(self, app):
+        super().__init__(app)
+        if _env_flag("JSON_COMPACT"):
+            self.compact = True
+            self.sort_keys = False
+
+    @property
+    def encoder_name(self):
+        return "orjson" if orjson is not None else "json"
+
+    def _orjson_options(self, indent):
+        # Dates go through Flask's default handler so the output matches the stdlib path
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None:
+            return super().dumps(obj, **kwargs)
+        indent = bool(kwargs.get("indent"))
+        return orjson.dumps(obj, default=self.default, option=self._orjson_options(indent)).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if orjson is None:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        with stage("json_encode"):
+            if orjson is None:
+                return super().response(*args, **kwargs)
+            obj = self._prepare_response_obj(args, kwargs)
+            indent = self.compact is False or (self.compact is None and self._app.debug)
+            body = orjson.dumps(obj, default=self.default, option=self._orjson_options(indent))
+            return self._app.response_class(body + b"\n", mimetype=self.mimetype)
+
+
+# Response compression
+COMPRESSION_ENABLED = _env_flag("RESPONSE_COMPRESSION")
+COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "5"))
+BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", "4"))
+
+
+def _choose_encoding(accept_encoding):
+    if brotli is not None and "br" in accept_encoding:
+        return "br"
+    if "gzip" in accept_encoding:
+        return "gzip"
+    return None
+
+
+def compress_response(response, accept_encoding):
+    """Compress a buffered JSON response in place when it is worth it"""
+    if (
+        not COMPRESSION_ENABLED
+        or response.direct_passthrough
+        or response.is_streamed
+        or response.status_code != 200
+        or response.mimetype != "application/json"
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+    body, encoding = compress_body(response.get_data(), accept_encoding)
+    if encoding is None:
+        return response
+    response.set_data(body)
+    response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def compress_body(body, accept_encoding):
+    """(body, encoding) for a JSON body; encoding is None when it is sent as is"""
+    if not COMPRESSION_ENABLED or len(body) < COMPRESSION_MIN_BYTES:
+        return body, None
+    encoding = _choose_encoding(accept_encoding or "")
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY), encoding
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL), encoding
+    return body, None
+
@@ -0,0 +1,367 @@
+"""
+Guarded client for upstream LLM calls.
+
+Every call to the model goes through LLMClient, which applies, in order:
+
+- a circuit breaker: after LLM_BREAKER_FAILURES consecutive upstream
+  failures calls are rejected immediately for LLM_BREAKER_RESET_SECONDS,
+  then a single probe decides whether to close it again
+- a token bucket per API key (LLM_RATE_PER_SEC / LLM_RATE_BURST)
+- a max-in-flight semaphore (LLM_MAX_IN_FLIGHT)
+- a per-call deadline (LLM_TIMEOUT) passed down to the SDK
+- jittered exponential backoff for retryable errors (LLM_MAX_RETRIES)
+
+Rejections raise UpstreamUnavailable subclasses straight away, so callers
+can serve their fallback content without waiting on a failing upstream.
+"""
+
+import hashlib
+import logging
+import os
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# HTTP status codes (as exposed on google.api_core exceptions) worth retrying
+RETRYABLE_CODES = {408, 429, 500, 502, 503, 504}
+RETRYABLE_NAMES = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "InternalServerError",
+    "DeadlineExceeded", "GatewayTimeout", "BadGateway", "RetryError",
+}
+
+
+class UpstreamUnavailable(Exception):
+    """Raised when a call is rejected without reaching the upstream model"""
+
+
+class CircuitOpenError(UpstreamUnavailable):
+    pass
+
+
+class RateLimitedError(UpstreamUnavailable):
+    pass
+
+
+class ConcurrencyLimitError(UpstreamUnavailable):
+    pass
+
+
+class DeadlineExceededError(UpstreamUnavailable):
+    pass
+
+
+def is_retryable(error):
+    """Whether an upstream error is transient"""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    if getattr(error, "code", None) in RETRYABLE_CODES:
+        return True
+    return type(error).__name__ in RETRYABLE_NAMES
+
+
+class TokenBucket:
+    """Token bucket that refills at rate tokens per second up to burst"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, timeout):
+        """Take one token, waiting at most timeout seconds; False if that is not enough"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+            if wait > timeout:
+                return False
+            # Reserve the token now so concurrent callers queue up behind it
+            self.tokens -= 1
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    def available(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            return round(self.tokens, 2)
+
+
+class RateLimiter:
+    """One token bucket per API key"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key_id(api_key):
+        # Metrics must never expose the key itself
+        return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:8]
+
+    def acquire(self, api_key, timeout):
+        if self.rate <= 0:
+            return True
+        key_id = self._key_id(api_key)
+        with self._lock:
+            bucket = self._buckets.get(key_id)
+            if bucket is None:
+                bucket = self._buckets[key_id] = TokenBucket(self.rate, self.burst)
+        return bucket.acquire(timeout)
+
+    def stats(self):
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {
+            "rate_per_sec": self.rate,
+            "burst": self.burst,
+            "tokens": {key_id: bucket.available() for key_id, bucket in buckets.items()},
+        }
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.times_opened = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a call may go upstream now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                    logger.warning(f"Upstream circuit opened after {self.consecutive_failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def release_probe(self):
+        """Give up a half-open probe that never reached upstream"""
+        with self._lock:
+            self._probing = False
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "times_opened": self.times_opened,
+            }
+
+
+class LLMClient:
+    """Wraps a model object's generate_content with limits, deadlines, retries and a breaker"""
+
+    def __init__(self, model, api_key=None, max_in_flight=32, rate_limiter=None, breaker=None,
+                 timeout=30.0, max_retries=2, backoff_base=0.5, backoff_max=4.0):
+        self.model = model
+        self.api_key = api_key
+        self.max_in_flight = max_in_flight
+        self.rate_limiter = rate_limiter or RateLimiter(0, 0)
+        self.breaker = breaker or CircuitBreaker()
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self.counters = {
+            "calls": 0,
+            "successes": 0,
+            "failures": 0,
+            "retries": 0,
+            "in_flight": 0,
+            "waiting": 0,
+            "rejected_circuit_open": 0,
+            "rejected_rate_limited": 0,
+            "rejected_concurrency": 0,
+            "deadline_exceeded": 0,
+        }
+
+    def _count(self, name, delta=1):
+        with self._lock:
+            self.counters[name] += delta
+
+    def _backoff(self, attempt):
+        # Full jitter: uniform over [0, min(max, base * 2^attempt)]
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _admit(self, deadline, api_key):
+        """Pass the breaker, rate limiter and concurrency limit, or raise"""
+        if not self.breaker.allow():
+            self._count("rejected_circuit_open")
+            raise CircuitOpenError("Upstream circuit is open")
+        try:
+            if not self.rate_limiter.acquire(api_key or self.api_key, deadline - time.monotonic()):
+                self._count("rejected_rate_limited")
+                raise RateLimitedError("Upstream rate limit reached")
+            self._count("waiting")
+            try:
+                acquired = self._slots.acquire(timeout=max(0.0, deadline - time.monotonic()))
+            finally:
+                self._count("waiting", -1)
+            if not acquired:
+                self._count("rejected_concurrency")
+                raise ConcurrencyLimitError(f"{self.max_in_flight} upstream calls already in flight")
+        except UpstreamUnavailable:
+            self.breaker.release_probe()
+            raise
+        self._count("in_flight")
+
+    def _release(self):
+        self._count("in_flight", -1)
+        self._slots.release()
+
+    def _call(self, prompt, deadline, stream):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            self._count("deadline_exceeded")
+            raise DeadlineExceededError(f"No time left within the {self.timeout}s deadline")
+        return self.model.generate_content(prompt, stream=stream, request_options={"timeout": remaining})
+
+    def _handle_failure(self, error, attempt, deadline):
+        """Record a failed attempt; return True if it should be retried"""
+        retryable = is_retryable(error)
+        if retryable and attempt < self.max_retries:
+            delay = self._backoff(attempt)
+            if time.monotonic() + delay < deadline:
+                self._count("retries")
+                logger.warning(f"Retrying upstream call in {delay:.2f}s: {str(error)}")
+                time.sleep(delay)
+                return True
+        self._count("failures")
+        if retryable or isinstance(error, DeadlineExceededError):
+            self.breaker.record_failure()
+        else:
+            # The upstream answered; a bad request says nothing about its health
+            self.breaker.record_success()
+        return False
+
+    def generate_content(self, prompt, api_key=None):
+        """Generate a full response, raising UpstreamUnavailable when rejected"""
+        deadline = time.monotonic() + self.timeout
+        self._count("calls")
+        self._admit(deadline, api_key)
+        try:
+            attempt = 0
+            while True:
+                try:
+                    response = self._call(prompt, deadline, stream=False)
+                    self.breaker.record_success()
+                    self._count("successes")
+                    return response
+                except Exception as e:
+                    if not self._handle_failure(e, attempt, deadline):
+                        raise
+                    attempt += 1
+        finally:
+            self._release()
+
+    def stream_content(self, prompt, api_key=None):
+        """Yield response chunks; only failures before the first chunk are retried"""
+        deadline = time.monotonic() + self.timeout
+        self._count("calls")
+        self._admit(deadline, api_key)
+        settled = False
+        try:
+            attempt = 0
+            started = False
+            while True:
+                try:
+                    for chunk in self._call(prompt, deadline, stream=True):
+                        started = True
+                        yield chunk
+                    settled = True
+                    self.breaker.record_success()
+                    self._count("successes")
+                    return
+                except Exception as e:
+                    settled = True
+                    if started:
+                        # Chunks already went out; a retry would repeat them
+                        self._count("failures")
+                        self.breaker.record_failure()
+                        raise
+                    if not self._handle_failure(e, attempt, deadline):
+                        raise
+                    settled = False
+                    attempt += 1
+        finally:
+            if not settled:
+                # Closed by the consumer mid-stream: the outcome is unknown, so
+                # free a half-open probe instead of blocking every later one
+                self.breaker.release_probe()
+            self._release()
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+        counters.update({
+            "max_in_flight": self.max_in_flight,
+            "timeout": self.timeout,
+            "max_retries": self.max_retries,
+            "circuit_breaker": self.breaker.stats(),
+            "rate_limiter": self.rate_limiter.stats(),
+        })
+        return counters
+
+
+def create_llm_client_from_env(model, api_key=None):
+    """Build an LLMClient configured by LLM_* environment variables"""
+    return LLMClient(
+        model,
+        api_key=api_key,
+        max_in_flight=int(os.getenv("LLM_MAX_IN_FLIGHT", "32")),
+        rate_limiter=RateLimiter(
+            rate=float(os.getenv("LLM_RATE_PER_SEC", "10")),
+            burst=int(os.getenv("LLM_RATE_BURST", "20")),
+        ),
+        breaker=CircuitBreaker(
+            failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+            reset_timeout=float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30")),
+        ),
+        timeout=float(os.getenv("LLM_TIMEOUT", "30")),
+        max_retries=int(os.getenv("LLM_MAX_RETRIES", "2")),
+        backoff_base=float(os.getenv("LLM_RETRY_BASE_SECONDS", "0.5")),
+        backoff_max=float(os.getenv("LLM_RETRY_MAX_SECONDS", "4")),
+    )
@@ -0,0 +1,214 @@
+"""
+Model providers.
+
+The server talks to its language model through a ModelProvider, chosen by
+MODEL_PROVIDER:
+
+- gemini: Google Gemini through google-generativeai (needs GEMINI_API_KEY)
+- stub: a local, deterministic model that returns realistic slide JSON with
+  configurable latency, jitter and error rate, for load tests, benchmarks
+  and CI without network access or a key
+
+Providers expose the same generate_content(prompt, stream=False,
+request_options=None) call as genai.GenerativeModel: a response with a
+.text attribute, or an iterator of such chunks when streaming.
+
+google-generativeai takes around a second to import, so it is imported and
+the model constructed on the first call (or in warm_up()), not at startup.
+"""
+
+import importlib.util
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import zlib
+
+logger = logging.getLogger(__name__)
+
+
+class ModelResponse:
+    """A model response or streamed chunk"""
+
+    __slots__ = ("text",)
+
+    def __init__(self, text):
+        self.text = text
+
+
+class ModelProvider:
+    """Interface every model backend implements"""
+
+    name = "base"
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+
+    def generate_content(self, prompt, stream=False, request_options=None):
+        raise NotImplementedError
+
+    def warm_up(self):
+        """Do any deferred initialization now instead of on the first call"""
+
+
+def genai_available():
+    """Whether google-generativeai is installed, without importing it"""
+    try:
+        return importlib.util.find_spec("google.generativeai") is not None
+    except ModuleNotFoundError:
+        return False
+
+
+class GeminiProvider(ModelProvider):
+    """Google Gemini via google-generativeai, imported and configured on first use"""
+
+    name = "gemini"
+
+    def __init__(self, api_key, model_name="gemini-pro"):
+        if not genai_available():
+            raise RuntimeError("google-generativeai is not installed")
+        super().__init__(model_name)
+        self._api_key = api_key
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _get_model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    import google.generativeai as genai
+                    genai.configure(api_key=self._api_key)
+                    self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def warm_up(self):
+        self._get_model()
+
+    def generate_content(self, prompt, stream=False, request_options=None):
+        return self._get_model().generate_content(prompt, stream=stream, request_options=request_options)
+
+
+class StubUpstreamError(Exception):
+    """Injected upstream failure; looks like a 503 to the retry logic"""
+
+    code = 503
+
+
+STUB_POINTS = [
+    "Why {topic} matters now",
+    "Key trends shaping {topic}",
+    "Common challenges with {topic}",
+    "How leading teams approach {topic}",
+    "Measuring success in {topic}",
+    "Costs and trade-offs of {topic}",
+    "Risks to watch in {topic}",
+    "Next steps for {topic}",
+    "Quick wins for {topic}",
+    "Long-term outlook for {topic}",
+]
+
+_ARRAY_REQUEST_RE = re.compile(r"Plan a (\d+)-slide presentation about: \"(.*?)\"", re.S)
+_SLIDE_REQUEST_RE = re.compile(r"based on this request: \"(.*?)\"", re.S)
+
+
+class StubProvider(ModelProvider):
+    """Offline model with deterministic output and configurable latency, jitter and errors"""
+
+    name = "stub"
+
+    def __init__(self, latency=0.8, jitter=0.2, error_rate=0.0, seed=0, chunk_count=8):
+        super().__init__("stub")
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.chunk_count = chunk_count
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+
+    def _draw(self):
+        """(delay, fail) for one call"""
+        with self._lock:
+            self.calls += 1
+            delay = max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+            fail = self._rng.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        return delay, fail
+
+    def respond(self, prompt):
+        """Response text for a prompt; the same prompt always gets the same text"""
+        rng = random.Random(zlib.crc32(prompt.encode("utf-8")))
+        outline = _ARRAY_REQUEST_RE.search(prompt)
+        if outline:
+            count, topic = int(outline.group(1)), outline.group(2)
+            middle = rng.sample(STUB_POINTS, min(len(STUB_POINTS), max(0, count - 2)))
+            titles = [f"Introduction to {topic}"] + [point.format(topic=topic) for point in middle]
+            return json.dumps((titles + [f"Summary: {topic}"])[:count])
+
+        match = _SLIDE_REQUEST_RE.search(prompt)
+        topic = (match.group(1) if match else prompt).strip()[:80] or "the topic"
+        points = [point.format(topic=topic) for point in rng.sample(STUB_POINTS, rng.randint(3, 5))]
+        return json.dumps({
+            "title": topic[:1].upper() + topic[1:],
+            "content": f"An overview of {topic}: where it stands today, what is driving change and "
+                       f"what it means for the people involved.",
+            "bullet_points": points,
+            "design_theme": rng.choice(["professional", "creative", "modern", "minimal"]),
+            "layout_type": rng.choice(["title-content", "two-column", "image-text", "bullet-list"]),
+        })
+
+    def _wait(self, delay, request_options):
+        timeout = (request_options or {}).get("timeout")
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"Stub model did not answer within {timeout:.2f}s")
+        time.sleep(delay)
+
+    def generate_content(self, prompt, stream=False, request_options=None):
+        delay, fail = self._draw()
+        if stream:
+            return self._stream(prompt, delay, fail, request_options)
+        self._wait(delay, request_options)
+        if fail:
+            raise StubUpstreamError("503 Stub model unavailable")
+        return ModelResponse(self.respond(prompt))
+
+    def _stream(self, prompt, delay, fail, request_options):
+        # Half the latency before the first token, the rest spread over the chunks
+        self._wait(delay / 2, request_options)
+        if fail:
+            raise StubUpstreamError("503 Stub model unavailable")
+        text = self.respond(prompt)
+        size = max(1, -(-len(text) // self.chunk_count))
+        for start in range(0, len(text), size):
+            time.sleep(delay / 2 / self.chunk_count)
+            yield ModelResponse(text[start:start + size])
+
+    def stats(self):
+        with self._lock:
+            return {"calls": self.calls, "errors": self.errors}
+
+
+def create_model_provider_from_env():
+    """Build the provider selected by MODEL_PROVIDER, or None if none is configured"""
+    provider = os.getenv("MODEL_PROVIDER", "gemini").lower()
+    if provider == "stub":
+        logger.info("Using the local stub model provider")
+        return StubProvider(
+            latency=float(os.getenv("MODEL_STUB_LATENCY_MS", "800")) / 1000,
+            jitter=float(os.getenv("MODEL_STUB_JITTER_MS", "200")) / 1000,
+            error_rate=float(os.getenv("MODEL_STUB_ERROR_RATE", "0")),
+            seed=int(os.getenv("MODEL_STUB_SEED", "0")),
+        )
+    if provider != "gemini":
+        raise ValueError(f"Unknown MODEL_PROVIDER: {provider}")
+
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        return None
+    return GeminiProvider(api_key, os.getenv("GEMINI_MODEL_NAME", "gemini-pro"))
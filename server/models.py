@@ -0,0 +1,177 @@
+"""
+Compact slide data model.
+
+The API speaks plain dicts, but holding every stored slide as nested dicts
+costs a dict per element plus a second dict for its style, each repeating
+the same string keys. Stored slides use these slotted classes instead:
+
+- Style: an immutable, interned tuple of CSS properties. Every title of a
+  given color theme shares one Style object, as does every body text block.
+- Element: the fixed element fields in slots, anything else in `extra`
+- Slide: the fixed slide fields in slots, elements as a tuple, anything
+  else (ai_metadata, notes, ...) in `extra`
+
+Fields missing from the source dict stay missing, and unknown keys are kept,
+so Slide.from_dict(data).to_dict() == data for any slide dict. to_dict()
+always builds fresh dicts, so callers may mutate the result freely.
+"""
+
+import copy
+import sys
+import weakref
+
+
+class _Missing:
+    __slots__ = ()
+
+    def __bool__(self):
+        return False
+
+    def __repr__(self):
+        return "MISSING"
+
+
+MISSING = _Missing()
+
+_interned_styles = weakref.WeakValueDictionary()
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+def _copy(value):
+    return copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+
+
+class Style:
+    """Immutable element style shared by every element with the same properties"""
+
+    __slots__ = ("items", "__weakref__")
+
+    def __init__(self, items):
+        self.items = items
+
+    @classmethod
+    def from_dict(cls, data):
+        items = tuple((_intern(key), _intern(value)) for key, value in data.items())
+        try:
+            style = _interned_styles.get(items)
+        except TypeError:
+            # Unhashable values (nested lists/dicts) cannot be shared
+            return cls(tuple((key, copy.deepcopy(value)) for key, value in items))
+        if style is None:
+            style = _interned_styles[items] = cls(items)
+        return style
+
+    def to_dict(self):
+        return {key: _copy(value) for key, value in self.items}
+
+    def __repr__(self):
+        return f"Style({dict(self.items)!r})"
+
+
+ELEMENT_FIELDS = ("id", "type", "role", "content", "x", "y", "width", "height", "style")
+SLIDE_FIELDS = ("id", "title", "elements", "theme", "layout", "color_theme", "background_color")
+_ELEMENT_KEYS = frozenset(ELEMENT_FIELDS)
+_SLIDE_KEYS = frozenset(SLIDE_FIELDS)
+
+
+def _extra(data, known):
+    extra = {_intern(key): value for key, value in data.items() if key not in known}
+    return extra or None
+
+
+class Element:
+    """One positioned slide element"""
+
+    __slots__ = ELEMENT_FIELDS + ("extra",)
+
+    @classmethod
+    def from_dict(cls, data):
+        element = cls.__new__(cls)
+        get = data.get
+        element.id = get("id", MISSING)
+        element.type = _intern(get("type", MISSING))
+        element.role = _intern(get("role", MISSING))
+        element.content = get("content", MISSING)
+        element.x = get("x", MISSING)
+        element.y = get("y", MISSING)
+        element.width = get("width", MISSING)
+        element.height = get("height", MISSING)
+        style = get("style", MISSING)
+        element.style = Style.from_dict(style) if type(style) is dict else style
+        element.extra = None if _ELEMENT_KEYS.issuperset(data) else _extra(data, _ELEMENT_KEYS)
+        return element
+
+    def to_dict(self):
+        data = {}
+        for name in ELEMENT_FIELDS:
+            value = getattr(self, name)
+            if value is not MISSING:
+                data[name] = value.to_dict() if type(value) is Style else _copy(value)
+        if self.extra:
+            for key, value in self.extra.items():
+                data[key] = _copy(value)
+        return data
+
+    def __repr__(self):
+        return f"Element({self.to_dict()!r})"
+
+
+class Slide:
+    """A stored slide and its elements"""
+
+    __slots__ = SLIDE_FIELDS + ("extra",)
+
+    @classmethod
+    def from_dict(cls, data):
+        slide = cls.__new__(cls)
+        get = data.get
+        slide.id = get("id", MISSING)
+        slide.title = get("title", MISSING)
+        elements = get("elements", MISSING)
+        if type(elements) is list:
+            elements = tuple(Element.from_dict(element) if type(element) is dict else element
+                             for element in elements)
+        slide.elements = elements
+        slide.theme = _intern(get("theme", MISSING))
+        slide.layout = _intern(get("layout", MISSING))
+        slide.color_theme = _intern(get("color_theme", MISSING))
+        slide.background_color = _intern(get("background_color", MISSING))
+        slide.extra = None if _SLIDE_KEYS.issuperset(data) else _extra(data, _SLIDE_KEYS)
+        return slide
+
+    def to_dict(self):
+        data = {}
+        for name in SLIDE_FIELDS:
+            value = getattr(self, name)
+            if value is MISSING:
+                continue
+            if type(value) is tuple and name == "elements":
+                value = [element.to_dict() if type(element) is Element else _copy(element)
+                         for element in value]
+            else:
+                value = _copy(value)
+            data[name] = value
+        if self.extra:
+            for key, value in self.extra.items():
+                data[key] = _copy(value)
+        return data
+
+    def __repr__(self):
+        return f"Slide(id={self.id!r}, title={self.title!r}, elements={len(self.elements or ())})"
+
+
+def pack_slides(slides):
+    """Compact form of a list of slide dicts; anything that is not a dict is kept as is"""
+    if type(slides) is not list:
+        return slides
+    return [Slide.from_dict(slide) if type(slide) is dict else slide for slide in slides]
+
+
+def unpack_slides(slides):
+    """Fresh slide dicts from the compact form"""
+    if type(slides) is not list:
+        return slides
+    return [slide.to_dict() if type(slide) is Slide else slide for slide in slides]
@@ -0,0 +1,387 @@
+"""
+PPTX export engine.
+
+- Base templates are built once per color theme (16:9 canvas, blank layout,
+  themed master background) and cached in serialized form, so an export
+  only has to parse a small package instead of constructing one.
+- Every element produced by convert_to_slide_elements or the editor
+  (text, bulletList, shape, table, image) becomes a positioned, styled
+  shape at the same coordinates as on the 800x450 editor canvas.
+- With a fragment cache, each rendered slide's XML is stored under a hash
+  of the slide's content and spliced back in on the next export, so only
+  slides that changed since the last export are rendered again.
+- stream_presentation() writes the zip straight into the HTTP response in
+  chunks instead of buffering the whole file in memory.
+- python-pptx and lxml are imported by load_pptx() on the first export (or
+  in warm_up()), so processes that never export do not pay for them.
+"""
+
+import base64
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import queue
+import re
+import threading
+from io import BytesIO
+
+from export_cache import deck_hash, template_stamp
+
+# Bound by load_pptx()
+etree = Presentation = RGBColor = MSO_SHAPE = PP_ALIGN = parse_xml = Emu = Pt = None
+# Filled by load_pptx()
+ALIGNMENTS = {}
+SHAPES = {}
+_import_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+PPTX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.presentationml.presentation'
+
+# The editor canvas is 800x450 CSS pixels; one CSS pixel is 9525 EMU at 96 DPI
+CANVAS_WIDTH = 800
+CANVAS_HEIGHT = 450
+EMU_PER_PX = 9525
+BLANK_LAYOUT_INDEX = 6
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Bump when rendering changes so stale slide fragments are not reused
+FRAGMENT_VERSION = 2
+
+_HEX_COLOR_RE = re.compile(r'^#?([0-9a-fA-F]{3}|[0-9a-fA-F]{6})$')
+_PX_RE = re.compile(r'^\s*([\d.]+)\s*(px|pt)?\s*$')
+
+
+def pptx_available():
+    """Whether python-pptx is installed, without importing it"""
+    return importlib.util.find_spec("pptx") is not None and importlib.util.find_spec("lxml") is not None
+
+
+def load_pptx():
+    """Import python-pptx and lxml into this module on first use"""
+    global etree, Presentation, RGBColor, MSO_SHAPE, PP_ALIGN, parse_xml, Emu, Pt
+    if Presentation is not None:
+        return
+    with _import_lock:
+        if Presentation is not None:
+            return
+        from lxml import etree as _etree
+        from pptx.dml.color import RGBColor as _RGBColor
+        from pptx.enum.shapes import MSO_SHAPE as _MSO_SHAPE
+        from pptx.enum.text import PP_ALIGN as _PP_ALIGN
+        from pptx.oxml import parse_xml as _parse_xml
+        from pptx.util import Emu as _Emu, Pt as _Pt
+        from pptx import Presentation as _Presentation
+        etree, RGBColor, MSO_SHAPE, PP_ALIGN, parse_xml, Emu, Pt = (
+            _etree, _RGBColor, _MSO_SHAPE, _PP_ALIGN, _parse_xml, _Emu, _Pt)
+        ALIGNMENTS.update({"left": PP_ALIGN.LEFT, "center": PP_ALIGN.CENTER, "right": PP_ALIGN.RIGHT})
+        SHAPES.update({
+            "rectangle": MSO_SHAPE.RECTANGLE,
+            "circle": MSO_SHAPE.OVAL,
+            "triangle": MSO_SHAPE.ISOSCELES_TRIANGLE,
+        })
+        # Set last: other threads treat a bound Presentation as "everything is loaded"
+        Presentation = _Presentation
+
+
+def px(value):
+    """Convert editor pixels to EMU"""
+    try:
+        return Emu(int(float(value) * EMU_PER_PX))
+    except (TypeError, ValueError):
+        return Emu(0)
+
+
+def parse_color(value):
+    """Parse '#rrggbb' / '#rgb' into an RGBColor, or None"""
+    match = _HEX_COLOR_RE.match(value or '') if isinstance(value, str) else None
+    if not match:
+        return None
+    digits = match.group(1)
+    if len(digits) == 3:
+        digits = ''.join(c * 2 for c in digits)
+    return RGBColor.from_string(digits.upper())
+
+
+def parse_font_size(value, default_px=16):
+    """Parse a CSS font size ('24px', '18pt', 16) into points"""
+    match = _PX_RE.match(str(value)) if value is not None else None
+    if not match:
+        return Pt(default_px * 0.75)
+    size = float(match.group(1))
+    return Pt(size if match.group(2) == 'pt' else size * 0.75)
+
+
+class PptxExporter:
+    """Builds styled PPTX decks from slide dicts using cached base templates"""
+
+    def __init__(self, color_themes, template_path=None, fragment_cache=None):
+        self.color_themes = color_themes
+        self.template_path = template_path
+        self.fragment_cache = fragment_cache
+        self._templates = {}
+        self._lock = threading.Lock()
+        self.template_builds = 0
+
+    def content_hash(self, slides, color_theme):
+        """Artifact cache key of an export: changes with the slides, the theme's colors and the template file"""
+        return deck_hash(slides, color_theme, self.color_themes.get(color_theme),
+                         template_stamp(self.template_path))
+
+    def template_bytes(self, color_theme):
+        """Serialized base template for a color theme, built on first use and
+        rebuilt when the theme's colors or the template file change"""
+        theme = self.color_themes.get(color_theme)
+        key = (color_theme, tuple(sorted(theme.items())) if theme else None, template_stamp(self.template_path))
+        cached = self._templates.get(key)
+        if cached is not None:
+            return cached
+        with self._lock:
+            if key not in self._templates:
+                # Superseded versions of this theme's template are dropped
+                for stale in [k for k in self._templates if k[0] == color_theme]:
+                    del self._templates[stale]
+                self._templates[key] = self._build_template(color_theme)
+                self.template_builds += 1
+            return self._templates[key]
+
+    def warm_up(self):
+        """Import python-pptx and build every theme's template now instead of on first export"""
+        load_pptx()
+        for color_theme in self.color_themes:
+            self.template_bytes(color_theme)
+
+    def _build_template(self, color_theme):
+        load_pptx()
+        prs = Presentation(self.template_path) if self.template_path else Presentation()
+        # Custom templates may ship with sample slides; keep only masters and layouts
+        slide_ids = prs.slides._sldIdLst
+        for sld_id in list(slide_ids):
+            slide_ids.remove(sld_id)
+        prs.slide_width = px(CANVAS_WIDTH)
+        prs.slide_height = px(CANVAS_HEIGHT)
+        theme = self.color_themes.get(color_theme)
+        if theme:
+            fill = prs.slide_master.background.fill
+            fill.solid()
+            fill.fore_color.rgb = parse_color(theme["background"])
+        buffer = BytesIO()
+        prs.save(buffer)
+        return buffer.getvalue()
+
+    def build(self, slides, color_theme="blue", template=None):
+        """Build a Presentation for the given slides, optionally on a prebuilt base template"""
+        load_pptx()
+        prs = Presentation(BytesIO(template or self.template_bytes(color_theme)))
+        layout = prs.slide_layouts[min(BLANK_LAYOUT_INDEX, len(prs.slide_layouts) - 1)]
+        default_background = self.color_themes.get(color_theme, {}).get("background")
+        for slide in slides:
+            self.add_slide(prs, layout, slide, default_background)
+        return prs
+
+    def add_slide(self, prs, layout, slide, default_background=None):
+        """Render one slide dict onto a new blank slide"""
+        sld = prs.slides.add_slide(layout)
+        key = self.fragment_key(slide, default_background) if self.fragment_cache is not None else None
+        fragment = self.fragment_cache.get_bytes(key) if key else None
+        if fragment is not None:
+            # Swap the blank slide's shape tree and background for the cached ones
+            cSld = sld._element.cSld
+            cSld.getparent().replace(cSld, parse_xml(fragment))
+        else:
+            self._render(sld, slide, default_background)
+            if key:
+                self.fragment_cache.put_bytes(key, etree.tostring(sld._element.cSld))
+
+        if slide.get('notes'):
+            sld.notes_slide.notes_text_frame.text = slide['notes']
+        return sld
+
+    def fragment_key(self, slide, default_background):
+        """Cache key for a slide's rendered XML, or None if it cannot be cached"""
+        elements = slide.get('elements') or []
+        if any(element.get('type') == 'image' for element in elements):
+            # Pictures live in separate parts referenced by relationship id
+            return None
+        payload = json.dumps({
+            "v": FRAGMENT_VERSION,
+            "template": template_stamp(self.template_path),
+            "default_background": default_background,
+            "background": slide.get('background_color'),
+            "elements": elements,
+            "title": None if elements else slide.get('title'),
+            "content": None if elements else slide.get('content'),
+        }, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _render(self, sld, slide, default_background):
+        background = slide.get('background_color')
+        if background and background != default_background:
+            color = parse_color(background)
+            if color is not None:
+                sld.background.fill.solid()
+                sld.background.fill.fore_color.rgb = color
+
+        elements = slide.get('elements') or []
+        if not elements:
+            # Slides without laid-out elements still export their title and content
+            elements = [
+                {"type": "text", "content": slide.get('title', 'Slide'), "x": 50, "y": 80,
+                 "width": 700, "height": 60, "style": {"fontSize": "24px", "fontWeight": "bold"}},
+            ]
+            if slide.get('content'):
+                elements.append({"type": "text", "content": slide['content'], "x": 50, "y": 180,
+                                 "width": 700, "height": 200, "style": {"fontSize": "16px"}})
+        for element in elements:
+            self.add_element(sld, element)
+
+    def add_element(self, sld, element):
+        element_type = element.get('type')
+        style = element.get('style') or {}
+        box = (px(element.get('x', 0)), px(element.get('y', 0)),
+               px(element.get('width', 100)), px(element.get('height', 40)))
+
+        if element_type in ('text', 'bulletList'):
+            lines = style.get('listItems') if element_type == 'bulletList' else None
+            self._add_text(sld, box, lines or str(element.get('content', '')).split('\n'), style)
+        elif element_type == 'shape':
+            shape = sld.shapes.add_shape(SHAPES.get(style.get('shapeType'), MSO_SHAPE.RECTANGLE), *box)
+            color = parse_color(style.get('backgroundColor')) or parse_color('#3b82f6')
+            shape.fill.solid()
+            shape.fill.fore_color.rgb = color
+            shape.line.fill.background()
+        elif element_type == 'table':
+            self._add_table(sld, box, element.get('tableData') or style.get('tableData') or {})
+        elif element_type == 'image':
+            self._add_image(sld, box, style.get('imageUrl'))
+
+    def _add_text(self, sld, box, lines, style):
+        text_frame = sld.shapes.add_textbox(*box).text_frame
+        text_frame.word_wrap = True
+        font_size = parse_font_size(style.get('fontSize'))
+        color = parse_color(style.get('color'))
+        bold = style.get('fontWeight') in ('bold', 'bolder', '600', '700', '800', '900')
+        alignment = ALIGNMENTS.get(style.get('textAlign'))
+        try:
+            line_spacing = float(style['lineHeight']) if style.get('lineHeight') else None
+        except ValueError:
+            line_spacing = None
+
+        for index, line in enumerate(lines):
+            paragraph = text_frame.paragraphs[0] if index == 0 else text_frame.add_paragraph()
+            if alignment is not None:
+                paragraph.alignment = alignment
+            if line_spacing:
+                paragraph.line_spacing = line_spacing
+            run = paragraph.add_run()
+            run.text = line
+            run.font.size = font_size
+            run.font.bold = bold
+            if color is not None:
+                run.font.color.rgb = color
+
+    def _add_table(self, sld, box, table_data):
+        cells = table_data.get('cells') or []
+        try:
+            rows = int(table_data.get('rows') or len(cells) or 0)
+            cols = int(table_data.get('cols') or (len(cells[0]) if cells else 0))
+        except (TypeError, ValueError):
+            return
+        if rows <= 0 or cols <= 0:
+            return
+        table = sld.shapes.add_table(rows, cols, *box).table
+        for r, row in enumerate(cells[:rows]):
+            for c, value in enumerate(row[:cols]):
+                table.cell(r, c).text = str(value)
+
+    def _add_image(self, sld, box, image_url):
+        # Only inline data URLs are embedded; the server never fetches remote images
+        if not image_url or not image_url.startswith('data:image/') or ';base64,' not in image_url:
+            return
+        try:
+            data = base64.b64decode(image_url.split(';base64,', 1)[1])
+            sld.shapes.add_picture(BytesIO(data), *box)
+        except Exception as e:
+            logger.warning(f"Skipping unreadable image element: {str(e)}")
+
+    def stats(self):
+        return {"cached_templates": len(self._templates), "template_builds": self.template_builds}
+
+
+class _QueueWriter:
+    """Write-only file object that hands zip output to a consumer in chunks"""
+
+    def __init__(self, chunks, chunk_size):
+        self._chunks = chunks
+        self._chunk_size = chunk_size
+        self._buffer = bytearray()
+        self.closed_by_reader = False
+
+    def write(self, data):
+        if self.closed_by_reader:
+            raise IOError("Export stream closed by client")
+        self._buffer += data
+        if len(self._buffer) >= self._chunk_size:
+            self.flush()
+        return len(data)
+
+    def flush(self):
+        if self._buffer:
+            self._chunks.put(bytes(self._buffer))
+            self._buffer.clear()
+
+
+_DONE = object()
+
+
+def stream_presentation(prs, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield the zipped presentation in chunks while it is being written"""
+    chunks = queue.Queue(maxsize=8)
+    writer = _QueueWriter(chunks, chunk_size)
+
+    def produce():
+        try:
+            prs.save(writer)
+            writer.flush()
+        except Exception as e:
+            if not writer.closed_by_reader:
+                logger.error(f"Error streaming PPTX: {str(e)}")
+        finally:
+            chunks.put(_DONE)
+
+    thread = threading.Thread(target=produce, name='pptx-stream', daemon=True)
+    thread.start()
+    try:
+        while True:
+            chunk = chunks.get()
+            if chunk is _DONE:
+                break
+            yield chunk
+    finally:
+        # Unblock the writer if the client went away mid-download
+        writer.closed_by_reader = True
+        while thread.is_alive():
+            try:
+                chunks.get_nowait()
+            except queue.Empty:
+                thread.join(0.01)
+
+
+def render_to_file(slides, color_theme, color_themes, path, template_path=None, fragment_cache=None,
+                   template=None):
+    """Build a deck and write it to path; used by export job worker processes, which
+    get the parent's cached base template so they do not build it again"""
+    exporter = PptxExporter(color_themes, template_path=template_path, fragment_cache=fragment_cache)
+    exporter.build(slides, color_theme, template).save(path)
+    return os.path.getsize(path)
+
+
+def create_exporter(color_themes, fragment_cache=None):
+    """Build the exporter, or None when python-pptx is not installed"""
+    if not pptx_available():
+        return None
+    return PptxExporter(color_themes, template_path=os.getenv('PPTX_TEMPLATE_PATH') or None,
+                        fragment_cache=fragment_cache)
@@ -0,0 +1,370 @@
+"""
+Incremental presentation updates for PATCH /api/presentations/<id>.
+
+Two patch formats are accepted:
+
+- RFC 6902 JSON Patch against the presentation document, e.g.
+  {"op": "replace", "path": "/slides/0/elements/1/content", "value": "Hi"}
+- slide/element operations addressed by id, e.g.
+  {"op": "edit_text", "slide_id": 1, "element_id": "title_ab12", "content": "Hi"}
+
+Only the slides an edit touches are copied and validated, and only they go
+over the wire in the response. Storing the result still rewrites the whole
+presentation, as every update does. Either the whole patch applies or none
+of it does.
+"""
+
+import copy
+
+from storage import new_slide_id
+
+# Top-level presentation fields a patch may modify
+EDITABLE_FIELDS = ("slides", "prompt", "default_color_theme")
+# Editable fields that must stay strings
+STRING_FIELDS = ("prompt", "default_color_theme")
+
+
+class PatchError(ValueError):
+    """Raised when a patch is malformed or does not apply to the presentation"""
+
+
+class VersionConflict(Exception):
+    """Raised when a patch was based on an outdated presentation version"""
+
+    def __init__(self, current_version):
+        super().__init__(f"Presentation is at version {current_version}")
+        self.current_version = current_version
+
+
+class _Workspace:
+    """Copy-on-write view of a presentation's editable fields"""
+
+    def __init__(self, presentation):
+        self.root = {field: presentation.get(field) for field in EDITABLE_FIELDS}
+        self.root["slides"] = list(presentation.get("slides") or [])
+        self.original_ids = [slide.get("id") for slide in self.root["slides"]]
+        self._owned = set()  # id() of slide dicts that are private to this patch
+        self.structural = False
+        self.changed_fields = set()
+
+    @property
+    def slides(self):
+        return self.root["slides"]
+
+    def own(self, slide):
+        if not isinstance(slide, dict):
+            raise PatchError("A slide must be an object")
+        if not isinstance(slide.get("id"), int):
+            slide["id"] = new_slide_id()
+        slide.setdefault("elements", [])
+        self._owned.add(id(slide))
+        return slide
+
+    def slide_at(self, index):
+        """Writable slide at index, copied on first touch"""
+        slide = self.slides[index]
+        if id(slide) not in self._owned:
+            slide = self.own(copy.deepcopy(slide))
+            self.slides[index] = slide
+        return slide
+
+    def slide_index(self, slide_id):
+        for index, slide in enumerate(self.slides):
+            if slide.get("id") == slide_id:
+                return index
+        raise PatchError(f"Slide {slide_id} not found")
+
+    def slide(self, slide_id):
+        return self.slide_at(self.slide_index(slide_id))
+
+    def validate(self):
+        """Reject a patch that leaves a field or a touched slide with the wrong shape"""
+        for field in self.changed_fields:
+            if field in STRING_FIELDS and not isinstance(self.root[field], str):
+                raise PatchError(f"{field} must be a string")
+        for slide in self.slides:
+            if not isinstance(slide, dict):
+                raise PatchError("A slide must be an object")
+            if id(slide) in self._owned:
+                elements = slide.get("elements")
+                if not isinstance(elements, list) or not all(isinstance(e, dict) for e in elements):
+                    raise PatchError(f"Elements of slide {slide.get('id')} must be a list of objects")
+                for element in elements:
+                    if not isinstance(element.get("style", {}), dict):
+                        raise PatchError(f"Style of element {element.get('id')} must be an object")
+
+    def apply_to(self, presentation):
+        """Write the edited fields back and describe what changed"""
+        self.validate()
+        for field in self.changed_fields:
+            presentation[field] = self.root[field]
+        presentation["slides"] = self.slides
+
+        final_ids = [slide.get("id") for slide in self.slides]
+        final_set = set(final_ids)
+        changes = {
+            "changed_slides": [slide for slide in self.slides if id(slide) in self._owned],
+            "removed_slide_ids": [sid for sid in self.original_ids if sid not in final_set],
+        }
+        if self.structural or final_ids != self.original_ids:
+            changes["slide_order"] = final_ids
+        for field in self.changed_fields:
+            changes[field] = self.root[field]
+        return changes
+
+
+def _element_index(slide, element_id):
+    for index, element in enumerate(slide.get("elements", [])):
+        if element.get("id") == element_id:
+            return index
+    raise PatchError(f"Element {element_id} not found on slide {slide.get('id')}")
+
+
+def _object(value, name):
+    if not isinstance(value, dict):
+        raise PatchError(f"{name} must be an object")
+    return value
+
+
+def _number(value, name):
+    # bool is an int subclass, but true is not a coordinate
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise PatchError(f"{name} must be a number")
+    return value
+
+
+def _position(value, length, allow_end=False):
+    try:
+        index = int(value)
+    except (TypeError, ValueError):
+        raise PatchError(f"Invalid position: {value!r}")
+    upper = length if allow_end else length - 1
+    if not 0 <= index <= upper:
+        raise PatchError(f"Position {index} out of range")
+    return index
+
+
+# Slide/element operations
+
+def _op_edit_text(ws, op):
+    slide = ws.slide(op["slide_id"])
+    element = slide["elements"][_element_index(slide, op["element_id"])]
+    element["content"] = op["content"]
+
+
+def _op_move_element(ws, op):
+    slide = ws.slide(op["slide_id"])
+    element = slide["elements"][_element_index(slide, op["element_id"])]
+    for key in ("x", "y", "width", "height"):
+        if key in op:
+            element[key] = _number(op[key], key)
+
+
+def _op_update_element(ws, op):
+    slide = ws.slide(op["slide_id"])
+    element = slide["elements"][_element_index(slide, op["element_id"])]
+    changes = dict(_object(op.get("changes") or {}, "changes"))
+    changes.pop("id", None)
+    style = changes.pop("style", None)
+    element.update(changes)
+    if style is not None:
+        current = element.get("style")
+        element["style"] = {**(current if isinstance(current, dict) else {}), **_object(style, "style")}
+
+
+def _op_insert_element(ws, op):
+    slide = ws.slide(op["slide_id"])
+    element = op["element"]
+    if not isinstance(element, dict) or "id" not in element:
+        raise PatchError("insert_element needs an element with an id")
+    index = _position(op.get("index", len(slide["elements"])), len(slide["elements"]), allow_end=True)
+    slide["elements"].insert(index, element)
+
+
+def _op_delete_element(ws, op):
+    slide = ws.slide(op["slide_id"])
+    del slide["elements"][_element_index(slide, op["element_id"])]
+
+
+def _op_update_slide(ws, op):
+    slide = ws.slide(op["slide_id"])
+    changes = dict(_object(op.get("changes") or {}, "changes"))
+    changes.pop("id", None)
+    slide.update(changes)
+
+
+def _op_insert_slide(ws, op):
+    index = _position(op.get("index", len(ws.slides)), len(ws.slides), allow_end=True)
+    ws.slides.insert(index, ws.own(op["slide"]))
+    ws.structural = True
+
+
+def _op_delete_slide(ws, op):
+    del ws.slides[ws.slide_index(op["slide_id"])]
+    ws.structural = True
+
+
+def _op_move_slide(ws, op):
+    slide = ws.slides.pop(ws.slide_index(op["slide_id"]))
+    ws.slides.insert(_position(op["index"], len(ws.slides), allow_end=True), slide)
+    ws.structural = True
+
+
+OPERATIONS = {
+    "edit_text": _op_edit_text,
+    "move_element": _op_move_element,
+    "update_element": _op_update_element,
+    "insert_element": _op_insert_element,
+    "delete_element": _op_delete_element,
+    "update_slide": _op_update_slide,
+    "insert_slide": _op_insert_slide,
+    "delete_slide": _op_delete_slide,
+    "move_slide": _op_move_slide,
+}
+
+
+def apply_operations(presentation, operations):
+    """Apply a slide/element operation list in place and return the changed parts"""
+    if not isinstance(operations, list):
+        raise PatchError("operations must be a list")
+    ws = _Workspace(presentation)
+    for op in operations:
+        handler = OPERATIONS.get(op.get("op")) if isinstance(op, dict) else None
+        if handler is None:
+            raise PatchError(f"Unknown operation: {op!r}")
+        try:
+            handler(ws, op)
+        except KeyError as e:
+            raise PatchError(f"Operation {op['op']} is missing {e}")
+        except (TypeError, AttributeError) as e:
+            # A value of the wrong type somewhere in the operation or the slide it targets
+            raise PatchError(f"Operation {op['op']} does not apply: {str(e)}")
+    return ws.apply_to(presentation)
+
+
+# RFC 6902 JSON Patch
+
+def _parse_pointer(pointer):
+    if not isinstance(pointer, str) or not pointer.startswith("/"):
+        raise PatchError(f"Invalid JSON pointer: {pointer!r}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def _child(container, token):
+    try:
+        if isinstance(container, list):
+            return container[_position(token, len(container))]
+        return container[token]
+    except (KeyError, TypeError):
+        raise PatchError(f"Path segment {token!r} not found")
+
+
+def _resolve(ws, tokens):
+    """Return (container, key) for a pointer, copying the touched slide on the way"""
+    if not tokens or tokens[0] not in EDITABLE_FIELDS:
+        raise PatchError(f"Only {', '.join(EDITABLE_FIELDS)} can be patched")
+    if tokens[0] == "slides" and len(tokens) >= 3:
+        container = ws.slide_at(_position(tokens[1], len(ws.slides)))
+        rest = tokens[2:]
+    else:
+        if tokens[0] == "slides":
+            ws.structural = True
+        else:
+            ws.changed_fields.add(tokens[0])
+        container = ws.root
+        rest = tokens
+    for token in rest[:-1]:
+        container = _child(container, token)
+    return container, rest[-1]
+
+
+def _lookup(ws, tokens):
+    """Read the value at a pointer without copying anything"""
+    if not tokens or tokens[0] not in EDITABLE_FIELDS:
+        raise PatchError(f"Only {', '.join(EDITABLE_FIELDS)} can be patched")
+    value = ws.root
+    for token in tokens:
+        value = _child(value, token)
+    return value
+
+
+def _set_field(ws, container, key, value):
+    if container is ws.root and key == "slides":
+        if not isinstance(value, list):
+            raise PatchError("slides must be a list")
+        value = [ws.own(slide) for slide in value]
+    container[key] = value
+
+
+def _add(ws, tokens, value):
+    container, key = _resolve(ws, tokens)
+    if isinstance(container, list):
+        if container is ws.slides:
+            value = ws.own(value)
+        index = len(container) if key == "-" else _position(key, len(container), allow_end=True)
+        container.insert(index, value)
+    elif isinstance(container, dict):
+        _set_field(ws, container, key, value)
+    else:
+        raise PatchError("Cannot add into a scalar value")
+
+
+def _replace(ws, tokens, value):
+    container, key = _resolve(ws, tokens)
+    if isinstance(container, list):
+        if container is ws.slides:
+            value = ws.own(value)
+        container[_position(key, len(container))] = value
+    elif isinstance(container, dict) and (key in container or container is ws.root):
+        _set_field(ws, container, key, value)
+    else:
+        raise PatchError(f"Path segment {key!r} not found")
+
+
+def _remove(ws, tokens):
+    container, key = _resolve(ws, tokens)
+    if container is ws.root:
+        raise PatchError(f"Cannot remove {key}")
+    if isinstance(container, list):
+        return container.pop(_position(key, len(container)))
+    if isinstance(container, dict) and key in container:
+        return container.pop(key)
+    raise PatchError(f"Path segment {key!r} not found")
+
+
+def apply_json_patch(presentation, patch):
+    """Apply an RFC 6902 JSON Patch in place and return the changed parts"""
+    if not isinstance(patch, list):
+        raise PatchError("A JSON Patch must be a list of operations")
+    ws = _Workspace(presentation)
+    for op in patch:
+        if not isinstance(op, dict):
+            raise PatchError(f"Invalid JSON Patch operation: {op!r}")
+        name = op.get("op")
+        tokens = _parse_pointer(op.get("path"))
+        try:
+            if name == "add":
+                _add(ws, tokens, op["value"])
+            elif name == "remove":
+                _remove(ws, tokens)
+            elif name == "replace":
+                _replace(ws, tokens, op["value"])
+            elif name == "move":
+                value = _remove(ws, _parse_pointer(op["from"]))
+                _add(ws, tokens, value)
+            elif name == "copy":
+                value = copy.deepcopy(_lookup(ws, _parse_pointer(op["from"])))
+                if tokens[0] == "slides" and len(tokens) == 2 and isinstance(value, dict):
+                    # A copied slide is a new slide and needs its own id
+                    value.pop("id", None)
+                _add(ws, tokens, value)
+            elif name == "test":
+                if _lookup(ws, tokens) != op["value"]:
+                    raise PatchError(f"Test failed at {op['path']}")
+            else:
+                raise PatchError(f"Unknown JSON Patch operation: {name!r}")
+        except KeyError as e:
+            raise PatchError(f"JSON Patch operation {name} is missing {e}")
+        except (TypeError, AttributeError) as e:
+            raise PatchError(f"JSON Patch operation {name} does not apply: {str(e)}")
+    return ws.apply_to(presentation)
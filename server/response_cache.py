@@ -0,0 +1,298 @@
+"""
+Response cache for AI slide generation.
+
+Entries are keyed on the normalized prompt plus the model name, so repeat
+prompts ("Marketing strategy", "Team meeting", ...) skip the LLM entirely.
+Two backends are available:
+
+- MemoryCacheBackend: in-process OrderedDict, fastest, lost on restart
+- SQLiteCacheBackend: on-disk store that survives restarts
+
+Both support LRU eviction, TTL expiry and a size budget in bytes.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt):
+    """Normalize a prompt so trivially different spellings share a cache entry"""
+    return _WHITESPACE_RE.sub(" ", (prompt or "").strip().lower())
+
+
+def make_cache_key(prompt, model_name):
+    """Build a content-addressed key from the normalized prompt and model name"""
+    raw = f"{model_name}\x00{normalize_prompt(prompt)}".encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+class MemoryCacheBackend:
+    """In-process LRU store with TTL and byte budget"""
+
+    name = "memory"
+
+    def __init__(self, max_entries=1024, max_bytes=16 * 1024 * 1024, ttl=3600):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (value_bytes, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= now:
+                self._remove(key)
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        size = len(value)
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires_at)
+            self._bytes += size
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def reopen(self):
+        pass
+
+    def _remove(self, key):
+        value, _ = self._entries.pop(key)
+        self._bytes -= len(value)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class SQLiteCacheBackend:
+    """On-disk LRU store with TTL and byte budget that survives restarts"""
+
+    name = "sqlite"
+
+    def __init__(self, path, max_entries=10000, max_bytes=64 * 1024 * 1024, ttl=86400):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+        self._conn = self._connect()
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS response_cache (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_response_cache_last_access "
+            "ON response_cache (last_access)"
+        )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def reopen(self):
+        """Open a fresh connection in a forked child; the inherited one is left untouched"""
+        self._inherited = self._conn
+        self._conn = self._connect()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM response_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                self._conn.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+                self.expirations += 1
+                return None
+            self._conn.execute(
+                "UPDATE response_cache SET last_access = ? WHERE key = ?", (now, key)
+            )
+            return bytes(value)
+
+    def set(self, key, value):
+        size = len(value)
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO response_cache "
+                "(key, value, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, sqlite3.Binary(value), size, expires_at, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now):
+        expired = self._conn.execute(
+            "DELETE FROM response_cache WHERE expires_at IS NOT NULL AND expires_at <= ?",
+            (now,),
+        ).rowcount
+        self.expirations += max(expired, 0)
+        count, total = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM response_cache"
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        # Walk least-recently-used rows until both budgets are satisfied
+        victims = []
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM response_cache ORDER BY last_access ASC"
+        ):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            victims.append((key,))
+            count -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM response_cache WHERE key = ?", victims)
+        self.evictions += len(victims)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM response_cache")
+
+    def stats(self):
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM response_cache"
+            ).fetchone()
+        return {
+            "entries": count,
+            "bytes": total,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class ResponseCache:
+    """Content-addressed cache of parsed AI responses with hit/miss counters"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return a fresh copy of the cached response, or None on a miss"""
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, response):
+        self.backend.set(key, json.dumps(response, separators=(",", ":")).encode("utf-8"))
+
+    def clear(self):
+        self.backend.clear()
+
+    def reopen(self):
+        self.backend.reopen()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        stats = {
+            "enabled": True,
+            "backend": self.backend.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+        stats.update(self.backend.stats())
+        return stats
+
+
+class NullResponseCache:
+    """Cache stand-in used when caching is disabled"""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, response):
+        pass
+
+    def clear(self):
+        pass
+
+    def reopen(self):
+        pass
+
+    def stats(self):
+        return {"enabled": False}
+
+
+def create_response_cache_from_env():
+    """Build the response cache configured by RESPONSE_CACHE_* environment variables"""
+    backend_name = os.getenv("RESPONSE_CACHE_BACKEND", "memory").lower()
+    ttl = int(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+    max_entries = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+    max_bytes = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+
+    if backend_name in ("none", "off", "disabled"):
+        logger.info("Response cache disabled")
+        return NullResponseCache()
+    if backend_name == "sqlite":
+        path = os.getenv("RESPONSE_CACHE_PATH", "response_cache.sqlite3")
+        backend = SQLiteCacheBackend(path, max_entries=max_entries, max_bytes=max_bytes, ttl=ttl)
+    else:
+        backend = MemoryCacheBackend(max_entries=max_entries, max_bytes=max_bytes, ttl=ttl)
+    logger.info(f"Response cache enabled ({backend.name} backend)")
+    return ResponseCache(backend)
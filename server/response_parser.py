@@ -0,0 +1,422 @@
+"""
+Structured-output parsing for model responses.
+
+Models do not reliably return bare JSON. Typical shapes are markdown code
+fences, a sentence of prose before or after the object, single quotes,
+trailing commas, Python literals (True/None), unquoted keys, smart quotes,
+and output truncated mid-object. parse_slide_response() handles them in
+order of cost:
+
+1. json.loads on the whole text (the common, cheap case)
+2. the body of the first code fence
+3. the first balanced {...} found in the text
+4. a single-pass repair of that candidate (quotes, literals, trailing
+   commas, comments, unclosed strings and brackets)
+5. the plain-text scanner for responses that contain no JSON at all
+
+Whatever JSON comes out is normalized by a validator compiled once from
+SLIDE_SCHEMA: key aliases are mapped, values are coerced to the right types,
+and enum fields fall back to their defaults.
+"""
+
+import json
+import re
+import threading
+
+DESIGN_THEMES = ("professional", "creative", "modern", "minimal")
+LAYOUT_TYPES = ("title-content", "two-column", "image-text", "bullet-list")
+
+KEY_ALIASES = {
+    "heading": "title",
+    "slide_title": "title",
+    "summary": "content",
+    "body": "content",
+    "description": "content",
+    "bullets": "bullet_points",
+    "bulletpoints": "bullet_points",
+    "bullet_point": "bullet_points",
+    "points": "bullet_points",
+    "key_points": "bullet_points",
+    "theme": "design_theme",
+    "designtheme": "design_theme",
+    "layout": "layout_type",
+    "layouttype": "layout_type",
+}
+
+_FENCE_RE = re.compile(r"```[ \t]*([A-Za-z0-9_-]*)[ \t]*\n?(.*?)(?:```|$)", re.S)
+_IDENTIFIER_RE = re.compile(r"(?:[^\W\d]|\$)[\w$-]*")
+_BULLET_PREFIX_RE = re.compile(r"^\s*(?:[-*•●▪◦‣]+|\d+[.)]|[a-zA-Z][.)](?=\s))\s*")
+_HEADING_RE = re.compile(r"^\s*(?:#+\s*|(?:slide\s+)?title\s*:\s*)", re.I)
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "„": '"', "″": '"'})
+_LITERALS = {"true": "true", "True": "true", "false": "false", "False": "false",
+             "null": "null", "None": "null", "undefined": "null", "NaN": "null"}
+
+
+# Extraction
+
+def strip_code_fences(text):
+    """Body of the first code fence that looks like JSON, or the text unchanged"""
+    if "```" not in text:
+        return text
+    for match in _FENCE_RE.finditer(text):
+        body = match.group(2).strip()
+        if body[:1] in ("{", "[") or (body and match.group(1).lower() == "json"):
+            return body
+    return text
+
+
+def extract_balanced(text, opener="{"):
+    """The first balanced JSON object (or array) in text, or the unterminated tail if it never closes"""
+    closer = "}" if opener == "{" else "]"
+    start = text.find(opener)
+    if start < 0:
+        return None
+    depth = 0
+    in_string = None
+    escaped = False
+    for index in range(start, len(text)):
+        ch = text[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == in_string:
+                in_string = None
+        elif ch in "\"'":
+            in_string = ch
+        elif ch == opener:
+            depth += 1
+        elif ch == closer:
+            depth -= 1
+            if depth == 0:
+                return text[start:index + 1]
+    return text[start:]
+
+
+# Repair
+
+def repair_json(text):
+    """Best-effort conversion of almost-JSON into JSON text"""
+    text = text.translate(_SMART_QUOTES)
+    out = []
+    stack = []
+    checkpoints = []  # (output length, open brackets) after each top-level-safe comma
+    in_string = None
+    index = 0
+    length = len(text)
+
+    while index < length:
+        ch = text[index]
+        if in_string:
+            if ch == "\\" and index + 1 < length:
+                nxt = text[index + 1]
+                out.append("'" if nxt == "'" else ch + nxt)
+                index += 2
+                continue
+            if ch == in_string:
+                out.append('"')
+                in_string = None
+            elif ch == '"':
+                out.append('\\"')
+            elif ch == "\n":
+                out.append("\\n")
+            elif ch == "\t":
+                out.append("\\t")
+            else:
+                out.append(ch)
+            index += 1
+            continue
+
+        if ch in "\"'":
+            in_string = ch
+            out.append('"')
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+            out.append(ch)
+        elif ch in "}]":
+            _drop_trailing_comma(out)
+            if stack and stack[-1] == ch:
+                stack.pop()
+                out.append(ch)
+                if not stack:
+                    break
+        elif ch == ",":
+            _drop_trailing_comma(out)
+            out.append(",")
+            checkpoints.append((len(out) - 1, list(stack)))
+        elif ch == "/" and text.startswith("//", index):
+            newline = text.find("\n", index)
+            index = length if newline < 0 else newline
+            continue
+        elif ch == "/" and text.startswith("/*", index):
+            end = text.find("*/", index + 2)
+            index = length if end < 0 else end + 2
+            continue
+        elif ch.isalpha() or ch in "_$":
+            match = _IDENTIFIER_RE.match(text, index)
+            if match is None:
+                # Letters \w does not cover, such as some combining marks
+                out.append(ch)
+                index += 1
+                continue
+            word = match.group(0)
+            index += len(word)
+            if word in _LITERALS:
+                out.append(_LITERALS[word])
+            else:
+                # An unquoted key or bare-word value
+                out.append(json.dumps(word))
+            continue
+        else:
+            out.append(ch)
+        index += 1
+
+    if in_string:
+        out.append('"')
+    candidate = _close("".join(out), stack)
+    try:
+        json.loads(candidate)
+        return candidate
+    except ValueError:
+        pass
+    # Truncated mid key or value: cut back to an earlier comma and close from there
+    for position, open_brackets in reversed(checkpoints[-4:]):
+        trimmed = _close("".join(out[:position]), open_brackets)
+        try:
+            json.loads(trimmed)
+            return trimmed
+        except ValueError:
+            continue
+    return candidate
+
+
+def _drop_trailing_comma(out):
+    index = len(out) - 1
+    while index >= 0 and out[index].isspace():
+        index -= 1
+    if index >= 0 and out[index] == ",":
+        del out[index:]
+
+
+def _close(text, stack):
+    text = text.rstrip()
+    if text.endswith(","):
+        text = text[:-1]
+    if text.endswith(":"):
+        text += " null"
+    return text + "".join(reversed(stack))
+
+
+def parse_json_value(text, opener="{"):
+    """Parse the first JSON object (or array) in model output; returns (value, method) or (None, None)"""
+    text = text.strip()
+    try:
+        return json.loads(text), "json"
+    except ValueError:
+        pass
+
+    body = strip_code_fences(text)
+    if body is not text:
+        try:
+            return json.loads(body), "fenced"
+        except ValueError:
+            pass
+
+    candidate = extract_balanced(body, opener)
+    if candidate is None:
+        return None, None
+    try:
+        return json.loads(candidate), "extracted"
+    except ValueError:
+        pass
+    try:
+        return json.loads(repair_json(candidate)), "repaired"
+    except ValueError:
+        return None, None
+
+
+# Validation
+
+def _as_text(value):
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, (list, tuple)):
+        return " ".join(_as_text(item) for item in value if item is not None).strip()
+    if isinstance(value, dict):
+        return _as_text(list(value.values()))
+    return "" if value is None else str(value)
+
+
+def _as_text_list(value):
+    if isinstance(value, str):
+        items = value.splitlines() if "\n" in value else [value]
+    elif isinstance(value, dict):
+        items = list(value.values())
+    elif isinstance(value, (list, tuple)):
+        items = value
+    else:
+        items = [] if value is None else [value]
+    cleaned = []
+    for item in items:
+        if isinstance(item, dict):
+            item = item.get("text") or item.get("point") or item.get("title") or _as_text(item)
+        text = _BULLET_PREFIX_RE.sub("", _as_text(item))
+        if text:
+            cleaned.append(text)
+    return cleaned
+
+
+def _enum(choices, default):
+    def coerce(value):
+        text = _as_text(value).lower().replace("_", "-").replace(" ", "-")
+        return text if text in choices else default
+    return coerce
+
+
+SLIDE_SCHEMA = {
+    "title": {"coerce": _as_text, "required": True},
+    "content": {"coerce": _as_text, "required": True},
+    "bullet_points": {"coerce": _as_text_list, "required": True},
+    "design_theme": {"coerce": _enum(DESIGN_THEMES, "professional"), "default": "professional"},
+    "layout_type": {"coerce": _enum(LAYOUT_TYPES, "bullet-list"), "default": "bullet-list"},
+}
+
+
+def compile_validator(schema, aliases):
+    """Turn a schema into a single validate(obj) -> (clean, missing_fields) function"""
+    fields = tuple((name, spec["coerce"], spec.get("required", False), spec.get("default"))
+                   for name, spec in schema.items())
+    alias_lookup = dict(aliases)
+
+    def validate(obj):
+        clean = {}
+        for key, value in obj.items():
+            name = str(key).strip()
+            lowered = name.lower().replace(" ", "_")
+            name = lowered if lowered in schema else alias_lookup.get(lowered.replace("_", ""),
+                                                                       alias_lookup.get(lowered, name))
+            if name not in clean:
+                clean[name] = value
+        missing = []
+        for name, coerce, required, default in fields:
+            value = coerce(clean[name]) if name in clean else None
+            if not value:
+                if required:
+                    missing.append(name)
+                value = default if default is not None else value
+            clean[name] = value
+        return clean, missing
+
+    return validate
+
+
+validate_slide = compile_validator(SLIDE_SCHEMA, KEY_ALIASES)
+
+
+# Plain-text fallback
+
+def parse_text_response(text, original_prompt):
+    """Parse a response without usable JSON into the slide format"""
+    lines = [line.strip() for line in text.strip().splitlines()]
+
+    title = f"Presentation: {original_prompt}"
+    for line in lines[:3]:
+        if line and not _BULLET_PREFIX_RE.match(line) and not line.startswith("```"):
+            title = _HEADING_RE.sub("", line).strip("*_ ") or title
+            break
+
+    bullet_points = [_BULLET_PREFIX_RE.sub("", line).strip("*_ ")
+                     for line in lines if line and _BULLET_PREFIX_RE.match(line)]
+    bullet_points = [point for point in bullet_points if point]
+    if not bullet_points:
+        bullet_points = [
+            "Key insight from your request",
+            "Important details to highlight",
+            "Action items or next steps"
+        ]
+
+    return {
+        "title": title,
+        "content": f"This slide covers: {original_prompt}",
+        "bullet_points": bullet_points[:5],
+        "design_theme": "professional",
+        "layout_type": "bullet-list"
+    }
+
+
+# Entry point
+
+class ParserStats:
+    """How responses were parsed, for /api/health"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.methods = {}
+        self.missing_fields = 0
+
+    def record(self, method, missing):
+        with self._lock:
+            self.methods[method] = self.methods.get(method, 0) + 1
+            if missing:
+                self.missing_fields += 1
+
+    def stats(self):
+        with self._lock:
+            total = sum(self.methods.values())
+            structured = total - self.methods.get("text", 0)
+            return {
+                "parsed": total,
+                "methods": dict(self.methods),
+                "structured_ratio": round(structured / total, 4) if total else 0.0,
+                "missing_fields": self.missing_fields,
+            }
+
+
+parser_stats = ParserStats()
+
+
+def _unwrap(value):
+    """Accept {"slide": {...}}, {"slides": [{...}]} and [{...}] wrappers"""
+    if isinstance(value, list):
+        value = next((item for item in value if isinstance(item, dict)), None)
+    if isinstance(value, dict):
+        for key in ("slide", "slides", "data", "response"):
+            inner = value.get(key)
+            if isinstance(inner, list):
+                inner = next((item for item in inner if isinstance(item, dict)), None)
+            if isinstance(inner, dict) and "title" not in value:
+                return inner
+    return value if isinstance(value, dict) else None
+
+
+def parse_slide_response(text, prompt):
+    """Parse model output into the AI response dict used to build slides"""
+    value, method = parse_json_value(text or "")
+    slide = _unwrap(value)
+    if slide is None:
+        parser_stats.record("text", False)
+        return parse_text_response(text or "", prompt)
+
+    slide, missing = validate_slide(slide)
+    if not slide["title"]:
+        slide["title"] = f"Presentation: {prompt}"
+    if not slide["content"]:
+        slide["content"] = f"This slide covers: {prompt}"
+    if not slide["bullet_points"]:
+        slide["bullet_points"] = []
+    parser_stats.record(method, missing)
+    return slide
+
+
+def parse_outline_response(text):
+    """Parse a list of slide titles from model output, or return None"""
+    value, _ = parse_json_value(text or "", opener="[")
+    if value is None:
+        value, _ = parse_json_value(text or "")
+    if isinstance(value, dict):
+        value = value.get("outline") or value.get("slides") or value.get("titles")
+    if not isinstance(value, list):
+        return None
+    return [title for title in (_as_text(item.get("title") if isinstance(item, dict) else item)
+                                for item in value) if title]
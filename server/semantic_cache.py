@@ -0,0 +1,252 @@
+"""
+Prompt-similarity layer in front of the response cache.
+
+The response cache only matches prompts that normalize to the same text, so
+"ML basics" and "machine learning basics" each cost a model call. This index
+embeds every prompt whose response was cached and, on an exact-cache miss,
+looks for a previous prompt that means the same thing. The cached response
+of that prompt is then served instead of calling the model.
+
+Embeddings are hashed n-gram vectors, so there is no model to load and no
+extra dependency: prompts are lowercased, common abbreviations are expanded,
+filler words ("create a slide about ...") are dropped, and word, word-pair
+and character-trigram features are hashed into a sparse, L2-normalized
+vector. An inverted index from words to entries picks the few prompts that
+share the most words with the query, and only those are scored exactly, so
+lookups do not scan the whole index.
+
+A match needs cosine similarity >= threshold and the same numbers in both
+prompts ("5 tips" never matches "10 tips"). The index only stores vectors and
+response cache keys; responses stay in the response cache, and entries whose
+response has been evicted there are dropped on the next lookup. Memory is
+bounded by max_entries (LRU) and max_features per prompt.
+"""
+
+import logging
+import math
+import os
+import re
+import threading
+import zlib
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[+#]+|(?:'[a-z]+))?")
+
+ABBREVIATIONS = {
+    "ai": "artificial intelligence",
+    "ml": "machine learning",
+    "dl": "deep learning",
+    "nlp": "natural language processing",
+    "llm": "large language model",
+    "llms": "large language models",
+    "ui": "user interface",
+    "ux": "user experience",
+    "hr": "human resources",
+    "kpi": "key performance indicator",
+    "kpis": "key performance indicators",
+    "roi": "return on investment",
+    "b2b": "business to business",
+    "b2c": "business to consumer",
+    "saas": "software as a service",
+    "iot": "internet of things",
+    "ar": "augmented reality",
+    "vr": "virtual reality",
+    "devops": "development operations",
+    "esg": "environmental social governance",
+    "q&a": "questions and answers",
+    "intro": "introduction",
+    "mgmt": "management",
+    "dev": "development",
+}
+
+FILLER_WORDS = frozenset("""
+a an the and or of to in on for about with into by at from as is are be this that these those
+please how can could would you me my our i we us create make generate build write give show need want
+slide slides presentation presentations deck pitch talk overview some
+""".split())
+
+
+def _stem(token):
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def prompt_tokens(prompt):
+    """Content words of a prompt after abbreviation expansion and filler removal"""
+    tokens = []
+    for token in _TOKEN_RE.findall((prompt or "").lower()):
+        for word in ABBREVIATIONS.get(token, token).split():
+            if word not in FILLER_WORDS:
+                tokens.append(_stem(word))
+    return tokens
+
+
+def embed(tokens, max_features=64):
+    """Sparse, L2-normalized hashed n-gram vector as {feature: weight}"""
+    weights = {}
+
+    def add(feature, weight):
+        bucket = zlib.crc32(feature.encode("utf-8"))
+        weights[bucket] = weights.get(bucket, 0.0) + weight
+
+    for index, token in enumerate(tokens):
+        add("w:" + token, 1.0)
+        if index:
+            add("b:" + tokens[index - 1] + " " + token, 0.5)
+        padded = f"#{token}#"
+        grams = [padded[i:i + 3] for i in range(len(padded) - 2)]
+        for gram in grams:
+            add("c:" + gram, 0.6 / len(grams))
+    if len(weights) > max_features:
+        weights = dict(sorted(weights.items(), key=lambda item: -item[1])[:max_features])
+    norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+    return {feature: weight / norm for feature, weight in weights.items()} if norm else {}
+
+
+def _numbers(tokens):
+    return frozenset(token for token in tokens if any(ch.isdigit() for ch in token))
+
+
+class SemanticCache:
+    """Bounded nearest-prompt index that maps a new prompt to a cached response key"""
+
+    def __init__(self, threshold=0.85, max_entries=4096, max_features=64, max_candidates=32):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.max_features = max_features
+        self.max_candidates = max_candidates
+        self._entries = OrderedDict()  # cache key -> (vector, words, numbers)
+        self._postings = {}  # word -> cache keys of prompts containing it
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale = 0
+
+    def _vectorize(self, prompt):
+        tokens = prompt_tokens(prompt)
+        return embed(tokens, self.max_features), frozenset(tokens), _numbers(tokens)
+
+    def nearest(self, prompt):
+        """(cache key, similarity) of the most similar indexed prompt, or (None, 0.0)"""
+        vector, words, numbers = self._vectorize(prompt)
+        if not vector:
+            return None, 0.0
+        with self._lock:
+            # Rank entries by shared words through the inverted index, then score the best few exactly
+            overlap = {}
+            for word in words:
+                for key in self._postings.get(word, ()):
+                    overlap[key] = overlap.get(key, 0) + 1
+            candidates = sorted(overlap, key=overlap.get, reverse=True)[:self.max_candidates]
+            best_key, best_score = None, 0.0
+            for key in candidates:
+                other, _, other_numbers = self._entries[key]
+                if other_numbers != numbers:
+                    continue
+                score = sum(weight * other.get(feature, 0.0) for feature, weight in vector.items())
+                if score > best_score:
+                    best_key, best_score = key, score
+        return best_key, best_score
+
+    def lookup(self, prompt):
+        """Cache key of a previous prompt similar enough to this one, or None"""
+        key, score = self.nearest(prompt)
+        with self._lock:
+            if key is None or score < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        logger.debug(f"Semantic cache hit ({score:.3f}) for prompt: {prompt[:80]}")
+        return key
+
+    def add(self, prompt, key):
+        """Index a prompt whose response was stored under key"""
+        vector, words, numbers = self._vectorize(prompt)
+        if not vector:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (vector, words, numbers)
+            for word in words:
+                self._postings.setdefault(word, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def discard(self, key):
+        """Forget a key whose response is no longer in the response cache"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                self.stale += 1
+
+    def _remove(self, key):
+        _, words, _ = self._entries.pop(key)
+        for word in words:
+            postings = self._postings.get(word)
+            if postings is not None:
+                postings.discard(key)
+                if not postings:
+                    del self._postings[word]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._postings.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": True,
+                "threshold": self.threshold,
+                "entries": len(self._entries),
+                "words": len(self._postings),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "stale": self.stale,
+            }
+
+
+class NullSemanticCache:
+    """Stand-in used when similarity matching is disabled"""
+
+    def lookup(self, prompt):
+        return None
+
+    def add(self, prompt, key):
+        pass
+
+    def discard(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+    def stats(self):
+        return {"enabled": False}
+
+
+def create_semantic_cache_from_env():
+    """Build the similarity index configured by SEMANTIC_CACHE_* environment variables"""
+    if os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() not in ("1", "true", "yes", "on"):
+        return NullSemanticCache()
+    cache = SemanticCache(
+        threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.85")),
+        max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "4096")),
+        max_features=int(os.getenv("SEMANTIC_CACHE_MAX_FEATURES", "64")),
+        max_candidates=int(os.getenv("SEMANTIC_CACHE_MAX_CANDIDATES", "32")),
+    )
+    logger.info(f"Semantic cache enabled (threshold {cache.threshold})")
+    return cache
@@ -1,41 +1,99 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, Response, send_file, stream_with_context
 from flask_cors import CORS
-import google.generativeai as genai
 import json
+import copy
+import base64
+import hashlib
+import asyncio
+import contextvars
 import uuid
 import os
+import threading
+import time
 from datetime import datetime
 import logging
-from dotenv import load_dotenv
-from io import BytesIO
-try:
-    from pptx import Presentation
-except ImportError:
-    Presentation = None
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from response_cache import create_response_cache_from_env, make_cache_key, normalize_prompt
+from semantic_cache import create_semantic_cache_from_env
+from conversation_store import create_conversation_store_from_env, follow_up_subject
+from intent_router import create_intent_router_from_env
+from single_flight import SingleFlight
+from llm_client import UpstreamUnavailable, create_llm_client_from_env
+from model_providers import create_model_provider_from_env
+from slide_stream import IncrementalSlideParser, sse_event
+from storage import SUMMARY_FIELDS, create_repository_from_env, new_slide_id
+from themes import ThemeError, create_theme_registry_from_env
+from json_provider import COMPRESSION_ENABLED, FastJSONProvider, compress_response
+from instrumentation import instrumentation, stage, timed
+from response_parser import parse_outline_response, parse_slide_response, parser_stats
+from presentation_patch import PatchError, VersionConflict, apply_json_patch, apply_operations
+from pptx_export import PPTX_MIMETYPE, create_exporter, stream_presentation
+from export_cache import cache_stream, create_export_caches_from_env
+from export_jobs import COMPLETED, create_export_jobs_from_env
+from thumbnails import FORMATS as THUMBNAIL_FORMATS, create_thumbnail_service_from_env
+
+def load_env_file():
+    """Load the nearest .env file; python-dotenv is only imported when there is one"""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    while True:
+        path = os.path.join(directory, '.env')
+        if os.path.isfile(path):
+            from dotenv import load_dotenv
+            load_dotenv(path)
+            return
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return
+        directory = parent
 
 # Load environment variables
-load_dotenv()
+load_env_file()
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 CORS(app)
+instrumentation.init_app(app)
+
+@app.after_request
+def compress(response):
+    """Compress large JSON responses for clients that accept it"""
+    return compress_response(response, request.headers.get('Accept-Encoding'))
 
-# Configure Gemini AI
+# Configure the model provider (MODEL_PROVIDER=gemini|stub); the SDK is imported on first use
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel('gemini-pro')
-    logger.info("✅ Gemini AI configured successfully")
+GEMINI_MODEL_NAME = os.getenv('GEMINI_MODEL_NAME', 'gemini-pro')
+model = create_model_provider_from_env()
+if model:
+    logger.info(f"✅ Model provider configured: {model.name} ({model.model_name})")
 else:
     logger.warning("⚠️ GEMINI_API_KEY not found in environment variables")
-    model = None
+MODEL_NAME = model.model_name if model else GEMINI_MODEL_NAME
+
+# Concurrency limit, rate shaping, deadlines, retries and circuit breaker for model calls
+llm_client = create_llm_client_from_env(model, GEMINI_API_KEY) if model else None
+
+# Cache of parsed AI responses keyed on normalized prompt + model name
+response_cache = create_response_cache_from_env()
+
+# Serves the cached response of a previous, similar prompt on an exact-cache miss
+semantic_cache = create_semantic_cache_from_env()
+
+# Coalesces concurrent generations of the same prompt into one upstream call
+single_flight = SingleFlight()
+
+# Bounded pool the async serving mode uses to await blocking model calls
+LLM_EXECUTOR_WORKERS = int(os.getenv('LLM_EXECUTOR_WORKERS', '256'))
+llm_executor = ThreadPoolExecutor(max_workers=LLM_EXECUTOR_WORKERS, thread_name_prefix='llm')
+
+# Presentation storage (STORAGE_BACKEND=memory|sqlite)
+presentation_store = create_repository_from_env()
 
-# In-memory storage for demo (use database in production)
-presentations = {}
-conversations = {}
+# Rolling per-conversation context (topic, slides so far, recent turns) for follow-ups
+conversation_store = create_conversation_store_from_env()
 
 # Color themes mapping
 COLOR_THEMES = {
@@ -97,14 +155,19 @@ COLOR_THEMES = {
     }
 }
 
-def generate_with_gemini(prompt):
-    """Generate content using Gemini AI"""
-    if not model:
-        logger.warning("Gemini model not available, using fallback")
-        return generate_fallback_content(prompt)
-    try:
-        enhanced_prompt = f"""
+# Precomputed per-role style tables for every theme, plus custom themes
+theme_registry = create_theme_registry_from_env(COLOR_THEMES)
+
+def build_slide_prompt(prompt, context=None):
+    """Wrap a user request, and any conversation context, in the slide generation instructions"""
+    if context:
+        context = "\n        ".join(
+            ["This slide continues an ongoing presentation. Do not repeat its existing slides."]
+            + context.split("\n")
+        )
+    return f"""
         Create a professional presentation slide based on this request: \"{prompt}\"
+        {context or ""}
         Respond with a JSON object containing:
         - title: A clear, engaging slide title
         - content: Main content summary (2-3 sentences)
@@ -113,47 +176,77 @@ def generate_with_gemini(prompt):
         - layout_type: Suggested layout (title-content, two-column, image-text, bullet-list)
         Keep the response concise and professional.
         """
-        response = model.generate_content(enhanced_prompt)
-        try:
-            return json.loads(response.text)
-        except json.JSONDecodeError:
-            return parse_text_response(response.text, prompt)
+
+@timed("parse")
+def parse_model_text(text, prompt):
+    """Parse raw model output into a structured AI response"""
+    return parse_slide_response(text, prompt)
+
+def generation_cache_key(prompt, context=None):
+    """Response cache key of a prompt, scoped to its conversation context"""
+    return make_cache_key(f"{context}\n{prompt}" if context else prompt, MODEL_NAME)
+
+def get_cached_response(prompt, cache_key, similar=True):
+    """Cached response for this prompt, or for a similar earlier prompt"""
+    cached = response_cache.get(cache_key)
+    if cached is not None or not similar:
+        return cached
+    similar_key = semantic_cache.lookup(prompt)
+    if similar_key is None:
+        return None
+    cached = response_cache.get(similar_key)
+    if cached is None:
+        semantic_cache.discard(similar_key)
+    return cached
+
+def cache_response(prompt, cache_key, ai_response, similar=True):
+    """Store a parsed response and index its prompt for similarity lookups"""
+    response_cache.set(cache_key, ai_response)
+    if similar:
+        semantic_cache.add(prompt, cache_key)
+
+def generate_with_gemini(prompt, context=None):
+    """Generate content using Gemini AI"""
+    if not model:
+        logger.warning("Gemini model not available, using fallback")
+        return generate_fallback_content(prompt)
+    # Follow-ups only match their own conversation, never a similar prompt from another one
+    cache_key = generation_cache_key(prompt, context)
+    cached = get_cached_response(prompt, cache_key, similar=not context)
+    if cached is not None:
+        return cached
+    # Identical prompts arriving together share one upstream call
+    ai_response, shared = single_flight.do(
+        cache_key,
+        lambda: _generate_uncached(prompt, cache_key, context),
+        label=normalize_prompt(prompt)
+    )
+    return copy.deepcopy(ai_response) if shared else ai_response
+
+async def generate_with_gemini_async(prompt, context=None):
+    """Await Gemini generation without blocking the event loop"""
+    # The cache lookup (SQLite backend, semantic index) and the SDK call both block,
+    # so the whole generation runs on a bounded executor the loop can await; the
+    # copied context keeps its stage timings on this request
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(llm_executor, contextvars.copy_context().run,
+                                      generate_with_gemini, prompt, context)
+
+def _generate_uncached(prompt, cache_key, context=None):
+    """Call Gemini for a prompt that missed the response cache"""
+    try:
+        with stage("llm"):
+            response = llm_client.generate_content(build_slide_prompt(prompt, context))
+        ai_response = parse_model_text(response.text, prompt)
+        cache_response(prompt, cache_key, ai_response, similar=not context)
+        return ai_response
+    except UpstreamUnavailable as e:
+        logger.warning(f"Gemini unavailable, using fallback: {str(e)}")
+        return generate_fallback_content(prompt)
     except Exception as e:
         logger.error(f"Gemini API error: {str(e)}")
         return generate_fallback_content(prompt)
 
-def parse_text_response(text, original_prompt):
-    """Parse text response into structured format"""
-    lines = text.strip().split('\n')
-    
-    # Extract title (usually first line or contains "title")
-    title = f"Presentation: {original_prompt}"
-    for line in lines[:3]:
-        if line.strip() and not line.startswith('-') and not line.startswith('•'):
-            title = line.strip()
-            break
-    
-    # Extract bullet points
-    bullet_points = []
-    for line in lines:
-        if line.strip().startswith('-') or line.strip().startswith('•'):
-            bullet_points.append(line.strip().lstrip('-•').strip())
-    
-    if not bullet_points:
-        bullet_points = [
-            "Key insight from your request",
-            "Important details to highlight", 
-            "Action items or next steps"
-        ]
-    
-    return {
-        "title": title,
-        "content": f"This slide covers: {original_prompt}",
-        "bullet_points": bullet_points[:5],  # Limit to 5 points
-        "design_theme": "professional",
-        "layout_type": "bullet-list"
-    }
-
 def generate_fallback_content(prompt):
     """Generate fallback content when Gemini is unavailable"""
     return {
@@ -169,6 +262,7 @@ def generate_fallback_content(prompt):
         "layout_type": "bullet-list"
     }
 
+@timed("layout")
 def convert_to_slide_elements(ai_response, color_theme="blue"):
     """Convert AI response to frontend slide elements with color theme"""
     elements = []
@@ -179,6 +273,7 @@ def convert_to_slide_elements(ai_response, color_theme="blue"):
     elements.append({
         "id": f"title_{uuid.uuid4().hex[:8]}",
         "type": "text",
+        "role": "title",
         "content": ai_response.get("title", "Untitled Slide"),
         "x": 50,
         "y": y_position,
@@ -197,6 +292,7 @@ def convert_to_slide_elements(ai_response, color_theme="blue"):
         elements.append({
             "id": f"content_{uuid.uuid4().hex[:8]}",
             "type": "text",
+            "role": "content",
             "content": ai_response["content"],
             "x": 50,
             "y": y_position,
@@ -216,6 +312,7 @@ def convert_to_slide_elements(ai_response, color_theme="blue"):
         elements.append({
             "id": f"bullets_{uuid.uuid4().hex[:8]}",
             "type": "text",
+            "role": "bullets",
             "content": bullet_text,
             "x": 50,
             "y": y_position,
@@ -230,6 +327,282 @@ def convert_to_slide_elements(ai_response, color_theme="blue"):
     
     return elements
 
+def build_slide(ai_response, color_theme):
+    """Build a themed slide from an AI response"""
+    return {
+        "id": new_slide_id(),
+        "title": ai_response.get("title", "Generated Slide"),
+        "elements": convert_to_slide_elements(ai_response, color_theme),
+        "theme": ai_response.get("design_theme", "professional"),
+        "layout": ai_response.get("layout_type", "bullet-list"),
+        "color_theme": color_theme,
+        "background_color": COLOR_THEMES.get(color_theme, COLOR_THEMES["blue"])["background"]
+    }
+
+def build_generated_slide(ai_response, prompt, color_theme):
+    """Build a standalone generated slide with its AI metadata"""
+    slide = build_slide(ai_response, color_theme)
+    slide["ai_metadata"] = {
+        "original_prompt": prompt,
+        "generated_at": datetime.now().isoformat()
+    }
+    return slide
+
+def store_new_presentation(presentation_id, prompt, slides, color_theme):
+    """Store a newly created presentation"""
+    return presentation_store.create({
+        "id": presentation_id,
+        "prompt": prompt,
+        "slides": slides,
+        "default_color_theme": color_theme,
+        "created_at": datetime.now().isoformat(),
+        "updated_at": datetime.now().isoformat()
+    })
+
+# Server-Sent Events responses must not be buffered by proxies
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no'
+}
+
+# Deck generation
+DECK_MAX_SLIDES = int(os.getenv('DECK_MAX_SLIDES', '30'))
+DECK_PARALLELISM = int(os.getenv('DECK_PARALLELISM', '8'))
+
+DECK_SECTIONS = [
+    "Introduction", "Background", "Key Concepts", "Current Landscape",
+    "Challenges", "Opportunities", "Strategy", "Implementation",
+    "Case Study", "Metrics", "Risks", "Timeline", "Next Steps", "Summary"
+]
+
+def parse_deck_request(data):
+    """Validate a deck request, returning (spec, error)"""
+    topic = (data.get('topic') or data.get('prompt') or '').strip()
+    outline = data.get('outline')
+    color_theme = data.get('color_theme', 'blue')
+
+    if not topic:
+        return None, "Topic is required"
+    if outline is not None:
+        if not isinstance(outline, list) or not all(isinstance(t, str) and t.strip() for t in outline):
+            return None, "Outline must be a list of slide titles"
+        outline = [t.strip() for t in outline]
+        slide_count = len(outline)
+    else:
+        try:
+            slide_count = int(data.get('slide_count', 5))
+        except (TypeError, ValueError):
+            return None, "slide_count must be an integer"
+    if not 1 <= slide_count <= DECK_MAX_SLIDES:
+        return None, f"A deck must have between 1 and {DECK_MAX_SLIDES} slides"
+    try:
+        parallelism = int(data.get('parallelism', DECK_PARALLELISM))
+    except (TypeError, ValueError):
+        return None, "parallelism must be an integer"
+
+    return {
+        "topic": topic,
+        "outline": outline,
+        "slide_count": slide_count,
+        "color_theme": color_theme,
+        "parallelism": max(1, min(parallelism, DECK_PARALLELISM))
+    }, None
+
+def fallback_deck_outline(topic, slide_count):
+    """Build a generic outline when the model cannot plan one"""
+    titles = []
+    for i in range(slide_count):
+        section = DECK_SECTIONS[i % len(DECK_SECTIONS)]
+        if i >= len(DECK_SECTIONS):
+            section = f"{section} ({i // len(DECK_SECTIONS) + 1})"
+        titles.append(f"{topic}: {section}")
+    return titles
+
+def plan_deck_outline(topic, slide_count):
+    """Plan slide titles for a deck with a single model call"""
+    if not model:
+        return fallback_deck_outline(topic, slide_count)
+    cache_key = make_cache_key(f"outline:{slide_count}:{topic}", MODEL_NAME)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached["outline"]
+    try:
+        planning_prompt = f"""
+        Plan a {slide_count}-slide presentation about: \"{topic}\"
+        Respond with a JSON array of exactly {slide_count} short, distinct slide titles
+        in presentation order, starting with an introduction and ending with a summary.
+        """
+        with stage("llm"):
+            response = llm_client.generate_content(planning_prompt)
+        titles = (parse_outline_response(response.text) or [])[:slide_count]
+        if titles:
+            titles += fallback_deck_outline(topic, slide_count)[len(titles):]
+            response_cache.set(cache_key, {"outline": titles})
+            return titles
+    except UpstreamUnavailable as e:
+        logger.warning(f"Gemini unavailable, using fallback outline: {str(e)}")
+    except Exception as e:
+        logger.error(f"Gemini outline error: {str(e)}")
+    return fallback_deck_outline(topic, slide_count)
+
+def deck_slide_prompt(topic, title, position, total):
+    """Prompt for one slide of a deck, with enough context to stay on topic"""
+    return f"{title} (slide {position} of {total} in a presentation about {topic})"
+
+def iter_deck_slides(topic, outline, color_theme, parallelism):
+    """Generate deck slides concurrently, yielding (index, slide) as each finishes"""
+    prompts = [
+        deck_slide_prompt(topic, title, i + 1, len(outline))
+        for i, title in enumerate(outline)
+    ]
+    pool = ThreadPoolExecutor(max_workers=min(parallelism, len(prompts)))
+    try:
+        futures = {pool.submit(contextvars.copy_context().run, generate_with_gemini, p): i
+                   for i, p in enumerate(prompts)}
+        for future in as_completed(futures):
+            index = futures[future]
+            yield index, build_slide(future.result(), color_theme)
+    finally:
+        # Stop queued generations if the consumer goes away early
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def generate_deck_slides(topic, outline, color_theme, parallelism):
+    """Generate every slide of a deck concurrently"""
+    slides = [None] * len(outline)
+    for index, slide in iter_deck_slides(topic, outline, color_theme, parallelism):
+        slides[index] = slide
+    return slides
+
+def stream_with_gemini(prompt, context=None):
+    """Yield (event, data) pairs as a slide streams in, ending with the full AI response"""
+    parser = IncrementalSlideParser()
+    ai_response = None
+    if not model:
+        ai_response = generate_fallback_content(prompt)
+    else:
+        cache_key = generation_cache_key(prompt, context)
+        ai_response = get_cached_response(prompt, cache_key, similar=not context)
+    if ai_response is None:
+        try:
+            for chunk in llm_client.stream_content(build_slide_prompt(prompt, context)):
+                yield from parser.feed(chunk.text)
+            ai_response = parse_model_text(parser.text, prompt)
+            cache_response(prompt, cache_key, ai_response, similar=not context)
+        except UpstreamUnavailable as e:
+            logger.warning(f"Gemini unavailable, using fallback: {str(e)}")
+            ai_response = generate_fallback_content(prompt)
+        except Exception as e:
+            logger.error(f"Gemini streaming error: {str(e)}")
+            ai_response = generate_fallback_content(prompt)
+    
+    # Emit whatever could not be picked up incrementally (cache hits, plain-text output)
+    if parser.title is None:
+        yield "title", {"title": ai_response.get("title", "Generated Slide")}
+    bullet_points = ai_response.get("bullet_points") or []
+    for index in range(len(parser.bullet_points), len(bullet_points)):
+        yield "bullet", {"index": index, "text": bullet_points[index]}
+    yield "ai_response", ai_response
+
+# Presentation listing
+LIST_DEFAULT_LIMIT = 20
+LIST_MAX_LIMIT = 100
+def encode_cursor(key):
+    """Encode an (updated_at, id) pagination key as an opaque cursor"""
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor):
+    """Decode a cursor from encode_cursor, raising ValueError if it is malformed"""
+    if not cursor:
+        return None
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not (isinstance(key, list) and len(key) == 2 and all(isinstance(k, str) for k in key)):
+        raise ValueError("Invalid cursor")
+    return tuple(key)
+
+def parse_fields(raw):
+    """Parse the fields= projection; None means full presentations"""
+    if not raw:
+        return None
+    if raw == "summary":
+        return SUMMARY_FIELDS
+    return [field.strip() for field in raw.split(",") if field.strip()]
+
+def project_presentation(presentation, fields):
+    """Keep only the requested fields; slide_count is derived unless it is a stored summary"""
+    if fields is None:
+        return presentation
+    projected = {}
+    for field in fields:
+        if field == "slide_count" and "slides" in presentation:
+            projected[field] = len(presentation.get("slides", []))
+        elif field in presentation:
+            projected[field] = presentation[field]
+    return projected
+
+def presentation_etag(presentation_id, version):
+    return f"{presentation_id}-{version}"
+
+def not_modified(etag, weak=False):
+    """Empty 304 response carrying the current ETag"""
+    response = app.response_class(status=304)
+    response.set_etag(etag, weak=weak)
+    return response
+
+# PPTX export engine with per-theme template cache (None without python-pptx)
+# Finished decks keyed by payload hash, and rendered slides keyed by slide hash
+export_cache, slide_fragment_cache = create_export_caches_from_env()
+pptx_exporter = create_exporter(COLOR_THEMES, slide_fragment_cache)
+export_jobs = (create_export_jobs_from_env(COLOR_THEMES, export_cache, slide_fragment_cache, pptx_exporter)
+               if pptx_exporter else None)
+
+# Slide thumbnails cached by content hash, bulk-rendered in a process pool (None without Pillow)
+thumbnail_service = create_thumbnail_service_from_env()
+
+def send_pptx(file_obj):
+    """Send an open PPTX file as a download"""
+    return send_file(file_obj, mimetype=PPTX_MIMETYPE, as_attachment=True,
+                     download_name='presentation.pptx')
+
+def parse_export_request(data):
+    """Slides and color theme of an export request"""
+    slides_data = data.get('slides', [])
+    color_theme = data.get('color_theme') or next(
+        (slide.get('color_theme') for slide in slides_data if slide.get('color_theme')), 'blue'
+    )
+    return slides_data, color_theme
+
+CONVERSATION_ID_MAX_LENGTH = 128
+
+def parse_conversation_id(data):
+    """(conversation_id, error) of a request body; an empty or missing id is None"""
+    conversation_id = data.get('conversation_id')
+    if conversation_id is None or conversation_id == '':
+        return None, None
+    if not isinstance(conversation_id, str) or len(conversation_id) > CONVERSATION_ID_MAX_LENGTH:
+        return None, f"conversation_id must be a string of at most {CONVERSATION_ID_MAX_LENGTH} characters"
+    return conversation_id, None
+
+def conversation_context(conversation_id):
+    """Prompt context of an active conversation, or None"""
+    if not conversation_id:
+        return None
+    return conversation_store.prompt_context(conversation_id)
+
+def record_generated_slide(conversation_id, prompt, ai_response):
+    """Note a generated slide in its conversation so later follow-ups build on it"""
+    if not conversation_id:
+        return
+    if conversation_store.get_topic(conversation_id) is None:
+        conversation_store.set_topic(conversation_id, prompt)
+    conversation_store.add_slide(conversation_id, ai_response.get("title", "Generated Slide"))
+
+# Routes voice input to an intent; only presentation requests reach the model
+intent_router = create_intent_router_from_env()
+VOICE_BATCH_MAX = int(os.getenv('VOICE_BATCH_MAX', '1000'))
+
 # Voice interaction responses
 def get_voice_greeting():
     """Get a friendly greeting for voice interaction"""
@@ -272,24 +645,69 @@ def process_voice_input():
         if not user_input:
             return jsonify({"error": "No input provided"}), 400
         
-        # Check if it's a greeting/casual response
-        casual_keywords = ['good', 'fine', 'great', 'okay', 'well', 'nice', 'bad', 'tired']
-        if any(keyword in user_input.lower() for keyword in casual_keywords):
-            response = "That's great to hear! Now, what type of presentation would you like to create? You can describe your topic or ask for suggestions."
+        conversation_id, error = parse_conversation_id(data)
+        if error:
+            return jsonify({"error": error}), 400
+        conversation_id = conversation_store.start(conversation_id)
+        topic = conversation_store.get_topic(conversation_id)
+        conversation_store.add_turn(conversation_id, "user", user_input)
+        
+        subject = follow_up_subject(user_input) if topic else None
+        if subject:
+            # Follow-up on the current presentation: only the new subject goes in the prompt
+            routed = {"intent": "follow_up", "confidence": 1.0,
+                      "response": f"Sure! I'll add a slide about '{subject}' to your presentation on '{topic}'."}
+            prompt = subject
         else:
-            # Treat as presentation request
-            response = f"Perfect! I'll help you create a presentation about '{user_input}'. Let me generate some slide content for you."
+            # Conversational turns get a templated response and never reach the model
+            routed = intent_router.route(user_input)
+            prompt = routed["topic"] if routed["should_generate"] else None
+            if prompt:
+                topic = prompt
+                conversation_store.set_topic(conversation_id, topic)
         
         return jsonify({
-            "response": response,
-            "should_generate": not any(keyword in user_input.lower() for keyword in casual_keywords),
-            "topic": user_input if not any(keyword in user_input.lower() for keyword in casual_keywords) else None
+            "response": routed["response"],
+            "intent": routed["intent"],
+            "confidence": routed["confidence"],
+            "should_generate": prompt is not None,
+            "topic": topic if prompt is not None else None,
+            "prompt": prompt,
+            "conversation_id": conversation_id
         })
         
     except Exception as e:
         logger.error(f"Error processing voice input: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/voice/process/batch', methods=['POST'])
+def process_voice_batch():
+    """Route every utterance of a transcript to an intent in one request"""
+    try:
+        data = request.get_json()
+        inputs = data.get('inputs')
+        if inputs is None and isinstance(data.get('transcript'), str):
+            inputs = data['transcript'].splitlines()
+        if not isinstance(inputs, list) or not all(isinstance(text, str) for text in inputs):
+            return jsonify({"error": "inputs must be a list of strings, or transcript a string"}), 400
+        inputs = [text.strip() for text in inputs if text.strip()]
+        if len(inputs) > VOICE_BATCH_MAX:
+            return jsonify({"error": f"At most {VOICE_BATCH_MAX} inputs per batch"}), 400
+        
+        results = intent_router.route_many(inputs)
+        for text, result in zip(inputs, results):
+            result["input"] = text
+        
+        return jsonify({
+            "results": results,
+            "count": len(results),
+            "should_generate": sum(1 for result in results if result["should_generate"])
+        })
+        
+    except Exception as e:
+        logger.error(f"Error processing voice batch: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/generate-slide', methods=['POST'])
 def generate_slide():
     """Generate a single slide from prompt"""
@@ -297,33 +715,26 @@ def generate_slide():
         data = request.get_json()
         prompt = data.get('prompt', '')
         color_theme = data.get('color_theme', 'blue')
+        conversation_id, error = parse_conversation_id(data)
         
         if not prompt:
             return jsonify({"error": "Prompt is required"}), 400
+        if error:
+            return jsonify({"error": error}), 400
         
         logger.info(f"Generating slide for: {prompt} with color theme: {color_theme}")
         
-        # Generate content with Gemini
-        ai_response = generate_with_gemini(prompt)
+        # Generate content with Gemini, continuing the conversation if there is one
+        ai_response = generate_with_gemini(prompt, conversation_context(conversation_id))
+        record_generated_slide(conversation_id, prompt, ai_response)
         
         # Convert to slide format with color theme
-        slide = {
-            "id": int(datetime.now().timestamp()),
-            "title": ai_response.get("title", "Generated Slide"),
-            "elements": convert_to_slide_elements(ai_response, color_theme),
-            "theme": ai_response.get("design_theme", "professional"),
-            "layout": ai_response.get("layout_type", "bullet-list"),
-            "color_theme": color_theme,
-            "background_color": COLOR_THEMES.get(color_theme, COLOR_THEMES["blue"])["background"],
-            "ai_metadata": {
-                "original_prompt": prompt,
-                "generated_at": datetime.now().isoformat()
-            }
-        }
+        slide = build_generated_slide(ai_response, prompt, color_theme)
         
         return jsonify({
             "slide": slide,
             "ai_response": ai_response,
+            "conversation_id": conversation_id,
             "message": "Slide generated successfully"
         })
         
@@ -331,6 +742,38 @@ def generate_slide():
         logger.error(f"Error generating slide: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/generate-slide/stream', methods=['POST'])
+def generate_slide_stream():
+    """Stream a single slide as Server-Sent Events: title, bullets, then the laid-out slide"""
+    data = request.get_json()
+    prompt = data.get('prompt', '')
+    color_theme = data.get('color_theme', 'blue')
+    conversation_id, error = parse_conversation_id(data)
+    
+    if not prompt:
+        return jsonify({"error": "Prompt is required"}), 400
+    if error:
+        return jsonify({"error": error}), 400
+    
+    logger.info(f"Streaming slide for: {prompt} with color theme: {color_theme}")
+    context = conversation_context(conversation_id)
+    
+    def events():
+        try:
+            for event, payload in stream_with_gemini(prompt, context):
+                if event == "ai_response":
+                    record_generated_slide(conversation_id, prompt, payload)
+                    slide = build_generated_slide(payload, prompt, color_theme)
+                    yield sse_event("slide", {"slide": slide, "ai_response": payload})
+                else:
+                    yield sse_event(event, payload)
+            yield sse_event("done", {"message": "Slide generated successfully"})
+        except Exception as e:
+            logger.error(f"Error streaming slide: {str(e)}")
+            yield sse_event("error", {"error": str(e)})
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream', headers=SSE_HEADERS)
+
 @app.route('/api/slides/<int:slide_id>/color', methods=['PUT'])
 def change_slide_color(slide_id):
     """Change the color theme of a specific slide"""
@@ -339,36 +782,34 @@ def change_slide_color(slide_id):
         color_theme = data.get('color_theme', 'blue')
         presentation_id = data.get('presentation_id')
         
-        if color_theme not in COLOR_THEMES:
+        if color_theme not in theme_registry:
             return jsonify({"error": "Invalid color theme"}), 400
         
         # Find and update the slide
         updated = False
-        for pres_id, presentation in presentations.items():
-            if presentation_id and pres_id != presentation_id:
-                continue
-                
-            for slide in presentation['slides']:
-                if slide['id'] == slide_id:
-                    # Update slide color theme
-                    slide['color_theme'] = color_theme
-                    slide['background_color'] = COLOR_THEMES[color_theme]["background"]
-                    
-                    # Update all text elements with new color theme
-                    theme_colors = COLOR_THEMES[color_theme]
-                    for element in slide['elements']:
-                        if element['type'] == 'text':
-                            if 'title_' in element['id']:
-                                element['style']['color'] = theme_colors["primary"]
-                            else:
-                                element['style']['color'] = theme_colors["text"]
-                    
-                    presentation['updated_at'] = datetime.now().isoformat()
-                    updated = True
-                    break
-            
-            if updated:
-                break
+        
+        position = None
+        
+        # The global slide index gives the owning presentation and position directly;
+        # a slide id shared by several decks resolves within presentation_id when given
+        location = presentation_store.find_slide(slide_id, presentation_id)
+        if location:
+            presentation_id, position = location
+        
+        def recolor(presentation):
+            nonlocal updated
+            slides = presentation['slides']
+            if position is not None and position < len(slides) and slides[position]['id'] == slide_id:
+                slide = slides[position]
+            else:
+                slide = next((s for s in slides if s['id'] == slide_id), None)
+            if slide is None:
+                return False
+            theme_registry.recolor_slide(slide, color_theme)
+            updated = True
+        
+        if presentation_id:
+            presentation_store.update(presentation_id, recolor)
         
         if not updated:
             return jsonify({"error": "Slide not found"}), 404
@@ -389,12 +830,35 @@ def get_color_themes():
     try:
         return jsonify({
             "themes": COLOR_THEMES,
-            "available_colors": list(COLOR_THEMES.keys())
+            "available_colors": list(COLOR_THEMES.keys()),
+            "custom_colors": theme_registry.custom_names()
         })
     except Exception as e:
         logger.error(f"Error getting color themes: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/color-themes', methods=['POST'])
+def register_color_theme():
+    """Register a custom color theme"""
+    try:
+        data = request.get_json()
+        name = data.get('name')
+        try:
+            colors = theme_registry.register(name, data.get('colors'), replace=bool(data.get('replace')))
+        except ThemeError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        logger.info(f"Registered custom color theme {name}")
+        return jsonify({
+            "message": f"Color theme {name} registered",
+            "name": name,
+            "colors": colors
+        }), 201
+        
+    except Exception as e:
+        logger.error(f"Error registering color theme: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/presentai', methods=['POST'])
 def create_presentation():
     """Create or update presentation"""
@@ -410,28 +874,10 @@ def create_presentation():
         if prompt and prompt != "Manual save":
             logger.info(f"Creating presentation with prompt: {prompt}")
             ai_response = generate_with_gemini(prompt)
-            
-            new_slide = {
-                "id": len(slides) + 1,
-                "title": ai_response.get("title", "Generated Slide"),
-                "elements": convert_to_slide_elements(ai_response, color_theme),
-                "theme": ai_response.get("design_theme", "professional"),
-                "layout": ai_response.get("layout_type", "bullet-list"),
-                "color_theme": color_theme,
-                "background_color": COLOR_THEMES.get(color_theme, COLOR_THEMES["blue"])["background"]
-            }
-            
-            slides.append(new_slide)
+            slides.append(build_slide(ai_response, color_theme))
         
         # Store presentation
-        presentations[presentation_id] = {
-            "id": presentation_id,
-            "prompt": prompt,
-            "slides": slides,
-            "default_color_theme": color_theme,
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat()
-        }
+        store_new_presentation(presentation_id, prompt, slides, color_theme)
         
         logger.info(f"Created presentation {presentation_id} with {len(slides)} slides")
         
@@ -445,15 +891,89 @@ def create_presentation():
         logger.error(f"Error creating presentation: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/presentai/deck', methods=['POST'])
+def create_deck():
+    """Plan and generate a whole presentation in one request"""
+    try:
+        data = request.get_json()
+        spec, error = parse_deck_request(data)
+        if error:
+            return jsonify({"error": error}), 400
+        
+        topic = spec["topic"]
+        logger.info(f"Generating {spec['slide_count']}-slide deck for: {topic}")
+        
+        outline = spec["outline"] or plan_deck_outline(topic, spec["slide_count"])
+        slides = generate_deck_slides(topic, outline, spec["color_theme"], spec["parallelism"])
+        
+        presentation_id = str(uuid.uuid4())
+        store_new_presentation(presentation_id, topic, slides, spec["color_theme"])
+        
+        logger.info(f"Created deck {presentation_id} with {len(slides)} slides")
+        
+        return jsonify({
+            "presentation_id": presentation_id,
+            "outline": outline,
+            "slides": slides,
+            "message": "Deck generated successfully"
+        })
+        
+    except Exception as e:
+        logger.error(f"Error generating deck: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/presentai/deck/stream', methods=['POST'])
+def create_deck_stream():
+    """Stream a whole deck as Server-Sent Events, one event per finished slide"""
+    data = request.get_json()
+    spec, error = parse_deck_request(data)
+    if error:
+        return jsonify({"error": error}), 400
+    
+    topic = spec["topic"]
+    logger.info(f"Streaming {spec['slide_count']}-slide deck for: {topic}")
+    
+    def events():
+        try:
+            outline = spec["outline"] or plan_deck_outline(topic, spec["slide_count"])
+            yield sse_event("outline", {"outline": outline})
+            
+            slides = [None] * len(outline)
+            for index, slide in iter_deck_slides(topic, outline, spec["color_theme"], spec["parallelism"]):
+                slides[index] = slide
+                yield sse_event("slide", {"index": index, "slide": slide})
+            
+            presentation_id = str(uuid.uuid4())
+            store_new_presentation(presentation_id, topic, slides, spec["color_theme"])
+            logger.info(f"Created deck {presentation_id} with {len(slides)} slides")
+            yield sse_event("done", {
+                "presentation_id": presentation_id,
+                "slide_count": len(slides),
+                "message": "Deck generated successfully"
+            })
+        except Exception as e:
+            logger.error(f"Error streaming deck: {str(e)}")
+            yield sse_event("error", {"error": str(e)})
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream', headers=SSE_HEADERS)
+
 @app.route('/api/presentations/<presentation_id>', methods=['GET'])
 def get_presentation(presentation_id):
     """Get specific presentation"""
     try:
-        presentation = presentations.get(presentation_id)
+        version = presentation_store.get_version(presentation_id)
+        if version is None:
+            return jsonify({"error": "Presentation not found"}), 404
+        if request.if_none_match.contains(presentation_etag(presentation_id, version)):
+            return not_modified(presentation_etag(presentation_id, version))
+        
+        presentation = presentation_store.get(presentation_id)
         if not presentation:
             return jsonify({"error": "Presentation not found"}), 404
         
-        return jsonify(presentation)
+        response = jsonify(presentation)
+        response.set_etag(presentation_etag(presentation_id, presentation.get("version", 1)))
+        return response
         
     except Exception as e:
         logger.error(f"Error retrieving presentation: {str(e)}")
@@ -465,31 +985,284 @@ def update_presentation(presentation_id):
     try:
         data = request.get_json()
         
-        if presentation_id not in presentations:
-            return jsonify({"error": "Presentation not found"}), 404
+        def replace_slides(presentation):
+            presentation["slides"] = data.get("slides", presentation["slides"])
         
-        presentations[presentation_id].update({
-            "slides": data.get("slides", presentations[presentation_id]["slides"]),
-            "updated_at": datetime.now().isoformat()
-        })
+        presentation = presentation_store.update(presentation_id, replace_slides)
+        if presentation is None:
+            return jsonify({"error": "Presentation not found"}), 404
         
         return jsonify({
             "message": "Presentation updated successfully",
-            "presentation": presentations[presentation_id]
+            "presentation": presentation
         })
         
     except Exception as e:
         logger.error(f"Error updating presentation: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+def requested_version(data, presentation_id):
+    """(version, error) the client expects, from the body or an If-Match ETag; None if neither is given"""
+    expected_version = data.get("version")
+    if expected_version is None:
+        for etag in request.if_match.as_set():
+            etag_id, _, etag_version = etag.rpartition("-")
+            if etag_id == presentation_id and etag_version.isdigit():
+                expected_version = int(etag_version)
+    elif type(expected_version) is not int:
+        return None, "version must be an integer"
+    return expected_version, None
+
+@app.route('/api/presentations/<presentation_id>', methods=['PATCH'])
+def patch_presentation(presentation_id):
+    """Apply an incremental update and return only the changed parts"""
+    try:
+        data = request.get_json()
+        if isinstance(data, list):
+            # Bare RFC 6902 document (application/json-patch+json)
+            data = {"patch": data}
+        
+        expected_version, error = requested_version(data, presentation_id)
+        if error:
+            return jsonify({"error": error}), 400
+        if expected_version is None:
+            return jsonify({"error": "A version or If-Match header is required"}), 428
+        
+        changes = {}
+        
+        def apply_patch(presentation):
+            if presentation.get("version", 1) != expected_version:
+                raise VersionConflict(presentation.get("version", 1))
+            if "patch" in data:
+                changes.update(apply_json_patch(presentation, data["patch"]))
+            else:
+                changes.update(apply_operations(presentation, data.get("operations")))
+        
+        try:
+            presentation = presentation_store.update(presentation_id, apply_patch)
+        except VersionConflict as e:
+            return jsonify({"error": str(e), "current_version": e.current_version}), 409
+        except PatchError as e:
+            return jsonify({"error": str(e)}), 422
+        if presentation is None:
+            return jsonify({"error": "Presentation not found"}), 404
+        
+        response = jsonify({
+            "message": "Presentation patched successfully",
+            "version": presentation["version"],
+            "updated_at": presentation["updated_at"],
+            **changes
+        })
+        response.set_etag(presentation_etag(presentation_id, presentation["version"]))
+        return response
+        
+    except Exception as e:
+        logger.error(f"Error patching presentation: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+def parse_slide_ids(raw):
+    """Integer slide ids from a list of ints or digit strings, or None if it is anything else"""
+    if not isinstance(raw, list):
+        return None
+    slide_ids = []
+    for slide_id in raw:
+        if isinstance(slide_id, str) and slide_id.isascii() and slide_id.isdigit():
+            slide_id = int(slide_id)
+        if type(slide_id) is not int:
+            return None
+        slide_ids.append(slide_id)
+    return slide_ids
+
+@app.route('/api/presentations/<presentation_id>/theme', methods=['PUT'])
+def change_presentation_theme(presentation_id):
+    """Recolor a whole presentation, or the listed slides, in one atomic update"""
+    try:
+        data = request.get_json()
+        color_theme = data.get('color_theme')
+        slide_ids = data.get('slide_ids')
+        
+        if color_theme not in theme_registry:
+            return jsonify({"error": "Invalid color theme"}), 400
+        if slide_ids is not None:
+            slide_ids = parse_slide_ids(slide_ids)
+            if slide_ids is None:
+                return jsonify({"error": "slide_ids must be a list of slide ids (integers or digit strings)"}), 400
+        # Optional: without a version the recolor applies on top of concurrent edits
+        expected_version, error = requested_version(data, presentation_id)
+        if error:
+            return jsonify({"error": error}), 400
+        wanted = set(slide_ids) if slide_ids is not None else None
+        recolored = []
+        
+        def recolor(presentation):
+            if expected_version is not None and presentation.get("version", 1) != expected_version:
+                raise VersionConflict(presentation.get("version", 1))
+            recolored.extend(theme_registry.recolor_slides(presentation['slides'], color_theme, wanted))
+            if wanted is None:
+                presentation['default_color_theme'] = color_theme
+            elif not recolored:
+                return False
+        
+        try:
+            presentation = presentation_store.update(presentation_id, recolor)
+        except VersionConflict as e:
+            return jsonify({"error": str(e), "current_version": e.current_version}), 409
+        if presentation is None:
+            return jsonify({"error": "Presentation not found"}), 404
+        if wanted is not None and not recolored:
+            return jsonify({"error": "Slide not found"}), 404
+        
+        response = jsonify({
+            "message": f"Presentation color changed to {color_theme}",
+            "color_theme": color_theme,
+            "background_color": COLOR_THEMES[color_theme]["background"],
+            "slide_ids": recolored,
+            "missing_slide_ids": sorted(wanted.difference(recolored)) if wanted else [],
+            "version": presentation["version"],
+            "updated_at": presentation["updated_at"]
+        })
+        response.set_etag(presentation_etag(presentation_id, presentation["version"]))
+        return response
+        
+    except Exception as e:
+        logger.error(f"Error changing presentation theme: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+def add_thumbnail_urls(page, projected, which, width=None):
+    """Add thumbnail URLs to listed presentations and start rendering the missing ones"""
+    slides_to_render = []
+    for presentation, item in zip(page, projected):
+        slides = presentation.get("slides") or []
+        if which == 'first':
+            slides = slides[:1]
+            item["thumbnail_url"] = (
+                thumbnail_service.url(presentation["id"], slides[0], width) if slides else None
+            )
+        else:
+            item["thumbnail_urls"] = [thumbnail_service.url(presentation["id"], s, width) for s in slides]
+        slides_to_render.extend(slides)
+    # Rendered in the background, so most are cached by the time the browser asks
+    thumbnail_service.prerender(slides_to_render, width)
+
+@app.route('/api/presentations/<presentation_id>/slides/<int:slide_id>/thumbnail', methods=['GET'])
+def get_slide_thumbnail(presentation_id, slide_id):
+    """PNG or WebP thumbnail of one slide, rendered on first request"""
+    if thumbnail_service is None:
+        return jsonify({"error": "Pillow is not installed on the server."}), 500
+    try:
+        try:
+            width, fmt = thumbnail_service.options(request.args.get('width'), request.args.get('format'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        presentation = presentation_store.get(presentation_id)
+        slide = next((s for s in presentation.get("slides", []) if s.get("id") == slide_id), None) if presentation else None
+        if slide is None:
+            return jsonify({"error": "Slide not found"}), 404
+        
+        # The key is a content hash, so a matching ETag is answered without rendering
+        key = thumbnail_service.key(slide, width, fmt)
+        if request.if_none_match.contains(key):
+            return not_modified(key)
+        key, data = thumbnail_service.get(slide, width, fmt)
+        
+        response = app.response_class(data, mimetype=THUMBNAIL_FORMATS[fmt])
+        response.set_etag(key)
+        if request.args.get('v') == key[:16]:
+            # Versioned URLs from listings change whenever the slide does
+            response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        else:
+            response.headers['Cache-Control'] = 'no-cache'
+        return response
+        
+    except Exception as e:
+        logger.error(f"Error rendering thumbnail: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/presentations/<presentation_id>/thumbnails', methods=['POST'])
+def render_presentation_thumbnails(presentation_id):
+    """Render every slide's thumbnail in the process pool and return their URLs"""
+    if thumbnail_service is None:
+        return jsonify({"error": "Pillow is not installed on the server."}), 500
+    try:
+        data = request.get_json(silent=True) or {}
+        try:
+            width, fmt = thumbnail_service.options(data.get('width'), data.get('format'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        presentation = presentation_store.get(presentation_id)
+        if presentation is None:
+            return jsonify({"error": "Presentation not found"}), 404
+        
+        slides = presentation.get("slides", [])
+        wait = bool(data.get('wait'))
+        queued = thumbnail_service.prerender(slides, width, fmt, wait=wait)
+        
+        return jsonify({
+            "thumbnails": [
+                {"slide_id": s.get("id"), "url": thumbnail_service.url(presentation_id, s, width, fmt)}
+                for s in slides
+            ],
+            "rendered" if wait else "queued": queued,
+            "message": "Thumbnails rendered" if wait else "Thumbnails queued"
+        }), 200 if wait or not queued else 202
+        
+    except Exception as e:
+        logger.error(f"Error rendering thumbnails: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/presentations', methods=['GET'])
 def list_presentations():
-    """List all presentations"""
+    """List presentations, most recently updated first, one page at a time"""
     try:
-        return jsonify({
-            "presentations": list(presentations.values()),
-            "count": len(presentations)
+        try:
+            limit = min(max(int(request.args.get('limit', LIST_DEFAULT_LIMIT)), 1), LIST_MAX_LIMIT)
+            after = decode_cursor(request.args.get('cursor'))
+        except ValueError:
+            return jsonify({"error": "Invalid limit or cursor"}), 400
+        fields = parse_fields(request.args.get('fields'))
+        
+        # Fetch one extra key to learn whether another page follows
+        keys = presentation_store.page_keys(limit + 1, after)
+        has_more = len(keys) > limit
+        keys = keys[:limit]
+        count = presentation_store.count()
+        
+        thumbnails = request.args.get('thumbnails')
+        if thumbnails not in (None, 'first', 'all'):
+            return jsonify({"error": "thumbnails must be 'first' or 'all'"}), 400
+        if thumbnails and thumbnail_service is None:
+            return jsonify({"error": "Pillow is not installed on the server."}), 500
+        
+        # The ETag only needs ids and versions, so unchanged pages skip all serialization.
+        # Compressed and plain bodies differ byte for byte, so with compression it is weak.
+        etag = hashlib.sha1(
+            json.dumps([keys, count, limit, has_more, fields, request.args.get('cursor'), thumbnails,
+                        request.args.get('thumbnail_width')]).encode("utf-8")
+        ).hexdigest()
+        if request.if_none_match.contains_weak(etag):
+            return not_modified(etag, weak=COMPRESSION_ENABLED)
+        
+        presentation_ids = [presentation_id for _, presentation_id, _ in keys]
+        if fields is not None and not thumbnails and set(fields) <= set(SUMMARY_FIELDS):
+            # Summary listings never decode slides
+            page = presentation_store.get_summaries(presentation_ids)
+        else:
+            page = presentation_store.get_many(presentation_ids)
+        projected = [project_presentation(p, fields) for p in page]
+        if thumbnails:
+            try:
+                add_thumbnail_urls(page, projected, thumbnails, request.args.get('thumbnail_width'))
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+        response = jsonify({
+            "presentations": projected,
+            "count": count,
+            "next_cursor": encode_cursor(keys[-1][:2]) if has_more else None
         })
+        response.set_etag(etag, weak=COMPRESSION_ENABLED)
+        return response
         
     except Exception as e:
         logger.error(f"Error listing presentations: {str(e)}")
@@ -524,66 +1297,137 @@ def health_check():
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "gemini_configured": model is not None,
+        "model_provider": model.name if model else None,
+        "response_cache": response_cache.stats(),
+        "semantic_cache": semantic_cache.stats(),
+        "themes": theme_registry.stats(),
+        "intent_router": intent_router.stats(),
+        "conversations": conversation_store.stats(),
+        "single_flight": single_flight.stats(),
+        "llm_client": llm_client.stats() if llm_client else None,
+        "response_parser": parser_stats.stats(),
+        "storage": presentation_store.name,
+        "json_encoder": app.json.encoder_name,
+        "pptx_export": pptx_exporter.stats() if pptx_exporter else None,
+        "export_jobs": export_jobs.stats() if export_jobs else None,
+        "thumbnails": thumbnail_service.stats() if thumbnail_service else None,
+        "export_cache": {
+            "artifacts": export_cache.stats(),
+            "fragments": slide_fragment_cache.stats() if slide_fragment_cache else None,
+        },
+        "startup": {"warmup": STARTUP_WARMUP, "warm": warmed_up.is_set()},
         "version": "1.0.0"
     })
 
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Stage and request latency histograms in the Prometheus text format"""
+    return Response(instrumentation.render_metrics(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/export-pptx', methods=['POST'])
 def export_pptx():
     """Export slides as a PPTX file"""
-    if Presentation is None:
+    if pptx_exporter is None:
         return jsonify({"error": "python-pptx is not installed on the server."}), 500
     try:
-        data = request.get_json()
-        slides_data = data.get('slides', [])
-        prs = Presentation()
-        # Remove default slide
-        if len(prs.slides) > 0:
-            xml_slides = prs.slides._sldIdLst
-            slides = list(xml_slides)
-            for sld in slides:
-                xml_slides.remove(sld)
-        for slide in slides_data:
-            sld = prs.slides.add_slide(prs.slide_layouts[1])  # Title and Content
-            title = slide.get('title', 'Slide')
-            elements = slide.get('elements', [])
-            if sld.shapes.title:
-                sld.shapes.title.text = title
-            # Find bullet points in elements
-            bullet_points = []
-            for el in elements:
-                if el.get('type') == 'text' and '•' in el.get('content', ''):
-                    bullet_points.extend([line.strip('• ').strip() for line in el['content'].split('\n') if line.strip()])
-            # Add content to placeholder if it exists
-            content_shape = None
-            for shape in sld.placeholders:
-                if shape.placeholder_format.idx == 1:
-                    content_shape = shape
-                    break
-            if content_shape is not None and hasattr(content_shape, 'text_frame'):
-                tf = content_shape.text_frame
-                tf.clear()
-                if bullet_points:
-                    for idx, point in enumerate(bullet_points):
-                        if idx == 0:
-                            tf.text = point
-                        else:
-                            p = tf.add_paragraph()
-                            p.text = point
-                else:
-                    tf.text = slide.get('content', '')
-        pptx_io = BytesIO()
-        prs.save(pptx_io)
-        pptx_io.seek(0)
-        return send_file(
-            pptx_io,
-            mimetype='application/vnd.openxmlformats-officedocument.presentationml.presentation',
-            as_attachment=True,
-            download_name='presentation.pptx'
+        slides_data, color_theme = parse_export_request(request.get_json())
+        digest = pptx_exporter.content_hash(slides_data, color_theme)
+        cached = export_cache.open(digest)
+        if cached is not None:
+            return send_pptx(cached)
+        
+        # Build up front so errors still produce a JSON response, then stream the zip
+        # to the client while it is written into the export cache
+        with stage("pptx_build"):
+            prs = pptx_exporter.build(slides_data, color_theme)
+        return Response(
+            stream_with_context(cache_stream(stream_presentation(prs), export_cache, digest)),
+            mimetype=PPTX_MIMETYPE,
+            headers={'Content-Disposition': 'attachment; filename=presentation.pptx'}
         )
     except Exception as e:
         logger.error(f"Error exporting PPTX: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/export-jobs', methods=['POST'])
+def create_export_job():
+    """Queue a background PPTX export"""
+    if export_jobs is None:
+        return jsonify({"error": "python-pptx is not installed on the server."}), 500
+    try:
+        slides_data, color_theme = parse_export_request(request.get_json())
+        job = export_jobs.submit(slides_data, color_theme)
+        return jsonify(job.to_dict()), 200 if job.status == COMPLETED else 202
+    except Exception as e:
+        logger.error(f"Error creating export job: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/export-jobs/<job_id>', methods=['GET'])
+def get_export_job(job_id):
+    """Get the status of an export job"""
+    job = export_jobs.get(job_id) if export_jobs else None
+    if not job:
+        return jsonify({"error": "Export job not found"}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/api/export-jobs/<job_id>/download', methods=['GET'])
+def download_export_job(job_id):
+    """Download the file produced by a finished export job"""
+    job = export_jobs.get(job_id) if export_jobs else None
+    if not job:
+        return jsonify({"error": "Export job not found"}), 404
+    if job.status != COMPLETED:
+        return jsonify({"error": f"Export job is {job.status}", "job": job.to_dict()}), 409
+    artifact = export_jobs.open_artifact(job)
+    if artifact is None:
+        return jsonify({"error": "Export file is no longer available"}), 410
+    return send_pptx(artifact)
+
+@app.route('/api/export-jobs/<job_id>', methods=['DELETE'])
+def cancel_export_job(job_id):
+    """Cancel a queued or running export job"""
+    job = export_jobs.cancel(job_id) if export_jobs else None
+    if not job:
+        return jsonify({"error": "Export job not found"}), 404
+    return jsonify(job.to_dict())
+
+# Model SDK and python-pptx imports are deferred to first use. STARTUP_WARMUP=sync does
+# them at import, background does them in a thread while the worker already serves
+# requests.
+STARTUP_WARMUP = os.getenv('STARTUP_WARMUP', 'none').lower()
+warmed_up = threading.Event()
+
+def warm_up(include_model=True):
+    """Import the model SDK and python-pptx and build export templates before the first request.
+
+    include_model=False skips the model SDK: a preloading parent must not import it,
+    since the Gemini SDK brings in grpc, which does not survive a fork.
+    """
+    if warmed_up.is_set():
+        return
+    start = time.perf_counter()
+    try:
+        if model and include_model:
+            model.warm_up()
+        if pptx_exporter:
+            pptx_exporter.warm_up()
+    except Exception as e:
+        logger.error(f"Warm-up failed: {str(e)}")
+        return
+    if include_model:
+        warmed_up.set()
+    logger.info(f"Warm-up finished in {time.perf_counter() - start:.2f}s")
+
+def after_fork():
+    """Reopen per-process resources in a worker forked from a preloaded parent"""
+    presentation_store.reopen()
+    response_cache.reopen()
+
+if STARTUP_WARMUP == 'sync':
+    warm_up()
+elif STARTUP_WARMUP == 'background':
+    threading.Thread(target=warm_up, name='warm-up', daemon=True).start()
+
 # Error handlers
 @app.errorhandler(404)
 def not_found(error):
@@ -599,6 +1443,17 @@ if __name__ == '__main__':
     print("🔗 API endpoints available at: http://localhost:5000/api/")
     print("🎤 Voice interaction endpoints ready")
     print("🎨 Color theme support enabled")
-    print(f"🤖 Gemini AI: {'✅ Connected' if model else '❌ Not configured'}")
+    print(f"🤖 Model: {'✅ ' + model.name if model else '❌ Not configured'}")
     
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    if os.getenv('SERVER_MODE', 'flask').lower() == 'asgi':
+        # Production mode: same routes, generation awaited on the event loop
+        import uvicorn
+        print("⚡ Serving through ASGI (uvicorn)")
+        uvicorn.run(
+            'asgi:application',
+            host=os.getenv('HOST', '0.0.0.0'),
+            port=int(os.getenv('PORT', '5000')),
+            workers=int(os.getenv('ASGI_WORKERS', '1'))
+        )
+    else:
+        app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
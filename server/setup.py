@@ -58,6 +58,12 @@ CORS_ORIGINS=http://localhost:3000,http://localhost:3001,http://127.0.0.1:3000
 LOG_LEVEL=INFO
 VOICE_ENABLED=true
 VOICE_LANGUAGE=en-US
+RESPONSE_CACHE_BACKEND=memory
+RESPONSE_CACHE_TTL=3600
+RESPONSE_CACHE_MAX_ENTRIES=1024
+RESPONSE_CACHE_MAX_BYTES=16777216
+STORAGE_BACKEND=memory
+STORAGE_PATH=slideflow.sqlite3
 """
     
     try:
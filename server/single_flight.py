@@ -0,0 +1,84 @@
+"""
+Single-flight request coalescing.
+
+Concurrent callers that ask for the same key share one in-flight call:
+the first caller (the leader) runs the function, everyone else waits for
+its result. This keeps a burst of identical prompts down to a single
+upstream LLM call.
+"""
+
+import threading
+
+
+class _Call:
+    """State for one in-flight call shared by a leader and its waiters"""
+
+    __slots__ = ("event", "result", "error", "waiters", "label")
+
+    def __init__(self, label):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+        self.label = label
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with an equal key into one execution"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key, fn, label=None):
+        """Run fn once per key among concurrent callers.
+
+        Returns (result, shared) where shared is True when the result was
+        handed to more than one caller and must not be mutated in place.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call(label if label is not None else key)
+                self._calls[key] = call
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            # Unregister before waking waiters so late arrivals start a new call
+            with self._lock:
+                del self._calls[key]
+                shared = call.waiters > 0
+            call.event.set()
+        return call.result, shared
+
+    def in_flight(self):
+        """Per-key waiter counts for calls that are currently running"""
+        with self._lock:
+            return {call.label: call.waiters for call in self._calls.values()}
+
+    def stats(self):
+        with self._lock:
+            return {
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls),
+                "waiters": {call.label: call.waiters for call in self._calls.values()},
+            }
@@ -0,0 +1,64 @@
+"""
+Helpers for streaming slide generation over Server-Sent Events.
+
+IncrementalSlideParser watches the model's streamed JSON text and reports
+the title and each bullet point as soon as they are complete, long before
+the whole response has arrived.
+"""
+
+import json
+import re
+
+_TITLE_RE = re.compile(r'"title"\s*:\s*"((?:[^"\\]|\\.)*)"')
+_BULLETS_START_RE = re.compile(r'"bullet_points"\s*:\s*\[')
+_STRING_ITEM_RE = re.compile(r'\s*,?\s*"((?:[^"\\]|\\.)*)"')
+
+
+def sse_event(event, data):
+    """Format one Server-Sent Event frame"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _decode_json_string(raw):
+    try:
+        return json.loads(f'"{raw}"')
+    except json.JSONDecodeError:
+        return raw
+
+
+class IncrementalSlideParser:
+    """Extract title and bullet points from partially streamed JSON"""
+
+    def __init__(self):
+        self.text = ""
+        self.title = None
+        self.bullet_points = []
+        self._bullets_offset = None
+
+    def feed(self, chunk):
+        """Add streamed text and return newly completed (event, data) pairs"""
+        self.text += chunk
+        events = []
+
+        if self.title is None:
+            match = _TITLE_RE.search(self.text)
+            if match:
+                self.title = _decode_json_string(match.group(1))
+                events.append(("title", {"title": self.title}))
+
+        if self._bullets_offset is None:
+            match = _BULLETS_START_RE.search(self.text)
+            if match:
+                self._bullets_offset = match.end()
+        if self._bullets_offset is not None:
+            # Each fully quoted string after the opening bracket is one finished bullet
+            while True:
+                match = _STRING_ITEM_RE.match(self.text, self._bullets_offset)
+                if not match:
+                    break
+                self._bullets_offset = match.end()
+                point = _decode_json_string(match.group(1))
+                self.bullet_points.append(point)
+                events.append(("bullet", {"index": len(self.bullet_points) - 1, "text": point}))
+
+        return events
@@ -0,0 +1,467 @@
+"""
+Presentation storage.
+
+Routes talk to a PresentationRepository instead of a module-level dict:
+
+- InMemoryPresentationRepository: process-local, the old demo behaviour;
+  slides are held in the compact form from models.py
+- SQLitePresentationRepository: WAL-mode SQLite with a connection pool,
+  shared by every worker process pointed at the same file
+
+Presentations are plain dicts in the same shape the API returns.
+"""
+
+import bisect
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from models import pack_slides, unpack_slides
+
+logger = logging.getLogger(__name__)
+
+# What fields=summary lists; slide_count is derived from the slides
+SUMMARY_FIELDS = [
+    "id", "prompt", "default_color_theme", "created_at", "updated_at", "version", "slide_count"
+]
+
+_slide_id_lock = threading.Lock()
+_last_slide_id = 0
+
+
+def new_slide_id():
+    """Return a collision-free integer slide id.
+
+    Ids are microsecond timestamps forced to increase strictly within the
+    process, so slides created in the same second no longer share an id.
+    They stay below 2**53 and remain exact JavaScript numbers.
+    """
+    global _last_slide_id
+    with _slide_id_lock:
+        _last_slide_id = max(_last_slide_id + 1, time.time_ns() // 1000)
+        return _last_slide_id
+
+
+class PresentationRepository:
+    """Interface implemented by every presentation store"""
+
+    def create(self, presentation):
+        """Store a new presentation and return it"""
+        raise NotImplementedError
+
+    def get(self, presentation_id):
+        """Return the presentation, or None if it does not exist"""
+        raise NotImplementedError
+
+    def update(self, presentation_id, mutator):
+        """Atomically apply mutator(presentation), bump updated_at and version.
+
+        Returns the updated presentation, or None if it does not exist.
+        If the mutator returns False the stored presentation is left as is;
+        exceptions raised by the mutator abort the update.
+        """
+        raise NotImplementedError
+
+    def list_all(self):
+        """Return every stored presentation"""
+        raise NotImplementedError
+
+    def get_version(self, presentation_id):
+        """Return the version counter of a presentation, or None"""
+        raise NotImplementedError
+
+    def page_keys(self, limit, after=None):
+        """Return up to limit (updated_at, id, version) keys, most recently updated first.
+
+        after is the (updated_at, id) key of the last item of the previous page.
+        """
+        raise NotImplementedError
+
+    def get_many(self, presentation_ids):
+        """Return the presentations for presentation_ids, in the same order"""
+        raise NotImplementedError
+
+    def get_summaries(self, presentation_ids):
+        """Return the SUMMARY_FIELDS of presentation_ids, in the same order, without decoding slides"""
+        raise NotImplementedError
+
+    def count(self):
+        raise NotImplementedError
+
+    def find_slide(self, slide_id, presentation_id=None):
+        """Return (presentation_id, position) for slide_id from the slide index, or None.
+
+        A slide id can be in several presentations (a deck saved as a copy of
+        another); presentation_id picks one, otherwise the first indexed wins.
+        """
+        raise NotImplementedError
+
+    def reopen(self):
+        """Replace connections inherited from a parent process after fork"""
+
+
+class InMemoryPresentationRepository(PresentationRepository):
+    """Process-local store backed by a dict, with a global slide index"""
+
+    name = "memory"
+
+    def __init__(self):
+        self._presentations = {}
+        self._slide_index = {}  # slide id -> {presentation id: position}
+        self._indexed_slides = {}  # presentation id -> slide ids it owns in the index
+        self._order = []  # sorted (updated_at, id) keys for pagination
+        self._lock = threading.RLock()
+
+    def _index_slides(self, presentation):
+        presentation_id = presentation["id"]
+        for slide_id in self._indexed_slides.pop(presentation_id, ()):
+            owners = self._slide_index.get(slide_id)
+            if owners is not None:
+                owners.pop(presentation_id, None)
+                if not owners:
+                    del self._slide_index[slide_id]
+        slide_ids = []
+        for position, slide in enumerate(presentation["slides"]):
+            slide_id = slide.get("id")
+            if isinstance(slide_id, int):
+                # The first slide with a given id in a deck is the one that gets updated
+                self._slide_index.setdefault(slide_id, {}).setdefault(presentation_id, position)
+                slide_ids.append(slide_id)
+        self._indexed_slides[presentation_id] = slide_ids
+
+    @staticmethod
+    def _pack(presentation):
+        return {**presentation, "slides": pack_slides(presentation.get("slides", []))}
+
+    @staticmethod
+    def _unpack(stored):
+        return {**stored, "slides": unpack_slides(stored["slides"])}
+
+    def create(self, presentation):
+        presentation.setdefault("version", 1)
+        with self._lock:
+            self._presentations[presentation["id"]] = self._pack(presentation)
+            self._index_slides(presentation)
+            bisect.insort(self._order, (presentation["updated_at"], presentation["id"]))
+        return presentation
+
+    def get(self, presentation_id):
+        stored = self._presentations.get(presentation_id)
+        return self._unpack(stored) if stored is not None else None
+
+    def update(self, presentation_id, mutator):
+        with self._lock:
+            stored = self._presentations.get(presentation_id)
+            if stored is None:
+                return None
+            presentation = self._unpack(stored)
+            old_key = (presentation["updated_at"], presentation_id)
+            if mutator(presentation) is not False:
+                presentation["updated_at"] = datetime.now().isoformat()
+                presentation["version"] = presentation.get("version", 1) + 1
+                self._presentations[presentation_id] = self._pack(presentation)
+                self._index_slides(presentation)
+                del self._order[bisect.bisect_left(self._order, old_key)]
+                bisect.insort(self._order, (presentation["updated_at"], presentation_id))
+            return presentation
+
+    def list_all(self):
+        with self._lock:
+            stored = list(self._presentations.values())
+        return [self._unpack(presentation) for presentation in stored]
+
+    def get_version(self, presentation_id):
+        presentation = self._presentations.get(presentation_id)
+        return presentation.get("version", 1) if presentation else None
+
+    def page_keys(self, limit, after=None):
+        with self._lock:
+            end = bisect.bisect_left(self._order, tuple(after)) if after else len(self._order)
+            keys = self._order[max(0, end - limit):end]
+            return [
+                (updated_at, presentation_id, self._presentations[presentation_id].get("version", 1))
+                for updated_at, presentation_id in reversed(keys)
+            ]
+
+    def get_many(self, presentation_ids):
+        stored = [self._presentations.get(pid) for pid in presentation_ids]
+        return [self._unpack(presentation) for presentation in stored if presentation is not None]
+
+    def get_summaries(self, presentation_ids):
+        summaries = []
+        for presentation_id in presentation_ids:
+            stored = self._presentations.get(presentation_id)
+            if stored is not None:
+                summary = {field: stored[field] for field in SUMMARY_FIELDS if field in stored}
+                summary["slide_count"] = len(stored.get("slides") or [])
+                summaries.append(summary)
+        return summaries
+
+    def count(self):
+        return len(self._presentations)
+
+    def find_slide(self, slide_id, presentation_id=None):
+        with self._lock:
+            owners = self._slide_index.get(slide_id)
+            if not owners:
+                return None
+            if presentation_id is None:
+                return next(iter(owners.items()))
+            position = owners.get(presentation_id)
+            return (presentation_id, position) if position is not None else None
+
+
+class SQLiteConnectionPool:
+    """Fixed-size pool of SQLite connections shared between threads"""
+
+    def __init__(self, path, size=4):
+        self.path = path
+        self._pool = queue.Queue(maxsize=size)
+        for _ in range(size):
+            self._pool.put(self._connect())
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    @contextmanager
+    def transaction(self):
+        """Connection inside a write transaction, committed on success"""
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def close(self):
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+    def reopen(self):
+        """Open fresh connections in a forked child.
+
+        The inherited ones are kept referenced but never used or closed:
+        closing what looks like the last connection would checkpoint and
+        remove the WAL file the parent is still using.
+        """
+        self._inherited = []
+        while not self._pool.empty():
+            self._inherited.append(self._pool.get_nowait())
+        for _ in range(len(self._inherited)):
+            self._pool.put(self._connect())
+
+
+class SQLitePresentationRepository(PresentationRepository):
+    """SQLite store in WAL mode, indexed on presentation id, updated_at and slide id"""
+
+    name = "sqlite"
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS presentations (
+            id TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            version INTEGER NOT NULL DEFAULT 1,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_presentations_updated_at
+            ON presentations (updated_at, id);
+        CREATE TABLE IF NOT EXISTS slide_owners (
+            slide_id INTEGER NOT NULL,
+            presentation_id TEXT NOT NULL REFERENCES presentations (id) ON DELETE CASCADE,
+            position INTEGER NOT NULL,
+            PRIMARY KEY (slide_id, presentation_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_slide_owners_presentation_id ON slide_owners (presentation_id);
+    """
+    # PRAGMA user_version of a database that _migrate() has brought up to date
+    SCHEMA_VERSION = 2
+
+    def __init__(self, path, pool_size=4):
+        self.pool = SQLiteConnectionPool(path, size=pool_size)
+        with self.pool.connection() as conn:
+            conn.executescript(self.SCHEMA)
+        self._migrate()
+
+    def reopen(self):
+        self.pool.reopen()
+
+    @staticmethod
+    def _dump(presentation):
+        return json.dumps(presentation, separators=(",", ":"))
+
+    def _migrate(self):
+        """One-time upgrades of databases written by older versions, recorded in user_version"""
+        with self.pool.transaction() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version >= self.SCHEMA_VERSION:
+                return
+            if version < 2:
+                # slide_owners replaced the one-owner slides table; index the existing decks
+                conn.execute("DROP TABLE IF EXISTS slides")
+                conn.execute("DELETE FROM slide_owners")
+                for (data,) in conn.execute("SELECT data FROM presentations").fetchall():
+                    self._index_slides(conn, json.loads(data))
+            conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+
+    @staticmethod
+    def _index_slides(conn, presentation):
+        conn.execute("DELETE FROM slide_owners WHERE presentation_id = ?", (presentation["id"],))
+        conn.executemany(
+            "INSERT OR IGNORE INTO slide_owners (slide_id, presentation_id, position) VALUES (?, ?, ?)",
+            [
+                (slide["id"], presentation["id"], position)
+                for position, slide in enumerate(presentation["slides"])
+                if isinstance(slide.get("id"), int)
+            ],
+        )
+
+    def create(self, presentation):
+        presentation.setdefault("version", 1)
+        with self.pool.transaction() as conn:
+            conn.execute(
+                "INSERT INTO presentations (id, data, version, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (presentation["id"], self._dump(presentation), presentation["version"],
+                 presentation["created_at"], presentation["updated_at"]),
+            )
+            self._index_slides(conn, presentation)
+        return presentation
+
+    def get(self, presentation_id):
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                "SELECT data FROM presentations WHERE id = ?", (presentation_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def update(self, presentation_id, mutator):
+        with self.pool.transaction() as conn:
+            row = conn.execute(
+                "SELECT data FROM presentations WHERE id = ?", (presentation_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            presentation = json.loads(row[0])
+            if mutator(presentation) is False:
+                return presentation
+            presentation["updated_at"] = datetime.now().isoformat()
+            presentation["version"] = presentation.get("version", 1) + 1
+            conn.execute(
+                "UPDATE presentations SET data = ?, version = ?, updated_at = ? WHERE id = ?",
+                (self._dump(presentation), presentation["version"],
+                 presentation["updated_at"], presentation_id),
+            )
+            self._index_slides(conn, presentation)
+        return presentation
+
+    def list_all(self):
+        with self.pool.connection() as conn:
+            rows = conn.execute("SELECT data FROM presentations ORDER BY created_at").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def get_version(self, presentation_id):
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                "SELECT version FROM presentations WHERE id = ?", (presentation_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def page_keys(self, limit, after=None):
+        with self.pool.connection() as conn:
+            if after:
+                rows = conn.execute(
+                    "SELECT updated_at, id, version FROM presentations "
+                    "WHERE (updated_at, id) < (?, ?) ORDER BY updated_at DESC, id DESC LIMIT ?",
+                    (after[0], after[1], limit),
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT updated_at, id, version FROM presentations "
+                    "ORDER BY updated_at DESC, id DESC LIMIT ?",
+                    (limit,),
+                ).fetchall()
+        return [tuple(row) for row in rows]
+
+    def get_many(self, presentation_ids):
+        if not presentation_ids:
+            return []
+        placeholders = ",".join("?" * len(presentation_ids))
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                f"SELECT id, data FROM presentations WHERE id IN ({placeholders})",
+                list(presentation_ids),
+            ).fetchall()
+        by_id = {row[0]: json.loads(row[1]) for row in rows}
+        return [by_id[pid] for pid in presentation_ids if pid in by_id]
+
+    def get_summaries(self, presentation_ids):
+        if not presentation_ids:
+            return []
+        placeholders = ",".join("?" * len(presentation_ids))
+        with self.pool.connection() as conn:
+            # JSON1 reads the two fields and the slide count without building the slides
+            rows = conn.execute(
+                "SELECT id, json_extract(data, '$.prompt'), json_extract(data, '$.default_color_theme'), "
+                "created_at, updated_at, version, json_array_length(data, '$.slides') "
+                f"FROM presentations WHERE id IN ({placeholders})",
+                list(presentation_ids),
+            ).fetchall()
+        by_id = {}
+        for row in rows:
+            summary = {field: value for field, value in zip(SUMMARY_FIELDS, row) if value is not None}
+            summary["slide_count"] = row[-1] or 0
+            by_id[row[0]] = summary
+        return [by_id[pid] for pid in presentation_ids if pid in by_id]
+
+    def count(self):
+        with self.pool.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM presentations").fetchone()[0]
+
+    def find_slide(self, slide_id, presentation_id=None):
+        with self.pool.connection() as conn:
+            if presentation_id is None:
+                row = conn.execute(
+                    "SELECT presentation_id, position FROM slide_owners WHERE slide_id = ? "
+                    "ORDER BY rowid LIMIT 1", (slide_id,)
+                ).fetchone()
+            else:
+                row = conn.execute(
+                    "SELECT presentation_id, position FROM slide_owners "
+                    "WHERE slide_id = ? AND presentation_id = ?", (slide_id, presentation_id)
+                ).fetchone()
+        return tuple(row) if row else None
+
+
+def create_repository_from_env():
+    """Build the presentation repository configured by STORAGE_* environment variables"""
+    backend_name = os.getenv("STORAGE_BACKEND", "memory").lower()
+    if backend_name == "sqlite":
+        path = os.getenv("STORAGE_PATH", "slideflow.sqlite3")
+        pool_size = int(os.getenv("STORAGE_POOL_SIZE", "4"))
+        repository = SQLitePresentationRepository(path, pool_size=pool_size)
+        logger.info(f"Presentation storage: SQLite ({path})")
+    else:
+        repository = InMemoryPresentationRepository()
+        logger.info("Presentation storage: in-memory")
+    return repository
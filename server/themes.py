@@ -0,0 +1,166 @@
+"""
+Color theme registry and bulk recoloring.
+
+Every theme is compiled once, when it is registered, into a style table: the
+slide background plus the style overrides for each element role (title,
+content, bullets). Recoloring a slide is then one dict lookup and one
+update per element, with no per-request color logic, so a whole deck is
+recolored in a single pass.
+
+Elements carry an explicit "role" field. Slides stored before roles existed
+are given one from their id prefix ("title_ab12" -> "title") the first time
+they are recolored.
+
+Custom themes are registered next to the built-in ones in the same themes
+dict, so generation, export and GET /api/color-themes all see them. They can
+be loaded at startup from CUSTOM_THEMES_FILE (a JSON object of name ->
+colors), which every worker reads, or registered at runtime through the
+API, which only affects the worker that handled the request.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+THEME_COLOR_KEYS = ("background", "primary", "secondary", "text", "accent")
+ELEMENT_ROLES = ("title", "content", "bullets")
+DEFAULT_ROLE = "content"
+
+# Which theme color each element role is drawn in
+ROLE_COLORS = {
+    "title": "primary",
+    "content": "text",
+    "bullets": "text",
+}
+
+_HEX_COLOR_RE = re.compile(r"^#(?:[0-9a-fA-F]{3}|[0-9a-fA-F]{6})$")
+_THEME_NAME_RE = re.compile(r"^[a-z0-9][a-z0-9_-]{0,31}$")
+
+
+class ThemeError(ValueError):
+    """Raised when a custom theme is invalid or clashes with an existing one"""
+
+
+def element_role(element):
+    """Role of an element, inferred from its id prefix when it has none"""
+    role = element.get("role")
+    if role:
+        return role
+    prefix = str(element.get("id", "")).partition("_")[0]
+    return prefix if prefix in ROLE_COLORS else DEFAULT_ROLE
+
+
+def compile_style_table(colors):
+    """Background and per-role style overrides of one theme"""
+    return {
+        "background": colors["background"],
+        "roles": {role: {"color": colors[key]} for role, key in ROLE_COLORS.items()},
+    }
+
+
+class ThemeRegistry:
+    """Built-in and custom color themes with their precomputed style tables"""
+
+    def __init__(self, themes):
+        self.themes = themes
+        self.builtin = frozenset(themes)
+        self._tables = {name: compile_style_table(colors) for name, colors in themes.items()}
+        self._lock = threading.Lock()
+        self.slides_recolored = 0
+        self.elements_recolored = 0
+
+    def __contains__(self, name):
+        return name in self._tables
+
+    def custom_names(self):
+        return [name for name in self.themes if name not in self.builtin]
+
+    def register(self, name, colors, replace=False):
+        """Validate and add a custom theme; returns its normalized colors"""
+        if not isinstance(name, str) or not _THEME_NAME_RE.match(name):
+            raise ThemeError("Theme name must be 1-32 lowercase letters, digits, '-' or '_'")
+        if name in self.builtin:
+            raise ThemeError(f"'{name}' is a built-in theme")
+        if not isinstance(colors, dict):
+            raise ThemeError("colors must be an object")
+        missing = [key for key in THEME_COLOR_KEYS if key not in colors]
+        if missing:
+            raise ThemeError(f"Missing colors: {', '.join(missing)}")
+        normalized = {}
+        for key in THEME_COLOR_KEYS:
+            value = colors[key]
+            if not isinstance(value, str) or not _HEX_COLOR_RE.match(value):
+                raise ThemeError(f"{key} must be a hex color like #1e3a8a")
+            normalized[key] = value.lower()
+        with self._lock:
+            if name in self.themes and not replace:
+                raise ThemeError(f"Theme '{name}' already exists")
+            # Table first, so a theme listed in themes always has one
+            self._tables[name] = compile_style_table(normalized)
+            self.themes[name] = normalized
+        return normalized
+
+    def style_table(self, name):
+        return self._tables[name]
+
+    def recolor_slide(self, slide, name, table=None):
+        """Recolor a slide and its text elements in place"""
+        table = table or self._tables[name]
+        roles = table["roles"]
+        slide["color_theme"] = name
+        slide["background_color"] = table["background"]
+        count = 0
+        for element in slide.get("elements", ()):
+            if element.get("type") != "text":
+                continue
+            role = element.get("role")
+            if not role:
+                role = element["role"] = element_role(element)
+            style = roles.get(role) or roles[DEFAULT_ROLE]
+            element_style = element.get("style")
+            if element_style is None:
+                element["style"] = dict(style)
+            else:
+                element_style.update(style)
+            count += 1
+        self.slides_recolored += 1
+        self.elements_recolored += count
+        return count
+
+    def recolor_slides(self, slides, name, slide_ids=None):
+        """Recolor every slide, or only those in slide_ids; returns the ids recolored"""
+        table = self._tables[name]
+        recolored = []
+        for slide in slides:
+            if slide_ids is None or slide.get("id") in slide_ids:
+                self.recolor_slide(slide, name, table)
+                recolored.append(slide.get("id"))
+        return recolored
+
+    def stats(self):
+        return {
+            "themes": len(self._tables),
+            "custom": len(self._tables) - len(self.builtin),
+            "slides_recolored": self.slides_recolored,
+            "elements_recolored": self.elements_recolored,
+        }
+
+
+def create_theme_registry_from_env(themes):
+    """Registry over themes, plus any custom themes listed in CUSTOM_THEMES_FILE"""
+    registry = ThemeRegistry(themes)
+    path = os.getenv('CUSTOM_THEMES_FILE')
+    if path:
+        try:
+            with open(path) as f:
+                custom = json.load(f)
+            for name, colors in custom.items():
+                registry.register(name, colors, replace=True)
+            logger.info(f"Loaded {len(custom)} custom themes from {path}")
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not load custom themes from {path}: {str(e)}")
+    return registry
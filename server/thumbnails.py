@@ -0,0 +1,426 @@
+"""
+Server-side slide thumbnails.
+
+Slides are rasterized with Pillow from their elements and background color
+on the 800x450 editor canvas, scaled down to a small PNG or WebP. Text is
+wrapped and clipped to its box; shapes, tables and inline data-URL images
+are drawn too, so a thumbnail is a faithful overview rather than a preview
+of the final export.
+
+Rendered thumbnails go into a DiskLRUCache keyed by a hash of the slide's
+content plus the size and format, so an unchanged slide is never rendered
+twice and editing one slide only re-renders that one. The key also appears
+in thumbnail URLs (the v= parameter), so clients and proxies can cache a
+URL forever: new content means a new URL.
+
+Bulk rendering (a whole deck, or the slides of a listing page) runs in a
+process pool so rasterizing many slides neither blocks request threads nor
+holds the server's GIL. Single thumbnails requested on demand are rendered
+inline, or wait for the pool if that slide is already being rendered.
+
+Pillow is imported on first use; without it create_thumbnail_service_from_env
+returns None and the thumbnail routes report it is not installed.
+"""
+
+import base64
+import hashlib
+import importlib.util
+import json
+import logging
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+
+from export_cache import DiskLRUCache
+from pptx_export import CANVAS_HEIGHT, CANVAS_WIDTH
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_VERSION = 1
+FORMATS = {"png": "image/png", "webp": "image/webp"}
+MIN_WIDTH = 32
+MAX_WIDTH = 1600
+
+Image = ImageDraw = ImageFont = None
+
+_HEX_COLOR_RE = re.compile(r"^#([0-9a-fA-F]{6}|[0-9a-fA-F]{3})$")
+_PX_RE = re.compile(r"^\s*([\d.]+)\s*(px|pt)?\s*$")
+_load_lock = threading.Lock()
+
+
+def pil_available():
+    """Whether Pillow can be imported, without importing it"""
+    return importlib.util.find_spec("PIL") is not None
+
+
+def load_pil():
+    """Import Pillow on first use"""
+    global Image, ImageDraw, ImageFont
+    if Image is not None:
+        return
+    with _load_lock:
+        if Image is None:
+            from PIL import Image as _Image, ImageDraw as _ImageDraw, ImageFont as _ImageFont
+            ImageDraw, ImageFont = _ImageDraw, _ImageFont
+            # Set last: other threads treat a bound Image as "everything is loaded"
+            Image = _Image
+
+
+def parse_rgb(value, default=None):
+    """Parse '#rrggbb' / '#rgb' into an (r, g, b) tuple"""
+    match = _HEX_COLOR_RE.match(value or '') if isinstance(value, str) else None
+    if not match:
+        return default
+    digits = match.group(1)
+    if len(digits) == 3:
+        digits = ''.join(c * 2 for c in digits)
+    return tuple(int(digits[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def parse_px(value, default_px=16):
+    """Parse a CSS font size ('24px', '18pt', 16) into pixels"""
+    match = _PX_RE.match(str(value)) if value is not None else None
+    if not match:
+        return default_px
+    size = float(match.group(1))
+    return size / 0.75 if match.group(2) == 'pt' else size
+
+
+@lru_cache(maxsize=128)
+def load_font(size, bold=False):
+    """Sans font at a pixel size: THUMBNAIL_FONT(_BOLD), DejaVu Sans, or Pillow's default"""
+    names = [os.getenv('THUMBNAIL_FONT_BOLD' if bold else 'THUMBNAIL_FONT'),
+             "DejaVuSans-Bold.ttf" if bold else "DejaVuSans.ttf",
+             "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf" if bold
+             else "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"]
+    for name in names:
+        if name:
+            try:
+                return ImageFont.truetype(name, size)
+            except OSError:
+                continue
+    try:
+        return ImageFont.load_default(size)
+    except TypeError:
+        return ImageFont.load_default()
+
+
+def wrap_lines(lines, font, width):
+    """Greedy word wrap of each line to a pixel width"""
+    wrapped = []
+    for line in lines:
+        words = line.split()
+        if not words:
+            wrapped.append("")
+            continue
+        current = words[0]
+        for word in words[1:]:
+            candidate = f"{current} {word}"
+            if font.getlength(candidate) <= width:
+                current = candidate
+            else:
+                wrapped.append(current)
+                current = word
+        wrapped.append(current)
+    return wrapped
+
+
+def thumbnail_size(width):
+    return width, max(1, round(width * CANVAS_HEIGHT / CANVAS_WIDTH))
+
+
+def default_elements(slide):
+    """Title and content elements for slides stored without laid-out elements"""
+    elements = [{"type": "text", "content": slide.get('title', 'Slide'), "x": 50, "y": 80,
+                 "width": 700, "height": 60, "style": {"fontSize": "24px", "fontWeight": "bold"}}]
+    if slide.get('content'):
+        elements.append({"type": "text", "content": slide['content'], "x": 50, "y": 180,
+                         "width": 700, "height": 200, "style": {"fontSize": "16px"}})
+    return elements
+
+
+def render_thumbnail(slide, width=320, fmt="png"):
+    """Rasterize one slide dict into PNG or WebP bytes"""
+    load_pil()
+    scale = width / CANVAS_WIDTH
+    background = parse_rgb(slide.get('background_color'), (255, 255, 255))
+    image = Image.new("RGB", thumbnail_size(width), background)
+    draw = ImageDraw.Draw(image)
+
+    for element in slide.get('elements') or default_elements(slide):
+        style = element.get('style') or {}
+        try:
+            x, y = float(element.get('x', 0)) * scale, float(element.get('y', 0)) * scale
+            w, h = float(element.get('width', 100)) * scale, float(element.get('height', 40)) * scale
+        except (TypeError, ValueError):
+            continue
+        box = (round(x), round(y), round(x + w), round(y + h))
+        element_type = element.get('type')
+
+        if element_type in ('text', 'bulletList'):
+            lines = style.get('listItems') if element_type == 'bulletList' else None
+            lines = lines or str(element.get('content', '')).split('\n')
+            _draw_text(draw, box, lines, style, scale)
+        elif element_type == 'shape':
+            fill = parse_rgb(style.get('backgroundColor'), (59, 130, 246))
+            shape_type = style.get('shapeType')
+            if shape_type == 'circle':
+                draw.ellipse(box, fill=fill)
+            elif shape_type == 'triangle':
+                draw.polygon([((box[0] + box[2]) / 2, box[1]), (box[2], box[3]), (box[0], box[3])], fill=fill)
+            else:
+                draw.rectangle(box, fill=fill)
+        elif element_type == 'table':
+            _draw_table(draw, box, element.get('tableData') or style.get('tableData') or {}, scale)
+        elif element_type == 'image':
+            _draw_image(image, draw, box, style.get('imageUrl'))
+
+    buffer = BytesIO()
+    if fmt == "webp":
+        image.save(buffer, "WEBP", quality=80, method=4)
+    else:
+        image.save(buffer, "PNG", compress_level=6)
+    return buffer.getvalue()
+
+
+def _draw_text(draw, box, lines, style, scale):
+    size = max(6, round(parse_px(style.get('fontSize')) * scale))
+    bold = style.get('fontWeight') in ('bold', 'bolder', '600', '700', '800', '900')
+    font = load_font(size, bold)
+    color = parse_rgb(style.get('color'), (17, 24, 39))
+    try:
+        line_height = float(style['lineHeight']) if style.get('lineHeight') else 1.2
+    except ValueError:
+        line_height = 1.2
+    step = max(1, round(size * line_height))
+    align = style.get('textAlign')
+    width = box[2] - box[0]
+    y = box[1]
+    for line in wrap_lines(lines, font, width):
+        # Clip to the box like the editor's overflow: hidden
+        if y > box[1] and y + size > box[3]:
+            break
+        x = box[0]
+        if align in ('center', 'right'):
+            offset = width - font.getlength(line)
+            x += offset / 2 if align == 'center' else offset
+        draw.text((x, y), line, font=font, fill=color)
+        y += step
+
+
+def _draw_table(draw, box, table_data, scale):
+    cells = table_data.get('cells') or []
+    try:
+        rows = int(table_data.get('rows') or len(cells) or 0)
+        cols = int(table_data.get('cols') or (len(cells[0]) if cells else 0))
+    except (TypeError, ValueError):
+        return
+    if rows <= 0 or cols <= 0:
+        return
+    cell_w = (box[2] - box[0]) / cols
+    cell_h = (box[3] - box[1]) / rows
+    font = load_font(max(6, round(12 * scale)))
+    for r in range(rows):
+        for c in range(cols):
+            cell = (box[0] + c * cell_w, box[1] + r * cell_h, box[0] + (c + 1) * cell_w, box[1] + (r + 1) * cell_h)
+            draw.rectangle(cell, outline=(156, 163, 175))
+            try:
+                text = str(cells[r][c])
+            except (IndexError, TypeError):
+                continue
+            draw.text((cell[0] + 2, cell[1] + 1), text, font=font, fill=(17, 24, 39))
+
+
+def _draw_image(image, draw, box, image_url):
+    # Only inline data URLs are drawn; the server never fetches remote images
+    width, height = box[2] - box[0], box[3] - box[1]
+    if width <= 0 or height <= 0:
+        return
+    if image_url and image_url.startswith('data:image/') and ';base64,' in image_url:
+        try:
+            picture = Image.open(BytesIO(base64.b64decode(image_url.split(';base64,', 1)[1])))
+            picture = picture.convert("RGBA").resize((width, height))
+            image.paste(picture, box[:2], picture)
+            return
+        except Exception as e:
+            logger.warning(f"Skipping unreadable image element: {str(e)}")
+    draw.rectangle(box, fill=(229, 231, 235))
+
+
+def _render_batch(items):
+    """Process pool entry point: render (key, slide, width, fmt) items into (key, bytes)"""
+    return [(key, render_thumbnail(slide, width, fmt)) for key, slide, width, fmt in items]
+
+
+class ThumbnailService:
+    """Cached thumbnail rendering with a process pool for bulk work"""
+
+    def __init__(self, cache, width=320, fmt="png", workers=2, batch_size=8, start_method=None):
+        self.cache = cache
+        self.width = width
+        self.format = fmt
+        self.workers = workers
+        self.batch_size = batch_size
+        self.start_method = start_method
+        self._pool = None
+        self._pending = {}  # key -> future of the batch rendering it
+        self._lock = threading.Lock()
+        self.rendered_inline = 0
+        self.rendered_pool = 0
+
+    def options(self, width=None, fmt=None):
+        """Validated (width, format), falling back to the defaults"""
+        try:
+            width = int(width) if width is not None else self.width
+        except (TypeError, ValueError):
+            raise ValueError("width must be an integer")
+        fmt = (fmt or self.format).lower()
+        if not MIN_WIDTH <= width <= MAX_WIDTH:
+            raise ValueError(f"width must be between {MIN_WIDTH} and {MAX_WIDTH}")
+        if fmt not in FORMATS:
+            raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+        return width, fmt
+
+    def key(self, slide, width=None, fmt=None):
+        """Content hash of what a thumbnail shows, plus its size and format"""
+        width, fmt = self.options(width, fmt)
+        elements = slide.get('elements') or []
+        payload = json.dumps({
+            "v": THUMBNAIL_VERSION,
+            "width": width,
+            "format": fmt,
+            "background": slide.get('background_color'),
+            "elements": elements,
+            "title": None if elements else slide.get('title'),
+            "content": None if elements else slide.get('content'),
+        }, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def url(self, presentation_id, slide, width=None, fmt=None):
+        """Versioned URL of a slide's thumbnail; changes whenever the slide does"""
+        width, fmt = self.options(width, fmt)
+        return (f"/api/presentations/{presentation_id}/slides/{slide.get('id')}/thumbnail"
+                f"?width={width}&format={fmt}&v={self.key(slide, width, fmt)[:16]}")
+
+    def get(self, slide, width=None, fmt=None):
+        """(key, image bytes) of a slide's thumbnail, rendering it on a cache miss"""
+        width, fmt = self.options(width, fmt)
+        key = self.key(slide, width, fmt)
+        data = self.cache.get_bytes(key)
+        if data is not None:
+            return key, data
+        with self._lock:
+            pending = self._pending.get(key)
+        if pending is not None:
+            # Already queued in the pool: wait for it instead of rendering twice
+            try:
+                for rendered_key, rendered in pending.result():
+                    if rendered_key == key:
+                        return key, rendered
+            except Exception as e:
+                logger.warning(f"Thumbnail pool render failed, rendering inline: {str(e)}")
+        data = render_thumbnail(slide, width, fmt)
+        self.cache.put_bytes(key, data)
+        with self._lock:
+            self.rendered_inline += 1
+        return key, data
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                ctx = multiprocessing.get_context(self.start_method) if self.start_method else None
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx)
+            return self._pool
+
+    def prerender(self, slides, width=None, fmt=None, wait=False):
+        """Render the uncached thumbnails of many slides in the process pool.
+
+        Returns the number of slides queued. With wait=True it blocks until
+        they are all in the cache.
+        """
+        width, fmt = self.options(width, fmt)
+        items = []
+        seen = set()
+        with self._lock:
+            pending = set(self._pending)
+        for slide in slides:
+            key = self.key(slide, width, fmt)
+            if key in seen or key in pending or self.cache.contains(key):
+                continue
+            seen.add(key)
+            items.append((key, slide, width, fmt))
+        if not items:
+            return 0
+
+        pool = self._get_pool()
+        batches_done = []
+        for start in range(0, len(items), self.batch_size):
+            batch = items[start:start + self.batch_size]
+            keys = [item[0] for item in batch]
+            done = threading.Event()
+            future = pool.submit(_render_batch, batch)
+            with self._lock:
+                for key in keys:
+                    self._pending[key] = future
+            future.add_done_callback(lambda f, keys=keys, done=done: self._finished(f, keys, done))
+            batches_done.append(done)
+        if wait:
+            for done in batches_done:
+                done.wait()
+        return len(items)
+
+    def _finished(self, future, keys, done):
+        """Store a finished batch in the cache (runs on the pool's result thread)"""
+        try:
+            results = future.result()
+        except Exception as e:
+            logger.warning(f"Thumbnail batch failed: {str(e)}")
+            results = []
+        try:
+            for key, data in results:
+                self.cache.put_bytes(key, data)
+        finally:
+            with self._lock:
+                self.rendered_pool += len(results)
+                for key in keys:
+                    self._pending.pop(key, None)
+            done.set()
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            counters = {
+                "rendered_inline": self.rendered_inline,
+                "rendered_pool": self.rendered_pool,
+                "pending": len(self._pending),
+            }
+        return {**counters, "workers": self.workers, "cache": self.cache.stats()}
+
+
+def create_thumbnail_service_from_env():
+    """Build the thumbnail service from THUMBNAIL_* environment variables, or None without Pillow"""
+    if not pil_available():
+        logger.warning("Pillow not installed; slide thumbnails are disabled")
+        return None
+    cache = DiskLRUCache(
+        os.getenv("THUMBNAIL_DIR", os.path.join(os.getenv("EXPORT_DIR", "exports"), "thumbnails")),
+        max_bytes=int(os.getenv("THUMBNAIL_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+        suffix=".img",
+    )
+    return ThumbnailService(
+        cache,
+        width=int(os.getenv("THUMBNAIL_WIDTH", "320")),
+        fmt=os.getenv("THUMBNAIL_FORMAT", "png").lower(),
+        workers=int(os.getenv("THUMBNAIL_WORKERS", "2")),
+        # Spawned workers only import this module, and never inherit the server's threads
+        start_method=os.getenv("THUMBNAIL_START_METHOD", "spawn"),
+    )